@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+History Columns Benchmark - filter latency and memory of the columnar
+history layout against the dict-of-ISO-strings layout used by HistoryPage
+
+Usage: python bench_history_columns.py [rows ...]   (default: 100000 1000000)
+"""
+
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from history_columns import HistoryColumns
+
+
+def make_entries(count):
+    """Synthetic chronological history over two years and ~5000 domains"""
+    rng = random.Random(42)
+    start = datetime.now() - timedelta(days=730)
+    step = 730 * 24 * 60 * 60 / count
+    domains = [f"site{i}.example.com" for i in range(5000)]
+    entries = []
+    for i in range(count):
+        moment = start + timedelta(seconds=i * step)
+        domain = domains[min(int(rng.paretovariate(1.2)) - 1, len(domains) - 1)]
+        url = f"https://{domain}/page/{rng.randrange(200)}"
+        entries.append({
+            'url': url,
+            'title': f"Page {i % 200} - {domain}",
+            'timestamp': moment.isoformat(),
+            'visit_time': moment.strftime('%Y-%m-%d %H:%M:%S')
+        })
+    return entries
+
+
+def legacy_filter(entries, cutoff, domain):
+    """The per-entry parse HistoryPage used before the columnar layout"""
+    result = []
+    counts = {}
+    for item in entries:
+        date_obj = datetime.fromisoformat(item['timestamp'].replace('Z', '+00:00'))
+        url = item['url']
+        host = url.split('/')[2]
+        counts[host] = counts.get(host, 0) + 1
+        if date_obj >= cutoff and url.find(domain) != -1:
+            result.append(item)
+    return result, counts
+
+
+def timed(func, repeat=5):
+    best = None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - t
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000, result
+
+
+def measure_memory(build):
+    tracemalloc.start()
+    obj = build()
+    size, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, size
+
+
+def run(count):
+    print(f"\n{count:,} rows")
+    print("-" * 50)
+
+    entries, dict_bytes = measure_memory(lambda: make_entries(count))
+    _columns, column_bytes = measure_memory(lambda: HistoryColumns.from_entries(entries))
+    build_ms, columns = timed(lambda: HistoryColumns.from_entries(entries), repeat=1)
+    # What HistoryPage does: store rows (url, title, epoch), no dict per visit
+    rows = [(e['url'], e['title'], datetime.fromisoformat(e['timestamp']).timestamp()) for e in entries]
+    _columns, row_column_bytes = measure_memory(lambda: HistoryColumns.from_rows(rows))
+    row_build_ms, _ = timed(lambda: HistoryColumns.from_rows(rows), repeat=1)
+    del rows
+
+    cutoff = datetime.now() - timedelta(days=30)
+    domain = "site1.example.com"
+
+    legacy_ms, (legacy_rows, _counts) = timed(lambda: legacy_filter(entries, cutoff, domain), repeat=1)
+
+    def columnar():
+        mask = columns.time_mask(cutoff) & columns.domain_mask(domain)
+        return mask, columns.domain_counts()
+
+    column_ms, (mask, _domain_counts) = timed(columnar)
+    assert int(mask.sum()) == len(legacy_rows)
+
+    stats_ms, _ = timed(lambda: columns.domain_counts())
+    day_ms, _ = timed(lambda: columns.group_by_day(mask.nonzero()[0]))
+
+    print(f"dict layout:      {dict_bytes / count:8.1f} bytes/row")
+    print(f"columnar layout:  {column_bytes / count:8.1f} bytes/row "
+          f"({columns.memory_usage() / count:.1f} in columns, URL strings shared)")
+    print(f"column build:     {build_ms:8.1f} ms from dicts, "
+          f"{row_build_ms:.1f} ms from store rows ({row_column_bytes / count:.1f} bytes/row)")
+    print(f"filter (legacy):  {legacy_ms:8.1f} ms")
+    print(f"filter (columns): {column_ms:8.1f} ms  -> {len(legacy_rows)} rows")
+    print(f"domain counts:    {stats_ms:8.1f} ms")
+    print(f"group by day:     {day_ms:8.1f} ms")
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100000, 1000000]
+    print("History Columns Benchmark")
+    print("=" * 50)
+    for count in sizes:
+        run(count)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+New Tab Benchmark - time-to-interactive of a new tab created cold (new
+QWebEngineView + loading the new-tab page) against one handed out by
+WarmViewPool. Time-to-interactive ends at loadFinished for a cold view and
+on the next event loop turn for a warm one
+
+Usage: python bench_new_tab.py [tabs]   (default: 10)
+"""
+
+import os
+import sys
+import time
+
+from PyQt5.QtCore import QEventLoop, QTimer, QUrl
+from PyQt5.QtWidgets import QApplication, QTabWidget
+from PyQt5.QtWebEngineWidgets import QWebEngineView
+
+from view_pool import WarmViewPool
+
+
+def new_tab_url():
+    newtab_path = os.path.abspath("newtab.html")
+    if os.path.exists(newtab_path):
+        return QUrl.fromLocalFile(newtab_path)
+    return QUrl("about:blank")
+
+
+def wait(signal=None, timeout_ms=30000):
+    """Spin the event loop until ``signal`` fires (or the next turn if None)"""
+    loop = QEventLoop()
+    if signal is not None:
+        signal.connect(loop.quit)
+    QTimer.singleShot(0 if signal is None else timeout_ms, loop.quit)
+    loop.exec_()
+    if signal is not None:
+        signal.disconnect(loop.quit)
+
+
+def open_cold(tabs, url):
+    started = time.perf_counter()
+    view = QWebEngineView()
+    view.setUrl(url)
+    tabs.setCurrentIndex(tabs.addTab(view, "New Tab"))
+    wait(view.loadFinished)
+    return (time.perf_counter() - started) * 1000
+
+
+def open_warm(tabs, pool):
+    pool.fill()
+    while pool.warming:
+        wait(pool.warming[0].loadFinished)
+    started = time.perf_counter()
+    view = pool.acquire()
+    tabs.setCurrentIndex(tabs.addTab(view, view.title() or "New Tab"))
+    wait()
+    return (time.perf_counter() - started) * 1000
+
+
+def summary(name, samples):
+    samples = sorted(samples)
+    print(f"{name:>6}: median {samples[len(samples) // 2]:8.1f} ms   "
+          f"min {samples[0]:8.1f} ms   max {samples[-1]:8.1f} ms")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    app = QApplication(sys.argv)
+    tabs = QTabWidget()
+    tabs.show()
+    url = new_tab_url()
+
+    # The first view starts the renderer process; keep it out of both series
+    open_cold(tabs, url)
+
+    cold = [open_cold(tabs, url) for _ in range(count)]
+    pool = WarmViewPool(QWebEngineView, url, size=1, refill_delay_ms=60000)
+    warm = [open_warm(tabs, pool) for _ in range(count)]
+
+    print(f"New tab time-to-interactive, {count} tabs, {url.toString()}")
+    summary('cold', cold)
+    summary('warm', warm)
+    tabs.close()
+    app.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Profile Migrations Benchmark - bookmark load cost with the old
+upgrade-on-every-startup path versus one-shot versioned migrations
+
+Usage: python bench_profile_migrations.py [bookmarks ...]   (default: 1000 10000 100000)
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from profile_migrations import ProfileMigrator, bookmarks_to_v11, bookmarks_folder_field
+
+
+def make_legacy_bookmarks(count):
+    return [
+        {'title': f"Bookmark {i}", 'url': f"https://site{i}.example.com/", 'timestamp': '2024-01-01T00:00:00'}
+        for i in range(count)
+    ]
+
+
+def load_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def timed(func, repeat=5):
+    best = None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - t
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def run(count):
+    print(f"\n{count:,} bookmarks")
+    print("-" * 50)
+
+    data_dir = tempfile.mkdtemp(prefix='bench_migrations_')
+    try:
+        path = os.path.join(data_dir, 'bookmarks.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(make_legacy_bookmarks(count), f)
+
+        # Before: every startup rebuilt the folder structure from whatever was loaded
+        legacy_ms = timed(lambda: bookmarks_folder_field(bookmarks_to_v11(load_json(path))))
+
+        # After: first start migrates and writes back once ...
+        t = time.perf_counter()
+        ProfileMigrator(data_dir).migrate('bookmarks', load_json(path), path)
+        first_ms = (time.perf_counter() - t) * 1000
+
+        # ... later starts only read the manifest and take the fast path
+        def startup():
+            migrator = ProfileMigrator(data_dir)
+            migrator.migrate('bookmarks', load_json(path), path)
+            assert migrator.stats['fast_path'] == 1
+
+        current_ms = timed(startup)
+        transform_ms = timed(lambda: ProfileMigrator(data_dir).migrate('bookmarks', None, path))
+
+        print(f"upgrade every start (old): {legacy_ms:8.2f} ms")
+        print(f"first start (migrate+write): {first_ms:6.2f} ms")
+        print(f"later starts (load + fast path): {current_ms:6.2f} ms")
+        print(f"  of which migration check: {transform_ms:6.3f} ms")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000]
+    print("Profile Migrations Benchmark")
+    print("=" * 50)
+    for count in sizes:
+        run(count)
+
+
+if __name__ == "__main__":
+    main()
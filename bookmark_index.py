@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+Bookmark Index
+Normalized-URL -> bookmark id index for O(1) "is bookmarked" checks and
+duplicate detection, with a compact Bloom filter in front of it for fast
+negatives on very large (imported) collections
+"""
+
+import math
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional
+
+# Collections at least this large get a Bloom pre-filter
+BLOOM_THRESHOLD = 50000
+
+# Target false positive rate of the pre-filter
+BLOOM_ERROR_RATE = 0.01
+
+# Rebuild the pre-filter once this share of indexed URLs has been removed
+BLOOM_STALE_RATIO = 0.25
+
+DEFAULT_PORTS = {'http': 80, 'https': 443, 'ftp': 21}
+
+
+URL_RE = re.compile(r'^([A-Za-z][A-Za-z0-9+.-]*)://([^/?#]*)(.*)$', re.DOTALL)
+
+
+@lru_cache(maxsize=4096)
+def normalize_url(url: str) -> str:
+    """
+    Canonical form used as index key.
+
+    Scheme and host are lowercased, default ports are dropped and an empty
+    path becomes "/"; path, query and fragment are kept as they are.
+    """
+    url = (url or '').strip()
+    match = URL_RE.match(url)
+    if not match:
+        return url
+
+    scheme, netloc, rest = match.groups()
+    scheme = scheme.lower()
+    userinfo, _, host = netloc.rpartition('@')
+
+    # Split off the port (IPv6 literals keep their brackets)
+    name, sep, port = host.rpartition(':')
+    if sep and port.isdigit() and not name.endswith(':'):
+        host = name if int(port) == DEFAULT_PORTS.get(scheme) else f"{name}:{int(port)}"
+    host = host.lower()
+    if userinfo:
+        host = f"{userinfo}@{host}"
+
+    if not rest.startswith('/'):
+        rest = '/' + rest
+    return f"{scheme}://{host}{rest}"
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings.
+
+    Bit positions come from double hashing of the built-in string hash, which
+    CPython caches on the str object, so a negative lookup costs a handful of
+    bit tests and no extra hashing.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = BLOOM_ERROR_RATE):
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.num_bits = max(64, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        h = hash(key) & 0xFFFFFFFFFFFFFFFF
+        h1 = h & 0xFFFFFFFF
+        h2 = (h >> 32) | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        bits = self.bits
+        for pos in self._positions(key):
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+
+class BookmarkIndex:
+    """
+    Normalized URL -> bookmark id.
+
+    Owners keep it in sync through ``add`` / ``remove`` / ``update`` or call
+    ``rebuild`` after bulk changes. Bookmarks without an ``id`` (legacy list
+    layout) are indexed under their URL.
+    """
+
+    def __init__(self, bookmarks: Optional[Iterable[Dict[str, Any]]] = None):
+        self._ids: Dict[str, Any] = {}
+        self._bloom: Optional[BloomFilter] = None
+        self._removed_since_bloom = 0
+        self.stats = {
+            'lookups': 0,
+            'bloom_negatives': 0,
+            'rebuilds': 0
+        }
+        if bookmarks is not None:
+            self.rebuild(bookmarks)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, url: str) -> bool:
+        return self.contains(url)
+
+    def rebuild(self, bookmarks: Iterable[Dict[str, Any]]):
+        """Re-index a whole (flat) bookmark collection"""
+        self.stats['rebuilds'] += 1
+        ids = {}
+        for bookmark in bookmarks:
+            url = bookmark.get('url') if isinstance(bookmark, dict) else None
+            if url:
+                ids.setdefault(normalize_url(url), bookmark.get('id', url))
+        self._ids = ids
+        self._rebuild_bloom()
+
+    def _rebuild_bloom(self):
+        self._removed_since_bloom = 0
+        if len(self._ids) < BLOOM_THRESHOLD:
+            self._bloom = None
+            return
+        # Leave headroom so that further additions keep the error rate
+        bloom = BloomFilter(len(self._ids) * 2)
+        for key in self._ids:
+            bloom.add(key)
+        self._bloom = bloom
+
+    def add(self, bookmark: Dict[str, Any]) -> bool:
+        """Index a bookmark; returns False if its URL is already bookmarked"""
+        url = bookmark.get('url')
+        if not url:
+            return False
+        key = normalize_url(url)
+        if key in self._ids:
+            return False
+        self._ids[key] = bookmark.get('id', url)
+        if self._bloom is not None:
+            self._bloom.add(key)
+            if self._bloom.count > self._bloom.capacity:
+                self._rebuild_bloom()
+        elif len(self._ids) >= BLOOM_THRESHOLD:
+            self._rebuild_bloom()
+        return True
+
+    def remove(self, url: str) -> Optional[Any]:
+        """Drop a URL from the index; returns the id it was mapped to"""
+        bookmark_id = self._ids.pop(normalize_url(url), None)
+        if bookmark_id is not None and self._bloom is not None:
+            # Bloom filters cannot delete; rebuild once enough bits are stale
+            self._removed_since_bloom += 1
+            if self._removed_since_bloom > len(self._ids) * BLOOM_STALE_RATIO:
+                self._rebuild_bloom()
+        return bookmark_id
+
+    def update(self, old_url: str, bookmark: Dict[str, Any]) -> bool:
+        """Re-index a bookmark whose URL (or id) was edited"""
+        self.remove(old_url)
+        return self.add(bookmark)
+
+    def get_id(self, url: str) -> Optional[Any]:
+        """Bookmark id for ``url``, or None"""
+        self.stats['lookups'] += 1
+        key = normalize_url(url)
+        if self._bloom is not None and key not in self._bloom:
+            self.stats['bloom_negatives'] += 1
+            return None
+        return self._ids.get(key)
+
+    def contains(self, url: str) -> bool:
+        return self.get_id(url) is not None
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats['size'] = len(self._ids)
+        stats['bloom_bits'] = self._bloom.num_bits if self._bloom else 0
+        stats['bloom_hashes'] = self._bloom.num_hashes if self._bloom else 0
+        return stats
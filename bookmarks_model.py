@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+"""
+Bookmarks List Model
+Model/view for the bookmarks page: display strings are formatted once per
+bookmark when the list is loaded, a proxy keeps the folder/search filter and
+the sort order as a row mapping, and a single delegate paints every row
+"""
+
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+from PyQt5.QtCore import QAbstractListModel, QAbstractProxyModel, QModelIndex, QRect, QSize, Qt
+from PyQt5.QtGui import QColor, QFont, QFontMetrics
+from PyQt5.QtWidgets import QStyle, QStyledItemDelegate
+
+# Custom roles (Qt.UserRole keeps the bookmark dict, as QListWidgetItem did)
+BookmarkRole = Qt.UserRole
+UrlRole = Qt.UserRole + 1
+FolderRole = Qt.UserRole + 2
+DateRole = Qt.UserRole + 3
+
+NO_FOLDER = 'Без папки'
+
+ISO_DATE_RE = re.compile(r'^(\d{4})-(\d{2})-(\d{2})')
+
+SORT_DATE = 'date'
+SORT_TITLE = 'title'
+SORT_URL = 'url'
+
+
+def bookmark_date(bookmark: Dict[str, Any]) -> str:
+    """ISO date the bookmark was added ('' when unknown)"""
+    value = bookmark.get('date_added') or bookmark.get('timestamp') or ''
+    return value if isinstance(value, str) else ''
+
+
+def format_date(value: str) -> str:
+    """'2024-03-05T10:00:00' -> '05.03.2024' without parsing the whole timestamp"""
+    match = ISO_DATE_RE.match(value)
+    if not match:
+        return ''
+    year, month, day = match.groups()
+    return f"{day}.{month}.{year}"
+
+
+class BookmarkKeys(NamedTuple):
+    """The key lists one ``set_bookmarks`` call produced"""
+    folders: List[str]
+    iso_dates: List[str]
+    title_keys: List[str]
+    url_keys: List[str]
+
+
+class BookmarkListModel(QAbstractListModel):
+    """
+    Flat bookmark list. ``set_bookmarks`` precomputes the painted strings and
+    the lowercase search/sort keys in parallel lists, so neither painting
+    nor filtering touches the bookmark dicts again.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.set_bookmarks([], reset=False)
+
+    def set_bookmarks(self, bookmarks: Sequence[Dict[str, Any]], reset: bool = True):
+        if reset:
+            self.beginResetModel()
+        self.bookmarks: List[Dict[str, Any]] = list(bookmarks)
+        self.titles = [b.get('title') or 'Без названия' for b in self.bookmarks]
+        self.urls = [b.get('url', '') for b in self.bookmarks]
+        self.folders = [b.get('folder') or '' for b in self.bookmarks]
+        self.iso_dates = [bookmark_date(b) for b in self.bookmarks]
+        self.dates = [format_date(value) for value in self.iso_dates]
+        self.title_keys = [title.lower() for title in self.titles]
+        self.url_keys = [url.lower() for url in self.urls]
+        if reset:
+            self.endResetModel()
+
+    def keys(self) -> BookmarkKeys:
+        return BookmarkKeys(self.folders, self.iso_dates, self.title_keys, self.url_keys)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.bookmarks)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        if role == Qt.DisplayRole:
+            return self.titles[row]
+        if role in (UrlRole, Qt.ToolTipRole):
+            return self.urls[row]
+        if role == FolderRole:
+            return self.folders[row]
+        if role == DateRole:
+            return self.dates[row]
+        if role == BookmarkRole:
+            return self.bookmarks[row]
+        return None
+
+
+def filter_rows(keys: BookmarkKeys, folder: Optional[str], search_text: str,
+                sort_key: Optional[str]) -> List[int]:
+    """
+    Visible source rows in display order. Only reads ``keys`` (lists that
+    ``set_bookmarks`` replaces, never mutates), so it can run on a worker
+    thread.
+    """
+    rows = range(len(keys.url_keys))
+
+    if folder is not None:
+        folders = keys.folders
+        if folder == NO_FOLDER:
+            rows = [i for i in rows if not folders[i] or folders[i] == NO_FOLDER]
+        else:
+            rows = [i for i in rows if folders[i] == folder]
+
+    if search_text:
+        titles, urls = keys.title_keys, keys.url_keys
+        rows = [i for i in rows if search_text in titles[i] or search_text in urls[i]]
+
+    if sort_key == SORT_DATE:
+        rows = sorted(rows, key=keys.iso_dates.__getitem__, reverse=True)
+    elif sort_key == SORT_TITLE:
+        rows = sorted(rows, key=keys.title_keys.__getitem__)
+    elif sort_key == SORT_URL:
+        rows = sorted(rows, key=keys.url_keys.__getitem__)
+    return list(rows)
+
+
+class BookmarkFilterProxy(QAbstractProxyModel):
+    """
+    Folder + search filter and sort order over a ``BookmarkListModel``.
+
+    The proxy keeps ``order`` (visible source rows in display order). The
+    ``set_*`` methods recompute it at once with ``filter_rows``; a
+    background filter instead takes ``snapshot()``, runs ``filter_rows`` on
+    it and hands the result back in chunks through ``set_order`` /
+    ``append_order``. No per-row callbacks into Python are made while
+    filtering.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.folder: Optional[str] = None
+        self.search_text = ''
+        self.sort_key: Optional[str] = None
+        self.order: List[int] = []
+        self.positions: Dict[int, int] = {}
+
+    def setSourceModel(self, model: BookmarkListModel):
+        super().setSourceModel(model)
+        model.modelReset.connect(self.invalidate)
+        self.invalidate()
+
+    # ------------------------------------------------------------------
+    # Filter / sort
+    # ------------------------------------------------------------------
+    def set_folder(self, folder: Optional[str], apply: bool = True):
+        """``None`` shows every folder, ``NO_FOLDER`` the bookmarks without one"""
+        self.folder = folder
+        if apply:
+            self.invalidate()
+
+    def set_search_text(self, text: str, apply: bool = True):
+        self.search_text = text.lower()
+        if apply:
+            self.invalidate()
+
+    def set_sort_key(self, key: Optional[str], apply: bool = True):
+        self.sort_key = key
+        if apply:
+            self.invalidate()
+
+    def snapshot(self):
+        """Arguments for ``filter_rows`` with the current filter"""
+        return (self.sourceModel().keys(), self.folder, self.search_text, self.sort_key)
+
+    def invalidate(self):
+        if self.sourceModel() is None:
+            return
+        self.set_order(filter_rows(*self.snapshot()))
+
+    def set_order(self, rows: List[int]):
+        """Replace the visible rows"""
+        self.beginResetModel()
+        self.order = list(rows)
+        self.positions = {row: i for i, row in enumerate(self.order)}
+        self.endResetModel()
+
+    def append_order(self, rows: List[int]):
+        """Append a further chunk of visible rows"""
+        if not len(rows):
+            return
+        start = len(self.order)
+        self.beginInsertRows(QModelIndex(), start, start + len(rows) - 1)
+        for i, row in enumerate(rows, start):
+            self.positions[row] = i
+        self.order.extend(rows)
+        self.endInsertRows()
+
+    # ------------------------------------------------------------------
+    # QAbstractProxyModel
+    # ------------------------------------------------------------------
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.order)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 1
+
+    def index(self, row, column=0, parent=QModelIndex()):
+        if parent.isValid() or not 0 <= row < len(self.order) or column != 0:
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=None):
+        return QModelIndex()
+
+    def mapToSource(self, proxy_index):
+        if not proxy_index.isValid() or proxy_index.row() >= len(self.order):
+            return QModelIndex()
+        return self.sourceModel().index(self.order[proxy_index.row()], 0)
+
+    def mapFromSource(self, source_index):
+        if not source_index.isValid():
+            return QModelIndex()
+        row = self.positions.get(source_index.row())
+        return QModelIndex() if row is None else self.createIndex(row, 0)
+
+
+class BookmarkItemDelegate(QStyledItemDelegate):
+    """Paints folder / date / title / URL of a bookmark row from precomputed strings"""
+
+    ROW_HEIGHT = 30
+    PADDING = 8
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.title_color = QColor('#2c3e50')
+        self.url_color = QColor('#7f8c8d')
+        self.folder_color = QColor('#3498db')
+        self.date_color = QColor('#95a5a6')
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), self.ROW_HEIGHT)
+
+    def _draw(self, painter, font, color, text, x, rect, width=None, elide=Qt.ElideRight):
+        metrics = QFontMetrics(font)
+        if width is None:
+            width = metrics.horizontalAdvance(text)
+        painter.setFont(font)
+        painter.setPen(color)
+        painter.drawText(QRect(x, rect.top(), width, rect.height()),
+                         Qt.AlignVCenter | Qt.AlignLeft, metrics.elidedText(text, elide, width))
+        return x + width + self.PADDING
+
+    def paint(self, painter, option, index):
+        painter.save()
+        rect = option.rect
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(rect, option.palette.highlight())
+
+        x = rect.left() + self.PADDING
+        right = rect.right() - self.PADDING
+
+        small = QFont(option.font)
+        small.setPointSizeF(max(option.font.pointSizeF() - 1, 6))
+
+        folder = index.data(FolderRole)
+        if folder:
+            x = self._draw(painter, small, self.folder_color, f"📁 {folder}", x, rect,
+                           min(QFontMetrics(small).horizontalAdvance(f"📁 {folder}"), 160))
+        date = index.data(DateRole)
+        if date:
+            x = self._draw(painter, small, self.date_color, date, x, rect)
+
+        # Title (at most 40% of what is left) and URL in the rest
+        bold = QFont(option.font)
+        bold.setBold(True)
+        title = index.data(Qt.DisplayRole)
+        title_width = max(min(QFontMetrics(bold).horizontalAdvance(title), int((right - x) * 0.4)), 0)
+        x = self._draw(painter, bold, self.title_color, title, x, rect, title_width)
+        self._draw(painter, option.font, self.url_color, index.data(UrlRole), x, rect,
+                   max(right - x, 0), Qt.ElideMiddle)
+        painter.restore()
@@ -55,6 +55,21 @@ import shutil
 from devtools import DevToolsWindow
 from error_page_handler import ErrorPageHandler
 from local_server import ErrorPageServerBridge
+from history_store import get_history_store
+from newtab_model import get_newtab_model
+from persistence import get_persistence_service, cleanup_persistence_service
+from profile_data import get_profile_data
+from profile_migrations import get_profile_migrator
+from reader_mode import ReaderView, get_reader_engine
+from screenshot_pipeline import ScreenshotPipeline
+from session_store import STARTUP_TAB_PROPERTY, SessionRestorer, capture_session, parse_session
+from source_viewer import SourceDialog, save_source
+from tab_discard import TabDiscarder
+from tab_search import TabSearchPanel, get_tab_search_engine
+from tab_switcher import TabSwitcherPage
+from thumbnail_service import get_thumbnail_service
+from user_scripts import UserScript, get_user_scripts, style_source
+from view_pool import WarmViewPool
 
 # Import advanced optimization modules
 from memory_manager import get_memory_manager, cleanup_memory
@@ -64,6 +79,11 @@ from browser_memory_pool import get_browser_pool, cleanup_browser_pool
 from performance_monitor import get_performance_monitor, cleanup_performance_monitor
 from shader_effect_system import get_shader_effect_manager, cleanup_shader_effect_manager
 
+# History rows are read from the store on demand: the menu shows the latest
+# entries, the dialog pages further back as it is scrolled
+HISTORY_MENU_ITEMS = 20
+HISTORY_DIALOG_PAGE = 200
+
 # Enhanced managers for v1.2
 class ExtensionManager:
     def __init__(self, parent):
@@ -173,7 +193,10 @@ class ThemeManager:
             color: #ffffff !important;
         }
         """
-        # This would be injected into web pages
+        # Injected into every page before it paints
+        get_user_scripts().register(UserScript(
+            'dark-web-theme', style_source('develer-dark-theme', dark_css),
+            injection_point=QWebEngineScript.DocumentCreation, subframes=True))
         return dark_css
     
     def apply_light_web_theme(self):
@@ -187,6 +210,8 @@ class ThemeManager:
             color: #000000 !important;
         }
         """
+        # Pages keep their own colors; only the dark theme is injected
+        get_user_scripts().unregister('dark-web-theme')
         return light_css
 
 # Cloud Sync Manager
@@ -391,29 +416,46 @@ class InfiniteTabsManager:
     def __init__(self, parent):
         self.parent = parent
         self.max_tabs = 10000  # Максимальное количество вкладок
-        self.tab_pool = []
         self.memory_optimization = True
         
+        # Живых QWebEngineView не больше max_live_tabs, остальные вкладки выгружаются
+        settings = getattr(parent, 'settings', {})
+        self.discarder = parent.tab_discarder
+        self.discarder.set_limits(settings.get('max_live_tabs', 20),
+                                  settings.get('tab_memory_limit_mb', 2048))
+        
+        # Порог памяти проверяется редко: один вызов psutil раз в 30 секунд
+        self.memory_timer = QTimer(parent)
+        self.memory_timer.timeout.connect(self.optimize_memory)
+        self.memory_timer.start(30000)
+        
     def optimize_memory(self):
         """Оптимизация памяти для бесконечных вкладок"""
-        if self.parent.tab_widget.count() > 100:
-            # Неактивные вкладки "замораживаются"
-            for i in range(self.parent.tab_widget.count()):
-                if i != self.parent.tab_widget.currentIndex():
-                    tab = self.parent.tab_widget.widget(i)
-                    # Симуляция заморозки вкладки
-                    pass
-        return "Память оптимизирована для бесконечных вкладок"
+        if not self.memory_optimization:
+            return "Оптимизация памяти выключена"
+        # Неактивные вкладки выгружаются (LRU), при активации создаются заново
+        discarded = self.discarder.enforce()
+        stats = self.discarder.get_stats()
+        return (f"Выгружено вкладок: {discarded} (всего выгружено {stats['discarded_tabs']}, "
+                f"освобождено {stats['rss_reclaimed_bytes'] / 1024 / 1024:.0f} МБ)")
+    
+    def check_tab_limit(self):
+        """Сообщение об ошибке, если лимит вкладок достигнут"""
+        if self.parent.tab_widget.count() >= self.max_tabs:
+            return "Достигнут лимит вкладок"
+        return None
     
     def create_infinite_tab(self, url=None):
         """Создание вкладки с оптимизацией памяти"""
-        if self.parent.tab_widget.count() >= self.max_tabs:
-            return "Достигнут лимит вкладок"
+        limit_message = self.check_tab_limit()
+        if limit_message:
+            return limit_message
         
         # Создание вкладки с оптимизацией
-        tab = self.parent.add_new_tab(url)
-        self.optimize_memory()
-        return tab
+        return self.parent.add_new_tab(url)
+    
+    def get_stats(self):
+        return self.discarder.get_stats()
 
 # Adaptive UI System
 class AdaptiveUISystem:
@@ -555,6 +597,7 @@ class BrowserWindow(QMainWindow):
         self.history_file = os.path.join(self.data_dir, "history.json")
         self.passwords_file = os.path.join(self.data_dir, "passwords.json")
         self.settings_file = os.path.join(self.data_dir, "settings.json")
+        self.session_file = os.path.join(self.data_dir, "session.json")
         self.downloads_dir = "downloads"
         self.screenshots_dir = os.path.join(self.data_dir, "screenshots")
         
@@ -563,10 +606,29 @@ class BrowserWindow(QMainWindow):
         if not os.path.exists(self.screenshots_dir):
             os.makedirs(self.screenshots_dir)
         
+        # Bookmarks, history and settings are shared by all windows of the process
+        self.profile_data = get_profile_data(self.data_dir)
+        self.newtab_model = get_newtab_model(self.data_dir)
+        self.thumbnail_service = get_thumbnail_service(self.data_dir)
+        self.screenshots = ScreenshotPipeline(self.screenshots_dir, parent=self)
+        self.reader_engine = get_reader_engine()
+        self.tab_search = get_tab_search_engine()
+        self.tab_search_dock = None
+        self.user_scripts = get_user_scripts()
+        self.screenshots.saved.connect(self.on_screenshot_saved)
+        self.screenshots.failed.connect(self.on_screenshot_failed)
+        
         self.bookmarks = self.load_bookmarks()
-        self.history = self.load_history()
+        self.load_history()
         self.passwords = self.load_passwords()
         self.settings = self.load_settings()
+        
+        # Profile files are written behind by the persistence service
+        self.persistence = get_persistence_service()
+        self.persistence.register('passwords', self.passwords_file, lambda: self.passwords)
+        # Сессия снимается в UI-потоке (save_session), сервис только пишет готовый dict
+        self.session_data = None
+        self.persistence.register('session', self.session_file, lambda: self.session_data)
         self.incognito_mode = False
         self.ad_blocker_enabled = self.settings.get("ad_blocker", False)
         
@@ -619,12 +681,16 @@ class BrowserWindow(QMainWindow):
         
         # Initialize UI LAST to prevent recursion
         self.init_ui()
+        self.restore_session()
     
     def closeEvent(self, event):
         """Handle browser close event with safe cleanup"""
         try:
-            # Save settings
+            # Save settings and write out everything still pending
             self.save_settings()
+            self.save_session()
+            self.persistence.flush()
+            self.view_pool.clear()
             
             # Close all DevTools windows
             if hasattr(self, 'devtools_windows'):
@@ -651,52 +717,12 @@ class BrowserWindow(QMainWindow):
         event.accept()
     
     def load_bookmarks(self):
-        if os.path.exists(self.bookmarks_file):
-            try:
-                with open(self.bookmarks_file, 'r', encoding='utf-8') as f:
-                    bookmarks = json.load(f)
-                    # Ensure bookmarks have v1.1 structure
-                    return self.upgrade_bookmarks_to_v11(bookmarks)
-            except:
-                return []
-        return []
-    
-    def upgrade_bookmarks_to_v11(self, bookmarks):
-        """Upgrade bookmarks to v1.1 format with folders and tags support"""
-        upgraded = {
-            'version': '1.1',
-            'folders': {
-                'Без папки': {
-                    'id': 'default',
-                    'name': 'Без папки',
-                    'color': '#3498db',
-                    'bookmarks': []
-                }
-            },
-            'tags': ['важное', 'работа', 'личное', 'новое'],
-            'default_folder': 'Без папки'
-        }
-        
-        # Migrate old bookmarks to default folder
-        for bookmark in bookmarks:
-            if isinstance(bookmark, dict) and 'url' in bookmark:
-                v11_bookmark = {
-                    'id': str(len(upgraded['folders']['Без папки']['bookmarks']) + 1),
-                    'title': bookmark.get('title', 'Untitled'),
-                    'url': bookmark['url'],
-                    'timestamp': bookmark.get('timestamp', datetime.datetime.now().isoformat()),
-                    'tags': bookmark.get('tags', []),
-                    'favicon': bookmark.get('favicon', ''),
-                    'visits': bookmark.get('visits', 0),
-                    'folder': 'Без папки'
-                }
-                upgraded['folders']['Без папки']['bookmarks'].append(v11_bookmark)
-        
-        return upgraded
+        # v1.1 folder layout is guaranteed by the profile schema migrations
+        return self.profile_data.bookmarks()
     
     def save_bookmarks(self):
-        with open(self.bookmarks_file, 'w', encoding='utf-8') as f:
-            json.dump(self.bookmarks, f, ensure_ascii=False, indent=2)
+        # Only folders change here; added bookmarks go into the index in add_bookmark
+        self.profile_data.commit_bookmarks(reindex=False)
     
     def create_folder_dialog(self):
         """Create folder dialog for bookmarks v1.1"""
@@ -838,17 +864,8 @@ class BrowserWindow(QMainWindow):
         dialog.exec_()
     
     def load_history(self):
-        if os.path.exists(self.history_file):
-            try:
-                with open(self.history_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                return []
-        return []
-    
-    def save_history(self):
-        with open(self.history_file, 'w', encoding='utf-8') as f:
-            json.dump(self.history[-1000:], f, ensure_ascii=False, indent=2)
+        # History lives in SQLite; legacy history.json is imported once. No rows are read here
+        self.history_store = get_history_store(self.data_dir)
     
     def clear_history(self):
         """Clear browser history"""
@@ -861,19 +878,31 @@ class BrowserWindow(QMainWindow):
         )
         
         if reply == QMessageBox.Yes:
-            self.history = []
-            self.save_history()
+            self.profile_data.clear_history()
             QMessageBox.information(self, "History Cleared", "Your browsing history has been cleared.")
     
     def add_to_history(self, url, title):
         if not self.incognito_mode:
-            history_item = {
-                'url': url,
-                'title': title,
-                'timestamp': datetime.datetime.now().isoformat()
-            }
-            self.history.append(history_item)
-            self.save_history()
+            self.profile_data.add_visit(url, title)
+    
+    def save_session(self):
+        """Снимок открытых вкладок для восстановления при следующем запуске"""
+        if self.incognito_mode or not self.settings.get('restore_session', True):
+            return
+        self.session_data = capture_session(self.tab_widget)
+        self.persistence.mark_dirty('session')
+    
+    def restore_session(self):
+        """Вкладки прошлой сессии: загружается только активная, остальные - по мере надобности"""
+        if not self.settings.get('restore_session', True) or not os.path.exists(self.session_file):
+            return
+        try:
+            with open(self.session_file, 'r', encoding='utf-8') as f:
+                tabs, active = parse_session(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"[WARNING] Session restore failed: {e}")
+            return
+        self.session_restorer.restore(tabs, active)
     
     def load_passwords(self):
         if os.path.exists(self.passwords_file):
@@ -885,21 +914,13 @@ class BrowserWindow(QMainWindow):
         return []
     
     def save_passwords(self):
-        with open(self.passwords_file, 'w', encoding='utf-8') as f:
-            json.dump(self.passwords, f, ensure_ascii=False, indent=2)
+        self.persistence.mark_dirty('passwords')
     
     def load_settings(self):
-        if os.path.exists(self.settings_file):
-            try:
-                with open(self.settings_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                return {}
-        return {}
+        return self.profile_data.settings()
     
     def save_settings(self):
-        with open(self.settings_file, 'w', encoding='utf-8') as f:
-            json.dump(self.settings, f, ensure_ascii=False, indent=2)
+        self.profile_data.commit_settings()
     
     def set_homepage(self):
         """Set current page as homepage"""
@@ -930,6 +951,8 @@ class BrowserWindow(QMainWindow):
         # Create minimal tab widget only
         self.tab_widget = QTabWidget()
         self.setCentralWidget(self.tab_widget)
+        self.init_tab_restore()
+        self.init_view_pool()
         
         # Add one empty tab
         webview = QWebEngineView()
@@ -1038,6 +1061,8 @@ class BrowserWindow(QMainWindow):
         self.tab_widget = QTabWidget()
         self.tab_widget.setTabsClosable(True)
         self.tab_widget.tabCloseRequested.connect(self.close_tab)
+        self.init_tab_restore()
+        self.init_view_pool()
         
         # Add corner new tab button
         self.corner_new_tab_btn = QPushButton("+")
@@ -1048,7 +1073,10 @@ class BrowserWindow(QMainWindow):
         
         layout.addWidget(self.tab_widget)
         
-        self.add_new_tab("https://www.google.com")
+        startup_tab = self.add_new_tab("https://www.google.com")
+        if startup_tab is not None:
+            # Заменяется восстановленной сессией (restore_session)
+            startup_tab.setProperty(STARTUP_TAB_PROPERTY, True)
         
         self.create_bookmarks_menu()
         self.create_history_menu()
@@ -1061,6 +1089,30 @@ class BrowserWindow(QMainWindow):
         self.create_help_menu()
         self.setup_shortcuts()
         
+    def init_tab_restore(self):
+        """Выгрузка и отложенная загрузка вкладок (одна на tab_widget)"""
+        self.tab_discarder = TabDiscarder(self.tab_widget, self.create_tab_view,
+                                          page_text=self.tab_search.page_text)
+        self.thumbnail_service.watch(self.tab_widget)
+        self.tab_search.watch(self.tab_widget)
+        self.session_restorer = SessionRestorer(
+            self.tab_discarder,
+            max_concurrent=self.settings.get('session_restore_concurrency', 2),
+            background_limit=self.settings.get('session_background_tabs', 4),
+            parent=self
+        )
+    
+    def init_view_pool(self):
+        """Прогретые вкладки с уже загруженной страницей новой вкладки для Ctrl+T"""
+        self.view_pool = WarmViewPool(
+            self.create_tab_view, self.new_tab_url(),
+            size=self.settings.get('new_tab_pool_size', 1),
+            refill_delay_ms=self.settings.get('new_tab_pool_delay_ms', 1000),
+            parent=self
+        )
+        # Первое представление прогревается уже после запуска окна
+        self.view_pool.schedule_refill()
+    
     def create_bookmarks_menu(self):
         menubar = self.menuBar()
         bookmarks_menu = menubar.addMenu("Закладки")
@@ -1104,7 +1156,7 @@ class BrowserWindow(QMainWindow):
         
         history_menu.addSeparator()
         
-        for item in reversed(self.history[-20:]):
+        for item in self.profile_data.history_page(HISTORY_MENU_ITEMS):
             action = QAction(f"{item['title']} - {item['timestamp'][:10]}", self)
             action.triggered.connect(lambda checked, url=item['url']: self.navigate_to_bookmark(url))
             history_menu.addAction(action)
@@ -1129,8 +1181,20 @@ class BrowserWindow(QMainWindow):
         layout = QVBoxLayout(dialog)
         
         list_widget = QListWidget()
-        for item in reversed(self.history):
-            list_widget.addItem(f"{item['title']}\n{item['url']}\n{item['timestamp'][:19]}")
+        
+        def fetch_more(value=None):
+            # Next page once the list is scrolled to the bottom
+            scroll_bar = list_widget.verticalScrollBar()
+            if value is not None and value < scroll_bar.maximum():
+                return
+            page = self.profile_data.history_page(HISTORY_DIALOG_PAGE, list_widget.count())
+            for item in page:
+                list_widget.addItem(f"{item['title']}\n{item['url']}\n{item['timestamp'][:19]}")
+            if len(page) < HISTORY_DIALOG_PAGE:
+                scroll_bar.valueChanged.disconnect(fetch_more)
+        
+        list_widget.verticalScrollBar().valueChanged.connect(fetch_more)
+        fetch_more()
         
         layout.addWidget(list_widget)
         
@@ -1146,6 +1210,11 @@ class BrowserWindow(QMainWindow):
         
         dialog.exec_()
     
+    def show_tab_switcher(self):
+        """Обзор вкладок: сетка миниатюр из кэша"""
+        dialog = TabSwitcherPage(self.tab_widget, self.thumbnail_service, self)
+        dialog.exec_()
+    
     def show_downloads(self):
         dialog = QDialog(self)
         dialog.setWindowTitle("Загрузки")
@@ -1171,6 +1240,15 @@ class BrowserWindow(QMainWindow):
         if current_webview:
             self.toggle_devtools_for_view(current_webview)
     
+    def show_tab_search(self):
+        """Поиск текста во всех вкладках (боковая панель)"""
+        if self.tab_search_dock is None:
+            self.tab_search_dock = QDockWidget("Поиск по вкладкам", self)
+            self.tab_search_dock.setWidget(TabSearchPanel(self.tab_search, self.tab_search_dock))
+            self.addDockWidget(Qt.RightDockWidgetArea, self.tab_search_dock)
+        self.tab_search_dock.show()
+        self.tab_search_dock.widget().focus_search()
+    
     def activate_inspector_for_view(self, webview):
         """Activate inspector for specific view"""
         self.toggle_devtools_for_view(webview)
@@ -1423,42 +1501,54 @@ class BrowserWindow(QMainWindow):
             if self.adaptive_ui:
                 self.adaptive_ui.track_user_action('new_tab', {'url': url})
         
-        # Использование бесконечных вкладок
-        if hasattr(self, 'infinite_tabs'):
-            if self.infinite_tabs:
-                result = self.infinite_tabs.create_infinite_tab(url)
-            else:
-                # Fallback to regular new tab
-                self.add_new_tab(url)
-            if isinstance(result, str):
-                QMessageBox.warning(self, "Вкладки", result)
+        # Лимит бесконечных вкладок
+        if getattr(self, 'infinite_tabs', None):
+            limit_message = self.infinite_tabs.check_tab_limit()
+            if limit_message:
+                QMessageBox.warning(self, "Вкладки", limit_message)
                 return None
         
-        webview = QWebEngineView()
-        
-        # Connect error handling
-        webview.loadFinished.connect(lambda ok: self.handle_load_finished(webview, ok))
-        
-        # Add tab to widget
-        index = self.tab_widget.addTab(webview, "New Tab")
-        self.tab_widget.setCurrentIndex(index)
-        
-        # Load URL or default
         if url:
+            webview = self.create_tab_view()
             webview.setUrl(QUrl(url))
         else:
-            # Load local newtab page
-            newtab_path = os.path.abspath("newtab.html")
-            if os.path.exists(newtab_path):
-                webview.setUrl(QUrl.fromLocalFile(newtab_path))
-            else:
-                webview.setUrl(QUrl("https://www.google.com"))
+            # Страница новой вкладки уже загружена в прогретом представлении
+            webview = self.view_pool.acquire()
+        
+        # Add tab to widget
+        index = self.tab_widget.addTab(webview, webview.title() or "New Tab")
+        self.tab_widget.setCurrentIndex(index)
         
         # v2.0: Add quantum encryption if enabled
-        if hasattr(self, 'quantum_engine') and self.quantum_engine.encryption_enabled:
+        if getattr(self, 'quantum_engine', None) and self.quantum_engine.encryption_enabled:
             # Apply quantum encryption to tab data
             pass
         
+        # Выгрузка давно неактивных вкладок
+        if getattr(self, 'infinite_tabs', None):
+            self.infinite_tabs.optimize_memory()
+        
+        return webview
+    
+    def new_tab_url(self):
+        """Local newtab page, or Google if it is missing"""
+        newtab_path = os.path.abspath("newtab.html")
+        if os.path.exists(newtab_path):
+            return QUrl.fromLocalFile(newtab_path)
+        return QUrl("https://www.google.com")
+    
+    def create_tab_view(self):
+        """Новый QWebEngineView для вкладки (и для восстановления выгруженной)"""
+        webview = QWebEngineView()
+        
+        # Connect error handling
+        webview.loadFinished.connect(lambda ok: self.handle_load_finished(webview, ok))
+        
+        # Миниатюра после загрузки (только если вкладка видна)
+        self.thumbnail_service.watch_view(webview)
+        # Текст страницы для поиска по всем вкладкам
+        self.tab_search.watch_view(webview)
+        self.user_scripts.watch_view(webview)
         return webview
     
     def handle_load_finished(self, webview, success):
@@ -1527,23 +1617,16 @@ class BrowserWindow(QMainWindow):
             current_webview.page().toHtml(self.show_source_dialog)
     
     def show_source_dialog(self, html):
-        dialog = QDialog(self)
-        dialog.setWindowTitle("Page Source")
-        dialog.setGeometry(100, 100, 800, 600)
-        
-        layout = QVBoxLayout(dialog)
-        
-        source_text = QTextEdit()
-        source_text.setPlainText(html)
-        source_text.setReadOnly(True)
-        layout.addWidget(source_text)
-        
-        close_btn = QPushButton("Close")
-        close_btn.clicked.connect(dialog.accept)
-        layout.addWidget(close_btn)
-        
+        dialog = SourceDialog(html, self, self.save_source_to_file)
         dialog.exec_()
     
+    def save_source_to_file(self, html):
+        """Сохранение исходного кода в файл (запись в фоновом потоке)"""
+        save_source(
+            self, html,
+            on_finished=lambda path: self.statusBar().showMessage(f"Исходный код сохранен: {path}", 3000),
+            on_failed=lambda error: QMessageBox.warning(self, "Ошибка", f"Не удалось сохранить файл: {error}"))
+    
     def add_bookmark(self):
         """Add current page to bookmarks"""
         current_webview = self.tab_widget.currentWidget()
@@ -1552,20 +1635,29 @@ class BrowserWindow(QMainWindow):
             title = current_webview.title()
             
             if url and url != "about:blank":
+                # Check if bookmark already exists (normalized URL index, no folder walk)
+                index = self.profile_data.bookmark_index()
+                if index.contains(url):
+                    QMessageBox.information(self, "Bookmark", "This page is already bookmarked!")
+                    return
+                
+                folder_name = self.bookmarks.get('default_folder', 'Без папки')
+                folder = self.bookmarks['folders'].setdefault(folder_name, {
+                    'id': 'default', 'name': folder_name, 'color': '#3498db', 'bookmarks': []
+                })
                 bookmark = {
+                    'id': str(len(folder['bookmarks']) + 1),
                     'title': title or 'Untitled',
                     'url': url,
-                    'timestamp': datetime.datetime.now().isoformat()
+                    'timestamp': datetime.datetime.now().isoformat(),
+                    'tags': [],
+                    'favicon': '',
+                    'visits': 0,
+                    'folder': folder_name
                 }
-                
-                # Check if bookmark already exists
-                for existing in self.bookmarks:
-                    if existing['url'] == url:
-                        QMessageBox.information(self, "Bookmark", "This page is already bookmarked!")
-                        return
-                
-                self.bookmarks.append(bookmark)
-                self.save_bookmarks()
+                folder['bookmarks'].append(bookmark)
+                index.add(bookmark)
+                self.profile_data.commit_bookmarks(reindex=False)
                 
                 # Update bookmarks menu
                 self.create_bookmarks_menu()
@@ -1588,99 +1680,95 @@ class BrowserWindow(QMainWindow):
         """Take screenshot of current page (legacy method)"""
         self.take_browser_screenshot()
     
+    def screenshot_path(self, prefix):
+        """Путь для нового скриншота; формат (png/webp) берется из настроек"""
+        if not os.path.exists(self.screenshots_dir):
+            os.makedirs(self.screenshots_dir)
+        fmt = self.settings.get('screenshot_format', 'png')
+        filename = f"{prefix}_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt}"
+        return os.path.join(self.screenshots_dir, filename), fmt
+    
     def take_browser_screenshot(self):
         """Take screenshot of browser window only"""
         try:
-            # Создаем папку для скриншотов если ее нет
-            if not os.path.exists(self.screenshots_dir):
-                os.makedirs(self.screenshots_dir)
-            
-            # Скриншот окна браузера
-            screenshot = self.grab()
-            filename = f"browser_screenshot_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-            filepath = os.path.join(self.screenshots_dir, filename)
-            screenshot.save(filepath)
-            
-            QMessageBox.information(self, "Скриншот браузера", f"Скриншот сохранен:\n{filepath}")
+            # Захват в UI-потоке, кодирование в фоне
+            filepath, fmt = self.screenshot_path("browser_screenshot")
+            self.screenshots.grab(self, filepath, fmt)
         except Exception as e:
             QMessageBox.warning(self, "Ошибка скриншота", f"Не удалось сделать скриншот браузера: {e}")
     
     def take_full_screenshot(self):
         """Take screenshot of entire screen including all windows"""
         try:
-            # Создаем папку для скриншотов если ее нет
-            if not os.path.exists(self.screenshots_dir):
-                os.makedirs(self.screenshots_dir)
-            
-            # Получаем размер всего экрана
             screen = QApplication.primaryScreen()
             if screen:
                 # Делаем скриншот всего экрана
                 screenshot = screen.grabWindow(0)  # 0 = весь рабочий стол
-                filename = f"full_screenshot_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-                filepath = os.path.join(self.screenshots_dir, filename)
-                screenshot.save(filepath)
-                
-                # Показываем сообщение
-                QMessageBox.information(self, "Скриншот экрана", 
-                    f"Полный скриншот сохранен:\n{filepath}\n\nВключены все окна и браузер с DevTools!")
+                filepath, fmt = self.screenshot_path("full_screenshot")
+                self.screenshots.save(screenshot.toImage(), filepath, fmt)
             else:
                 QMessageBox.warning(self, "Ошибка", "Не удалось получить доступ к экрану")
                 
         except Exception as e:
             QMessageBox.warning(self, "Ошибка скриншота", f"Не удалось сделать скриншот экрана: {e}")
     
+    def take_page_screenshot(self):
+        """Screenshot of the whole scrolled page of the current tab"""
+        current_webview = self.tab_widget.currentWidget()
+        if not isinstance(current_webview, QWebEngineView):
+            QMessageBox.warning(self, "Ошибка", "Страница еще не загружена")
+            return
+        filepath, fmt = self.screenshot_path("page_screenshot")
+        self.statusBar().showMessage("Съемка страницы целиком...")
+        self.screenshots.capture_page(current_webview, filepath, fmt)
+    
+    def on_screenshot_saved(self, filepath):
+        self.statusBar().clearMessage()
+        QMessageBox.information(self, "Скриншот", f"Скриншот сохранен:\n{filepath}")
+    
+    def on_screenshot_failed(self, filepath, reason):
+        self.statusBar().clearMessage()
+        QMessageBox.warning(self, "Ошибка скриншота", f"Не удалось сохранить скриншот: {reason}")
+    
     def toggle_reading_mode(self):
         """Toggle reading mode for current page"""
         current_webview = self.tab_widget.currentWidget()
-        if current_webview:
-            # Enhanced reading mode implementation for v1.1
-            script = """
-            // Toggle enhanced reading mode
-            if (document.body.classList.contains('reading-mode-v1.1')) {
-                document.body.classList.remove('reading-mode-v1.1');
-                // Restore original styles
-                var originalContent = document.getElementById('original-content-v1.1');
-                if (originalContent) {
-                    document.body.innerHTML = originalContent.innerHTML;
-                }
-            } else {
-                // Store original content
-                var originalDiv = document.createElement('div');
-                originalDiv.id = 'original-content-v1.1';
-                originalDiv.style.display = 'none';
-                originalDiv.innerHTML = document.body.innerHTML;
-                document.body.appendChild(originalDiv);
-                
-                document.body.classList.add('reading-mode-v1.1');
-                // Enhanced reading mode styles for v1.1
-                var style = document.createElement('style');
-                style.innerHTML = `
-                    .reading-mode-v1.1 {
-                        max-width: 800px !important;
-                        margin: 0 auto !important;
-                        padding: 40px !important;
-                        background: #fff !important;
-                        font-family: Georgia, serif !important;
-                        line-height: 1.8 !important;
-                        color: #333 !important;
-                        font-size: 18px !important;
-                    }
-                    .reading-mode-v1.1 img, .reading-mode-v1.1 video, .reading-mode-v1.1 aside, .reading-mode-v1.1 nav, .reading-mode-v1.1 header, .reading-mode-v1.1 footer {
-                        display: none !important;
-                    }
-                    .reading-mode-v1.1 p {
-                        margin-bottom: 1.5em !important;
-                    }
-                    .reading-mode-v1.1 h1, .reading-mode-v1.1 h2, .reading-mode-v1.1 h3 {
-                        margin: 1.5em 0 1em 0 !important;
-                        color: #000 !important;
-                    }
-                `;
-                document.head.appendChild(style);
-            }
-            """
-            current_webview.page().runJavaScript(script)
+        if not isinstance(current_webview, QWebEngineView):
+            return
+        # Статья показывается поверх страницы; сама страница не меняется
+        reader = ReaderView.of(current_webview)
+        if reader is not None and reader.isVisible():
+            reader.hide()
+            return
+        url = current_webview.url().toString()
+        if reader is not None and reader.url == url:
+            reader.show()
+            return
+        
+        self.statusBar().showMessage("Подготовка режима чтения...")
+        current_webview.page().toHtml(
+            lambda page_html: self.reader_engine.extract(
+                url, page_html, lambda article: self.show_reader(current_webview, url, article)))
+    
+    def show_reader(self, webview, url, article):
+        """Показать извлеченную статью поверх вкладки"""
+        self.statusBar().clearMessage()
+        try:
+            if webview.url().toString() != url:
+                return
+            if article is None:
+                self.statusBar().showMessage("Не удалось найти основной текст страницы", 3000)
+                return
+            reader = ReaderView.of(webview)
+            if reader is None:
+                reader = ReaderView(webview, article)
+            else:
+                reader.set_article(article)
+            reader.show()
+            reader.setFocus()
+        except RuntimeError:
+            # Вкладка закрыта до окончания разбора
+            pass
     
     def enable_form_autofill(self):
         """Enable form auto-fill functionality for v1.1"""
@@ -1798,7 +1886,8 @@ class BrowserWindow(QMainWindow):
                 }, 3000);
             })();
             """
-            current_webview.page().runJavaScript(script)
+            # Один раз регистрируется в профиле, дальше внедряется в каждую страницу
+            self.user_scripts.enable(UserScript('form-autofill', script), current_webview)
     
     def show_autofill_settings(self):
         """Show autofill settings dialog"""
@@ -1956,6 +2045,14 @@ class BrowserWindow(QMainWindow):
         screenshot_shortcut = QShortcut(QKeySequence("Ctrl+Shift+S"), self)
         screenshot_shortcut.activated.connect(self.take_full_screenshot)
         
+        # Ctrl+Alt+F - Find in all tabs
+        tab_search_shortcut = QShortcut(QKeySequence("Ctrl+Alt+F"), self)
+        tab_search_shortcut.activated.connect(self.show_tab_search)
+        
+        # Ctrl+Alt+S - Full Page Screenshot
+        page_screenshot_shortcut = QShortcut(QKeySequence("Ctrl+Alt+S"), self)
+        page_screenshot_shortcut.activated.connect(self.take_page_screenshot)
+        
         # Ctrl+U - View Source
         source_shortcut = QShortcut(QKeySequence("Ctrl+U"), self)
         source_shortcut.activated.connect(self.show_page_source)
@@ -1968,6 +2065,10 @@ class BrowserWindow(QMainWindow):
         reading_mode_shortcut = QShortcut(QKeySequence("F9"), self)
         reading_mode_shortcut.activated.connect(self.toggle_reading_mode)
         
+        # Ctrl+Shift+E - Tab Switcher
+        tab_switcher_shortcut = QShortcut(QKeySequence("Ctrl+Shift+E"), self)
+        tab_switcher_shortcut.activated.connect(self.show_tab_switcher)
+        
         # Ctrl+Shift+F - Autofill Settings (v1.1)
         autofill_settings_shortcut = QShortcut(QKeySequence("Ctrl+Shift+F"), self)
         autofill_settings_shortcut.activated.connect(self.show_autofill_settings)
@@ -2367,6 +2468,8 @@ class BrowserWindow(QMainWindow):
     
     def enable_infinite_tabs(self):
         """Включение бесконечных вкладок"""
+        if not self.infinite_tabs:
+            self.infinite_tabs = InfiniteTabsManager(self)
         QMessageBox.information(self, "Бесконечные вкладки", 
                                "Бесконечные вкладки включены. Теперь можно открывать тысячи вкладок без потери производительности.")
     
@@ -3101,7 +3204,7 @@ class BrowserWindow(QMainWindow):
                 console.log('🛡️ Фильтрация вредоносных сайтов v1.1 активирована');
             })();
             """
-            current_webview.page().runJavaScript(script)
+            self.user_scripts.enable(UserScript('phishing-protection', script), current_webview)
     
     def show_security_settings(self):
         """Show security settings dialog for v1.1"""
@@ -3252,7 +3355,10 @@ class BrowserWindow(QMainWindow):
                     }
                 })();
                 """
-                current_webview.page().runJavaScript(webgpu_script)
+                # MainWorld: toggle_webgpu читает window.performanceMonitor со страницы
+                self.user_scripts.enable(UserScript('webgpu-acceleration', webgpu_script,
+                                                    world_id=QWebEngineScript.MainWorld),
+                                         current_webview)
                 
                 QMessageBox.information(self, "WebGPU", "🚀 WebGPU ускорение v1.1 активировано!")
                 
@@ -3277,6 +3383,7 @@ class BrowserWindow(QMainWindow):
                 const perfDiv = document.querySelector('[style*="WebGPU"]');
                 if (perfDiv) perfDiv.remove();
                 """
+                self.user_scripts.unregister('webgpu-acceleration')
                 current_webview.page().runJavaScript(disable_script)
                 self.settings['webgpu_enabled'] = False
                 QMessageBox.information(self, "WebGPU", "🚫 WebGPU ускорение отключено")
@@ -3730,22 +3837,6 @@ class BrowserWindow(QMainWindow):
         """Open console for specific view"""
         self.toggle_devtools_for_view(webview)
     
-    def closeEvent(self, event):
-        """Handle browser window close"""
-        # Close all DevTools windows
-        for devtools_window in self.devtools_windows[:]:  # Copy list to avoid modification during iteration
-            try:
-                devtools_window.close()
-            except:
-                pass
-        self.devtools_windows.clear()
-        
-        # Save settings
-        self.save_settings()
-        
-        # Accept event
-        event.accept()
-    
     def load_error_page(self, item, list_widget):
         """Load selected error page"""
         url = item.data(Qt.UserRole)
@@ -3935,6 +4026,10 @@ class BrowserWindow(QMainWindow):
         search_action.triggered.connect(self.find_on_page)
         menu.addAction(search_action)
         
+        tab_search_action = QAction("🔎 Найти во всех вкладках", self)
+        tab_search_action.triggered.connect(self.show_tab_search)
+        menu.addAction(tab_search_action)
+        
         source_action = QAction("📄 Исходный код", self)
         source_action.triggered.connect(self.show_page_source)
         menu.addAction(source_action)
@@ -3947,6 +4042,10 @@ class BrowserWindow(QMainWindow):
         browser_screenshot_action.triggered.connect(self.take_browser_screenshot)
         menu.addAction(browser_screenshot_action)
         
+        page_screenshot_action = QAction("📜 Скриншот всей страницы", self)
+        page_screenshot_action.triggered.connect(self.take_page_screenshot)
+        menu.addAction(page_screenshot_action)
+        
         menu.addSeparator()
         
         # Дополнительные функции
@@ -4312,20 +4411,24 @@ class SecurityManager:
             "ad_blocker": True
         }
         self.load_security_settings()
+        get_persistence_service().register(
+            'security', os.path.join(self.browser.data_dir, "security.json"),
+            lambda: self.security_settings
+        )
     
     def load_security_settings(self):
         settings_file = os.path.join(self.browser.data_dir, "security.json")
         if os.path.exists(settings_file):
             try:
                 with open(settings_file, 'r', encoding='utf-8') as f:
-                    self.security_settings.update(json.load(f))
+                    data = json.load(f)
+                migrator = get_profile_migrator(self.browser.data_dir)
+                self.security_settings.update(migrator.migrate('security', data, settings_file))
             except:
                 pass
     
     def save_security_settings(self):
-        settings_file = os.path.join(self.browser.data_dir, "security.json")
-        with open(settings_file, 'w', encoding='utf-8') as f:
-            json.dump(self.security_settings, f, ensure_ascii=False, indent=2)
+        get_persistence_service().mark_dirty('security')
     
     def toggle_javascript(self):
         self.security_settings["javascript"] = not self.security_settings["javascript"]
@@ -4351,26 +4454,34 @@ class DownloadManager:
         if not os.path.exists(self.download_dir):
             os.makedirs(self.download_dir)
         self.load_downloads()
+        get_persistence_service().register(
+            'downloads', os.path.join(self.browser.data_dir, "downloads.json"),
+            lambda: self.downloads
+        )
     
     def load_downloads(self):
         downloads_file = os.path.join(self.browser.data_dir, "downloads.json")
         if os.path.exists(downloads_file):
             try:
                 with open(downloads_file, 'r', encoding='utf-8') as f:
-                    self.downloads = json.load(f)
+                    data = json.load(f)
+                migrator = get_profile_migrator(self.browser.data_dir)
+                self.downloads = migrator.migrate('downloads', data, downloads_file)
             except:
                 self.downloads = []
     
     def save_downloads(self):
-        downloads_file = os.path.join(self.browser.data_dir, "downloads.json")
-        with open(downloads_file, 'w', encoding='utf-8') as f:
-            json.dump(self.downloads, f, ensure_ascii=False, indent=2)
+        get_persistence_service().mark_dirty('downloads')
 
 class CookieManager:
     def __init__(self, browser):
         self.browser = browser
         self.cookies = []
         self.load_cookies()
+        get_persistence_service().register(
+            'cookies', os.path.join(self.browser.data_dir, "cookies.json"),
+            lambda: self.cookies
+        )
     
     def load_cookies(self):
         cookies_file = os.path.join(self.browser.data_dir, "cookies.json")
@@ -4382,9 +4493,7 @@ class CookieManager:
                 self.cookies = []
     
     def save_cookies(self):
-        cookies_file = os.path.join(self.browser.data_dir, "cookies.json")
-        with open(cookies_file, 'w', encoding='utf-8') as f:
-            json.dump(self.cookies, f, ensure_ascii=False, indent=2)
+        get_persistence_service().mark_dirty('cookies')
     
     def clear_all_cookies(self):
         self.cookies = []
@@ -4537,6 +4646,7 @@ class BrowserApplication(QApplication):
 
 def main():
     app = BrowserApplication(sys.argv)
+    app.aboutToQuit.connect(cleanup_persistence_service)
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
@@ -21,6 +21,7 @@ from local_server import ErrorPageServerBridge
 from memory_manager import get_memory_manager, MemoryPriority
 from webgpu_support import get_webgpu_support
 from engine_optimizer import get_engine_optimizer, OptimizationLevel
+from view_pool import WarmViewPool
 
 # Set Qt attributes BEFORE creating QApplication
 QApplication.setAttribute(Qt.AA_ShareOpenGLContexts)
@@ -135,6 +136,10 @@ class BrowserWindow(QMainWindow):
         
         # Start local server for error pages
         self.server_bridge.start_server()
+        
+        # Pre-warmed views for new tabs, refilled when the browser is idle
+        self.view_pool = WarmViewPool(self.create_tab_view, QUrl("https://www.google.com"), parent=self)
+        self.view_pool.schedule_refill()
         
         self.setWindowTitle(f"{self.settings['browser']['name']} v{self.settings['browser']['version']}")
         self.setGeometry(100, 100, 1400, 900)
@@ -293,10 +298,7 @@ class BrowserWindow(QMainWindow):
         else:
             self.setStyleSheet("")  # Default theme
             
-    def add_new_tab(self, url=None):
-        if url is None:
-            url = "https://www.google.com"
-            
+    def create_tab_view(self):
         webview = QWebEngineView()
         
         # Enhance webview with comprehensive error handling
@@ -307,11 +309,19 @@ class BrowserWindow(QMainWindow):
         
         # Optimize memory usage for this webview
         self.memory_manager.allocate_from_pool('webview', lambda w=webview: w)
+        return webview
+        
+    def add_new_tab(self, url=None):
+        if url is None:
+            # New tab page: a pre-warmed view has it loaded already
+            url = self.view_pool.url.toString()
+            webview = self.view_pool.acquire()
+        else:
+            webview = self.create_tab_view()
+            webview.setUrl(QUrl(url))
         
         # Apply engine optimizations to webview
         self.engine_optimizer.apply_optimizations(OptimizationLevel.MAXIMUM)
-        
-        webview.setUrl(QUrl(url))
         
         title = self.get_page_title(url)
         index = self.tab_widget.addTab(webview, title)
@@ -790,6 +800,7 @@ def toggle_devtools(self):
     
     def closeEvent(self, event):
         self.settings_manager.save_settings()
+        self.view_pool.clear()
         
         # Clean up error test timer if running
         if hasattr(self, 'error_test_timer'):
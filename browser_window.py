@@ -6,9 +6,9 @@ from PyQt5.QtWidgets import (
     QPushButton, QLabel, QLineEdit, QTextEdit,
     QGroupBox, QGridLayout, QCheckBox, QComboBox,
     QSpinBox, QSplitter, QScrollArea, QFrame,
-    QProgressBar, QToolButton, QMenu
+    QProgressBar, QToolButton, QMenu, QDockWidget
 )
-from PyQt5.QtCore import Qt, QUrl, pyqtSignal, QTimer, QSize
+from PyQt5.QtCore import Qt, QUrl, pyqtSignal, QSize
 from PyQt5.QtGui import QKeySequence, QIcon, QFont, QPixmap
 from PyQt5.QtWebEngineWidgets import QWebEnginePage, QWebEngineProfile
 from PyQt5.QtWebEngineCore import QWebEngineSettings
@@ -20,6 +20,14 @@ from history import HistoryManager
 from settings import SettingsManager
 from download_manager import DownloadManager
 from devtools import DevToolsWindow
+from profile_data import get_profile_data
+from history_search import get_history_search
+from data_export import (BOOKMARK_COLUMNS, ExportWorker, history_total,
+                         iter_history, start_export)
+from data_import import ImportWorker, start_import
+from dynamic_menu import MenuSection
+from source_viewer import SourceDialog, save_source
+from tab_search import TabSearchPanel, get_tab_search_engine
 import os
 import json
 from datetime import datetime
@@ -30,10 +38,11 @@ class BrowserWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         
-        # Инициализация менеджеров
-        self.bookmarks_manager = BookmarksManager()
-        self.history_manager = HistoryManager()
-        self.settings_manager = SettingsManager()
+        # Инициализация менеджеров (общие для всех окон процесса)
+        self.profile_data = get_profile_data()
+        self.bookmarks_manager = self.profile_data.get_shared('bookmarks_manager', BookmarksManager)
+        self.history_manager = self.profile_data.get_shared('history_manager', HistoryManager)
+        self.settings_manager = self.profile_data.get_shared('settings_manager', SettingsManager)
         self.download_manager = DownloadManager()
         
         # DevTools windows
@@ -63,14 +72,11 @@ class BrowserWindow(QMainWindow):
         # Загрузка настроек
         self.load_settings()
         
-        # Обновление динамических меню
-        self.update_bookmarks_menu()
-        self.update_history_menu()
-        
-        # Таймер для обновления UI
-        self.ui_update_timer = QTimer()
-        self.ui_update_timer.timeout.connect(self.update_ui)
-        self.ui_update_timer.start(1000)
+        # Динамические меню заполняются при открытии и обновляются по сигналам
+        self.profile_data.history_visit_added.connect(self.history_section.prepend)
+        self.profile_data.history_changed.connect(self.history_section.invalidate)
+        self.profile_data.bookmarks_changed.connect(self.bookmarks_section.invalidate)
+        self.profile_data.bookmark_edited.connect(self.on_bookmark_edited)
     
     def init_ui(self):
         """Инициализация пользовательского интерфейса"""
@@ -90,6 +96,11 @@ class BrowserWindow(QMainWindow):
         # Виджет вкладок
         self.tab_widget = TabWidget(self.bookmarks_manager, self.history_manager, self.download_manager)
         main_layout.addWidget(self.tab_widget)
+        
+        # Поиск по всем вкладкам (текст страниц извлекается при первом поиске)
+        self.tab_search = get_tab_search_engine()
+        self.tab_search.watch(self.tab_widget)
+        self.tab_search_dock = None
     
     def create_menu(self):
         """Создание меню браузера"""
@@ -247,6 +258,12 @@ class BrowserWindow(QMainWindow):
         find_previous_action.triggered.connect(self.find_previous)
         edit_menu.addAction(find_previous_action)
         
+        # Найти во всех вкладках
+        find_all_tabs_action = QAction("Найти во всех вкладках...", self)
+        find_all_tabs_action.setShortcut(QKeySequence("Ctrl+Alt+F"))
+        find_all_tabs_action.triggered.connect(lambda: self.find_in_all_tabs())
+        edit_menu.addAction(find_all_tabs_action)
+        
         edit_menu.addSeparator()
         
         # Выделить всё
@@ -414,8 +431,16 @@ class BrowserWindow(QMainWindow):
         
         self.bookmarks_menu.addSeparator()
         
-        # Динамические закладки будут добавлены позже
-        self.dynamic_bookmarks_menu = self.bookmarks_menu
+        # Динамические закладки (первые 15, создаются при открытии меню)
+        self.bookmarks_section = MenuSection(
+            self.bookmarks_menu,
+            lambda count: self.bookmarks_manager.get_bookmarks()[:count],
+            lambda bookmark: self.menu_title(bookmark['title']),
+            self.open_menu_url,
+            limit=15,
+            more_text="Ещё...",
+            on_more=self.show_bookmarks_manager
+        )
         
         # ==================== Меню История ====================
         self.history_menu = menubar.addMenu("История")
@@ -440,8 +465,14 @@ class BrowserWindow(QMainWindow):
         
         self.history_menu.addSeparator()
         
-        # Динамическая история будет добавлена позже
-        self.dynamic_history_menu = self.history_menu
+        # Динамическая история (последние 10 посещений, LIMIT-запрос к хранилищу)
+        self.history_section = MenuSection(
+            self.history_menu,
+            lambda count: self.profile_data.history_store.get_history(limit=count),
+            lambda item: f"{item['visit_time']} - {self.menu_title(item['title'])}",
+            self.open_menu_url,
+            limit=10
+        )
         
         # ==================== Меню Инструменты ====================
         tools_menu = menubar.addMenu("Инструменты")
@@ -840,11 +871,32 @@ class BrowserWindow(QMainWindow):
             "JSON файлы (*.json);;HTML файлы (*.html);;Все файлы (*.*)"
         )
         if file_path:
-            if self.bookmarks_manager.import_bookmarks(file_path):
-                self.update_bookmarks_menu()
-                QMessageBox.information(self, "Импорт", "Закладки успешно импортированы")
-            else:
-                QMessageBox.warning(self, "Импорт", "Ошибка при импорте закладок")
+            # Файл разбирается в фоновом потоке, пачки добавляются в тот же bookmarks_manager,
+            # из которого окно читает закладки; меню обновляется один раз в конце
+            worker = ImportWorker(file_path, ImportWorker.BOOKMARKS)
+            added = []
+            
+            def on_batch(batch):
+                for bookmark in batch:
+                    url = bookmark['url']
+                    if not self.bookmarks_manager.is_bookmarked(url):
+                        self.bookmarks_manager.add_bookmark(url, bookmark['title'])
+                        added.append(url)
+            
+            def on_finished(stats):
+                self.notify_bookmark_edit('reload')
+                QMessageBox.information(
+                    self, "Импорт",
+                    f"Закладки успешно импортированы: {len(added)} новых из {stats['rows']} "
+                    f"({stats['rows_per_second']:.0f} записей/с)"
+                )
+            
+            worker.batch_ready.connect(on_batch)
+            worker.import_finished.connect(on_finished)
+            worker.import_cancelled.connect(lambda: self.notify_bookmark_edit('reload'))
+            worker.import_failed.connect(
+                lambda error: QMessageBox.warning(self, "Импорт", f"Ошибка при импорте закладок: {error}"))
+            start_import(self, worker, "Импорт закладок...", "Отмена")
     
     def export_bookmarks(self):
         """Экспорт закладок в файл"""
@@ -853,20 +905,56 @@ class BrowserWindow(QMainWindow):
             "JSON файлы (*.json);;HTML файлы (*.html);;Все файлы (*.*)"
         )
         if file_path:
-            if self.bookmarks_manager.export_bookmarks(file_path):
-                QMessageBox.information(self, "Экспорт", "Закладки успешно экспортированы")
-            else:
-                QMessageBox.warning(self, "Экспорт", "Ошибка при экспорте закладок")
+            # Снимок списка; запись в файл идёт в фоновом потоке
+            bookmarks = list(self.bookmarks_manager.get_bookmarks())
+            worker = ExportWorker(lambda: iter(bookmarks), file_path,
+                                  columns=BOOKMARK_COLUMNS, title="Закладки",
+                                  total=len(bookmarks))
+            worker.export_finished.connect(
+                lambda count, path: QMessageBox.information(self, "Экспорт", "Закладки успешно экспортированы"))
+            worker.export_failed.connect(
+                lambda error: QMessageBox.warning(self, "Экспорт", f"Ошибка при экспорте закладок: {error}"))
+            start_export(self, worker, "Экспорт закладок...", "Отмена")
     
     def import_history(self):
         """Импорт истории из файла"""
-        QMessageBox.information(self, "Импорт истории", 
-                              "Функция импорта истории будет реализована в следующей версии")
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Импорт истории", "",
+            "JSON файлы (*.json);;CSV файлы (*.csv);;Все файлы (*.*)"
+        )
+        if file_path:
+            # Посещения пишутся в хранилище истории пачками прямо из фонового потока
+            worker = ImportWorker(file_path, ImportWorker.HISTORY, self.profile_data.history_store)
+            
+            def on_finished(stats):
+                self.profile_data.reload_history()
+                QMessageBox.information(
+                    self, "Импорт истории",
+                    f"Импортировано записей: {stats['added']} ({stats['rows_per_second']:.0f} записей/с)"
+                )
+            
+            worker.import_finished.connect(on_finished)
+            worker.import_cancelled.connect(self.profile_data.reload_history)
+            worker.import_failed.connect(
+                lambda error: QMessageBox.warning(self, "Импорт истории", f"Ошибка при импорте: {error}"))
+            start_import(self, worker, "Импорт истории...", "Отмена")
     
     def export_history(self):
         """Экспорт истории в файл"""
-        QMessageBox.information(self, "Экспорт истории", 
-                              "Функция экспорта истории будет реализована в следующей версии")
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Экспорт истории", "",
+            "JSON файлы (*.json);;CSV файлы (*.csv);;Сжатый JSON (*.json.gz);;Все файлы (*.*)"
+        )
+        if file_path:
+            store = self.profile_data.history_store
+            worker = ExportWorker(lambda: iter_history(store), file_path,
+                                  total=history_total(store))
+            worker.export_finished.connect(
+                lambda count, path: QMessageBox.information(self, "Экспорт истории",
+                                                            f"Экспортировано записей: {count}"))
+            worker.export_failed.connect(
+                lambda error: QMessageBox.warning(self, "Экспорт истории", f"Ошибка при экспорте: {error}"))
+            start_export(self, worker, "Экспорт истории...", "Отмена")
     
     def close_current_tab(self):
         """Закрытие текущей вкладки"""
@@ -949,12 +1037,16 @@ class BrowserWindow(QMainWindow):
         find_previous_btn = QPushButton("Найти предыдущее")
         close_btn = QPushButton("Закрыть")
         
+        all_tabs_btn = QPushButton("Во всех вкладках")
+        
         find_next_btn.clicked.connect(self.find_next)
         find_previous_btn.clicked.connect(self.find_previous)
+        all_tabs_btn.clicked.connect(lambda: self.find_in_all_tabs(self.find_input.text()))
         close_btn.clicked.connect(dialog.close)
         
         buttons_layout.addWidget(find_next_btn)
         buttons_layout.addWidget(find_previous_btn)
+        buttons_layout.addWidget(all_tabs_btn)
         buttons_layout.addStretch()
         buttons_layout.addWidget(close_btn)
         
@@ -995,6 +1087,19 @@ class BrowserWindow(QMainWindow):
                     
                     web_view.findText(text, options)
     
+    def find_in_all_tabs(self, text=''):
+        """Поиск текста во всех вкладках (боковая панель)"""
+        if self.tab_search_dock is None:
+            self.tab_search_dock = QDockWidget("Поиск по вкладкам", self)
+            self.tab_search_dock.setWidget(TabSearchPanel(self.tab_search, self.tab_search_dock))
+            self.addDockWidget(Qt.RightDockWidgetArea, self.tab_search_dock)
+        self.tab_search_dock.show()
+        panel = self.tab_search_dock.widget()
+        if text:
+            panel.search_input.setText(text)
+            panel.run_search()
+        panel.focus_search()
+    
     def select_all(self):
         """Выделение всего текста"""
         web_view = self.tab_widget.current_web_view()
@@ -1160,104 +1265,15 @@ class BrowserWindow(QMainWindow):
     
     def show_source_dialog(self, html):
         """Отображение исходного кода в диалоге"""
-        dialog = QDialog(self)
-        dialog.setWindowTitle("Исходный код страницы")
-        dialog.resize(800, 600)
-        
-        layout = QVBoxLayout(dialog)
-        
-        # Текстовое поле с кодом
-        text_edit = QTextEdit()
-        text_edit.setPlainText(html)
-        text_edit.setReadOnly(True)
-        text_edit.setFont(QFont("Courier New", 10))
-        
-        # Добавляем подсветку синтаксиса (простая версия)
-        from PyQt5.QtGui import QSyntaxHighlighter, QTextCharFormat, QColor
-        from PyQt5.QtCore import QRegExp
-        
-        class HtmlHighlighter(QSyntaxHighlighter):
-            def __init__(self, document):
-                super().__init__(document)
-                
-                # Форматы
-                tag_format = QTextCharFormat()
-                tag_format.setForeground(QColor(136, 18, 128))
-                
-                attribute_format = QTextCharFormat()
-                attribute_format.setForeground(QColor(153, 69, 0))
-                
-                value_format = QTextCharFormat()
-                value_format.setForeground(QColor(26, 26, 166))
-                
-                comment_format = QTextCharFormat()
-                comment_format.setForeground(QColor(35, 110, 37))
-                comment_format.setFontItalic(True)
-                
-                # Правила
-                self.rules = []
-                
-                # Теги
-                self.rules.append((QRegExp("&[a-zA-Z]+;"), tag_format))
-                self.rules.append((QRegExp("<[^>]*>"), tag_format))
-                
-                # Атрибуты
-                self.rules.append((QRegExp("\\b[A-Za-z_]+(?=\\=)"), attribute_format))
-                
-                # Значения атрибутов
-                self.rules.append((QRegExp("\"[^\"]*\""), value_format))
-                self.rules.append((QRegExp("'[^']*'"), value_format))
-                
-                # Комментарии
-                self.rules.append((QRegExp("<!--[^>]*-->"), comment_format))
-            
-            def highlightBlock(self, text):
-                for pattern, format in self.rules:
-                    expression = QRegExp(pattern)
-                    index = expression.indexIn(text)
-                    while index >= 0:
-                        length = expression.matchedLength()
-                        self.setFormat(index, length, format)
-                        index = expression.indexIn(text, index + length)
-        
-        highlighter = HtmlHighlighter(text_edit.document())
-        
-        layout.addWidget(text_edit)
-        
-        # Кнопки
-        buttons_layout = QHBoxLayout()
-        
-        copy_btn = QPushButton("Копировать")
-        copy_btn.clicked.connect(lambda: QApplication.clipboard().setText(html))
-        
-        save_btn = QPushButton("Сохранить")
-        save_btn.clicked.connect(lambda: self.save_source_to_file(html))
-        
-        close_btn = QPushButton("Закрыть")
-        close_btn.clicked.connect(dialog.close)
-        
-        buttons_layout.addWidget(copy_btn)
-        buttons_layout.addWidget(save_btn)
-        buttons_layout.addStretch()
-        buttons_layout.addWidget(close_btn)
-        
-        layout.addLayout(buttons_layout)
-        
+        dialog = SourceDialog(html, self, self.save_source_to_file)
         dialog.exec_()
     
     def save_source_to_file(self, html):
-        """Сохранение исходного кода в файл"""
-        file_path, _ = QFileDialog.getSaveFileName(
-            self, "Сохранить исходный код", "",
-            "HTML файлы (*.html);;Текстовые файлы (*.txt);;Все файлы (*.*)"
-        )
-        if file_path:
-            try:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(html)
-                self.statusbar.showMessage(f"Исходный код сохранен: {file_path}", 3000)
-            except Exception as e:
-                QMessageBox.warning(self, "Ошибка", f"Не удалось сохранить файл: {str(e)}")
+        """Сохранение исходного кода в файл (запись в фоновом потоке)"""
+        save_source(
+            self, html,
+            on_finished=lambda path: self.statusbar.showMessage(f"Исходный код сохранен: {path}", 3000),
+            on_failed=lambda error: QMessageBox.warning(self, "Ошибка", f"Не удалось сохранить файл: {error}"))
     
     # ==================== Методы меню Переход ====================
     def go_back(self):
@@ -1317,6 +1333,7 @@ class BrowserWindow(QMainWindow):
                     )
                     if reply == QMessageBox.Yes:
                         self.bookmarks_manager.remove_bookmark(url)
+                        self.notify_bookmark_edit('remove', url)
                         self.bookmark_action.setChecked(False)
                         self.statusbar.showMessage("Закладка удалена", 2000)
                 else:
@@ -1328,11 +1345,9 @@ class BrowserWindow(QMainWindow):
                     )
                     if ok and name:
                         self.bookmarks_manager.add_bookmark(url, name)
+                        self.notify_bookmark_edit('add', url, {'url': url, 'title': name})
                         self.bookmark_action.setChecked(True)
                         self.statusbar.showMessage("Страница добавлена в закладки", 2000)
-                
-                # Обновляем меню
-                self.update_bookmarks_menu()
     
     def show_bookmarks_manager(self):
         """Отображение диспетчера закладок"""
@@ -1407,7 +1422,7 @@ class BrowserWindow(QMainWindow):
         )
         if ok and name:
             self.bookmarks_manager.create_folder(name)
-            self.update_bookmarks_menu()
+            self.notify_bookmark_edit('reload')
             parent_dialog.close()
             self.show_bookmarks_manager()
     
@@ -1432,6 +1447,7 @@ class BrowserWindow(QMainWindow):
                 )
                 if ok and new_name:
                     self.bookmarks_manager.edit_bookmark(url, new_name)
+                    self.notify_bookmark_edit('update', url, {'url': url, 'title': new_name})
                     current_item.setText(new_name)
     
     def delete_selected_bookmark(self):
@@ -1448,6 +1464,7 @@ class BrowserWindow(QMainWindow):
                 )
                 if reply == QMessageBox.Yes:
                     self.bookmarks_manager.remove_bookmark(url)
+                    self.notify_bookmark_edit('remove', url)
                     self.bookmarks_list.takeItem(self.bookmarks_list.row(current_item))
     
     def toggle_bookmarks_bar(self, visible):
@@ -1456,32 +1473,34 @@ class BrowserWindow(QMainWindow):
                               "Функция панели закладок будет реализована в следующей версии")
     
     def update_bookmarks_menu(self):
-        """Обновление меню закладок"""
-        # Очищаем динамические элементы
-        actions = self.dynamic_bookmarks_menu.actions()
-        for action in actions[4:]:  # Оставляем первые 4 статических действия
-            self.dynamic_bookmarks_menu.removeAction(action)
-        
-        # Добавляем закладки
-        bookmarks = self.bookmarks_manager.get_bookmarks()
-        if bookmarks:
-            self.dynamic_bookmarks_menu.addSeparator()
-            
-            for i, bookmark in enumerate(bookmarks[:15]):  # Первые 15 закладок
-                title = bookmark['title']
-                if len(title) > 40:
-                    title = title[:37] + "..."
-                
-                action = QAction(title, self)
-                action.setData(bookmark['url'])
-                action.triggered.connect(lambda checked, url=bookmark['url']: 
-                                       self.load_url(QUrl(url)))
-                self.dynamic_bookmarks_menu.addAction(action)
-            
-            if len(bookmarks) > 15:
-                more_action = QAction("Ещё...", self)
-                more_action.triggered.connect(self.show_bookmarks_manager)
-                self.dynamic_bookmarks_menu.addAction(more_action)
+        """Перезагрузить меню закладок при следующем открытии"""
+        self.bookmarks_section.invalidate()
+    
+    def notify_bookmark_edit(self, action, url='', entry=None):
+        """Правка через общий bookmarks_manager: сигнал получают все окна, включая это"""
+        self.profile_data.bookmark_edited.emit(action, url, entry)
+    
+    def on_bookmark_edited(self, action, url, entry):
+        """Точечное обновление меню закладок после правки в любом окне"""
+        if action == 'add':
+            self.bookmarks_section.append(entry)
+        elif action == 'remove':
+            self.bookmarks_section.remove(url)
+        elif action == 'update':
+            self.bookmarks_section.update(url, entry)
+        else:
+            self.bookmarks_section.invalidate()
+    
+    def menu_title(self, title):
+        """Заголовок для пункта меню"""
+        title = title or ''
+        if len(title) > 40:
+            title = title[:37] + "..."
+        return title
+    
+    def open_menu_url(self, url):
+        """Открытие URL из динамического меню"""
+        self.load_url(QUrl(url))
     
     # ==================== Методы меню История ====================
     def show_history(self):
@@ -1530,13 +1549,14 @@ class BrowserWindow(QMainWindow):
         
         layout.addLayout(buttons_layout)
         
-        # Подключение поиска
+        # Подключение поиска (полнотекстовый индекс вместо lower() по каждой записи)
         def search_history():
-            search_text = search_input.text().lower()
-            for i in range(history_list.count()):
-                item = history_list.item(i)
-                item_text = item.text().lower()
-                item.setHidden(search_text not in item_text)
+            search_text = search_input.text().strip()
+            matching = get_history_search().matching_urls(search_text) if search_text else None
+            for i, entry in enumerate(history):
+                history_list.item(i).setHidden(
+                    matching is not None and entry['url'] not in matching
+                )
         
         search_input.textChanged.connect(search_history)
         search_btn.clicked.connect(search_history)
@@ -1568,27 +1588,8 @@ class BrowserWindow(QMainWindow):
             QMessageBox.information(self, "История", "История очищена")
     
     def update_history_menu(self):
-        """Обновление меню истории"""
-        # Очищаем динамические элементы
-        actions = self.dynamic_history_menu.actions()
-        for action in actions[3:]:  # Оставляем первые 3 статических действия
-            self.dynamic_history_menu.removeAction(action)
-        
-        # Добавляем историю
-        history = self.history_manager.get_history()[:10]  # Последние 10 посещений
-        if history:
-            self.dynamic_history_menu.addSeparator()
-            
-            for item in history:
-                title = item['title']
-                if len(title) > 40:
-                    title = title[:37] + "..."
-                
-                action = QAction(f"{item['visit_time']} - {title}", self)
-                action.setData(item['url'])
-                action.triggered.connect(lambda checked, url=item['url']: 
-                                       self.load_url(QUrl(url)))
-                self.dynamic_history_menu.addAction(action)
+        """Перезагрузить меню истории при следующем открытии"""
+        self.history_section.invalidate()
     
     # ==================== Методы меню Инструменты ====================
     def show_downloads_manager(self):
@@ -2113,6 +2114,12 @@ class BrowserWindow(QMainWindow):
         else:
             self.loading_label.setText("Готово")
             self.progress_bar.setVisible(False)
+            
+            web_view = self.tab_widget.current_web_view()
+            if web_view:
+                url = web_view.url().toString()
+                if url and url != "about:blank":
+                    self.statusbar.showMessage(f"Загружено: {url}", 1000)
     
     def on_icon_changed(self, icon):
         """Обработчик изменения иконки"""
@@ -2154,19 +2161,6 @@ class BrowserWindow(QMainWindow):
         if web_view and url.isValid():
             web_view.load(url)
     
-    def update_ui(self):
-        """Периодическое обновление UI"""
-        # Обновляем меню закладок и истории
-        self.update_bookmarks_menu()
-        self.update_history_menu()
-        
-        # Обновляем информацию в статусбаре
-        web_view = self.tab_widget.current_web_view()
-        if web_view:
-            url = web_view.url().toString()
-            if url and url != "about:blank":
-                self.statusbar.showMessage(f"Загружено: {url}", 1000)
-    
     def closeEvent(self, event):
         """Обработчик закрытия окна"""
         # Сохраняем настройки
@@ -2181,10 +2175,6 @@ class BrowserWindow(QMainWindow):
         # Закрываем все вкладки
         self.tab_widget.close_all_tabs()
         
-        # Останавливаем таймеры
-        if hasattr(self, 'ui_update_timer'):
-            self.ui_update_timer.stop()
-        
         # Очищаем историю, если настроено
         if self.settings_manager.get_setting('clear_history_on_exit', False):
             self.history_manager.clear_history()
@@ -23,6 +23,10 @@ from PyQt5.QtGui import QIcon
 from PyQt5.QtWebEngineWidgets import QWebEngineView, QWebEnginePage
 from PyQt5.QtCore import QUrl
 
+from bookmark_index import BookmarkIndex
+from history_store import get_history_store
+from view_pool import WarmViewPool
+
 # IMPORTANT: Set OpenGL context sharing
 QApplication.setAttribute(Qt.AA_ShareOpenGLContexts, True)
 
@@ -162,6 +166,7 @@ class BookmarksManager:
         self.parent = parent
         self.bookmarks_file = os.path.join(parent.data_dir, "bookmarks.json")
         self.bookmarks = self.load_bookmarks()
+        self.index = BookmarkIndex(self.bookmarks)
         
     def load_bookmarks(self):
         if os.path.exists(self.bookmarks_file):
@@ -184,42 +189,33 @@ class BookmarksManager:
         }
         
         # Check if exists
-        for existing in self.bookmarks:
-            if existing['url'] == url:
-                return False
+        if not self.index.add(bookmark):
+            return False
         
         self.bookmarks.append(bookmark)
         self.save_bookmarks()
         return True
+    
+    def is_bookmarked(self, url):
+        return self.index.contains(url)
 
 class HistoryManager:
     def __init__(self, parent):
         self.parent = parent
         self.history_file = os.path.join(parent.data_dir, "history.json")
-        self.history = self.load_history()
+        # Nothing is loaded up front: views query the store for the rows they show
+        self.store = get_history_store(parent.data_dir)
         
-    def load_history(self):
-        if os.path.exists(self.history_file):
-            try:
-                with open(self.history_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                return []
-        return []
+    def recent(self, count):
+        """Last ``count`` visits, most recent first"""
+        return self.store.get_visits(count)
     
-    def save_history(self):
-        with open(self.history_file, 'w', encoding='utf-8') as f:
-            json.dump(self.history[-1000:], f, ensure_ascii=False, indent=2)
+    def clear(self):
+        self.store.clear()
     
     def add_to_history(self, url, title):
         if not self.parent.incognito_mode:
-            history_item = {
-                'url': url,
-                'title': title,
-                'timestamp': datetime.datetime.now().isoformat()
-            }
-            self.history.append(history_item)
-            self.save_history()
+            self.store.add_visit(url, title, time.time())
 
 class DownloadsManager:
     def __init__(self, parent):
@@ -311,8 +307,16 @@ class CompleteBrowserWindow(QMainWindow):
         self.devtools_manager = DevToolsManager(self)
         print("[OK] Classic browser features initialized")
         
+        # Прогретые вкладки для Ctrl+T, пул пополняется в простое
+        self.view_pool = WarmViewPool(self.create_tab_view, QUrl("https://www.google.com"), parent=self)
+        
         self.init_ui()
         self.create_menus()
+        self.view_pool.schedule_refill()
+        
+    def closeEvent(self, event):
+        self.view_pool.clear()
+        event.accept()
         
     def init_ui(self):
         central_widget = QWidget()
@@ -576,22 +580,27 @@ class CompleteBrowserWindow(QMainWindow):
             QMessageBox.warning(self, "Вкладки", result)
             return None
         
-        webview = QWebEngineView()
-        
         if url:
+            webview = self.create_tab_view()
             webview.setUrl(QUrl(url))
         else:
-            webview.setUrl(QUrl("https://www.google.com"))
+            webview = self.view_pool.acquire()
         
-        index = self.tab_widget.addTab(webview, "New Tab")
+        index = self.tab_widget.addTab(webview, webview.title() or "New Tab")
         self.tab_widget.setCurrentIndex(index)
         
-        # Update title when loaded
-        webview.titleChanged.connect(lambda title: self.update_tab_title(webview, title))
-        
-        # Add to history when page loads
+        # Add to history when page loads (a warm view has loaded already)
         webview.loadFinished.connect(lambda: self.on_page_loaded(webview))
+        if self.view_pool.is_ready(webview):
+            self.on_page_loaded(webview)
+        
+        return webview
+    
+    def create_tab_view(self):
+        webview = QWebEngineView()
         
+        # Update title when loaded
+        webview.titleChanged.connect(lambda title: self.update_tab_title(webview, title))
         return webview
     
     def on_page_loaded(self, webview):
@@ -949,11 +958,12 @@ class CompleteBrowserWindow(QMainWindow):
         layout = QVBoxLayout(dialog)
         
         list_widget = QListWidget()
-        for item in reversed(self.history_manager.history[-50:]):
+        visits = self.history_manager.recent(50)
+        for item in visits:
             item_text = f"{item['title'][:50]}...\n{item['url'][:60]}...\n{item['timestamp'][:19]}"
             list_widget.addItem(item_text)
         
-        if not self.history_manager.history:
+        if not visits:
             list_widget.addItem("История пуста")
         
         layout.addWidget(list_widget)
@@ -980,8 +990,7 @@ class CompleteBrowserWindow(QMainWindow):
         )
         
         if reply == QMessageBox.Yes:
-            self.history_manager.history = []
-            self.history_manager.save_history()
+            self.history_manager.clear()
             QMessageBox.information(self, "История", "История очищена")
     
     def show_settings(self):
@@ -0,0 +1,302 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming Data Export
+Generators over the history store / bookmark lists feed incremental JSON
+array, CSV, plain text and Netscape bookmark writers. Exports run on a
+worker thread with progress and cancellation, optionally gzip-compressed,
+and never hold more than one row in memory
+"""
+
+import csv
+import gzip
+import html
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from PyQt5.QtCore import QThread, pyqtSignal
+from PyQt5.QtWidgets import QProgressDialog
+
+from history_store import HistoryStore, format_entry
+
+# Rows between two progress signals
+PROGRESS_EVERY = 2000
+
+HISTORY_COLUMNS = [('url', 'URL'), ('title', 'Title'), ('visit_time', 'Date'), ('timestamp', 'Time')]
+BOOKMARK_COLUMNS = [('url', 'URL'), ('title', 'Title'), ('folder', 'Folder'), ('timestamp', 'Date')]
+
+
+# ----------------------------------------------------------------------
+# Row sources
+# ----------------------------------------------------------------------
+def iter_history(store: HistoryStore, start: Optional[float] = None,
+                 end: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+    """All visits (hot segment and archive), most recent first"""
+    if store.archive:
+        rows = store.archive.iter_visits(start, end, newest_first=True)
+    else:
+        rows = store.iter_visits(start, end, newest_first=True)
+    for url, title, visit_time in rows:
+        yield format_entry(url, title, visit_time)
+
+
+def history_total(store: HistoryStore) -> int:
+    total = store.visit_count()
+    if store.archive:
+        total += store.archive.archived_visit_count()
+    return total
+
+
+# ----------------------------------------------------------------------
+# Writers
+# ----------------------------------------------------------------------
+class JsonArrayWriter:
+    """Writes a JSON array one element at a time"""
+
+    def __init__(self, stream, columns=None, title=''):
+        self.stream = stream
+        self.first = True
+
+    def begin(self):
+        self.stream.write('[\n')
+
+    def write(self, row: Dict[str, Any]):
+        if not self.first:
+            self.stream.write(',\n')
+        self.first = False
+        self.stream.write(json.dumps(row, ensure_ascii=False))
+
+    def end(self):
+        self.stream.write('\n]\n')
+
+
+class CsvRowWriter:
+    def __init__(self, stream, columns, title=''):
+        self.columns = columns
+        self.writer = csv.writer(stream)
+
+    def begin(self):
+        self.writer.writerow([header for _key, header in self.columns])
+
+    def write(self, row: Dict[str, Any]):
+        self.writer.writerow([row.get(key, '') for key, _header in self.columns])
+
+    def end(self):
+        pass
+
+
+class TextWriter:
+    def __init__(self, stream, columns, title=''):
+        self.stream = stream
+        self.columns = columns
+        self.title = title
+
+    def begin(self):
+        if self.title:
+            self.stream.write(f"{self.title}\n{'=' * 50}\n\n")
+
+    def write(self, row: Dict[str, Any]):
+        for key, header in self.columns:
+            self.stream.write(f"{header}: {row.get(key, '')}\n")
+        self.stream.write("-" * 30 + "\n\n")
+
+    def end(self):
+        pass
+
+
+class NetscapeBookmarkWriter:
+    """Netscape bookmark file (the HTML format every browser imports), one folder per run"""
+
+    def __init__(self, stream, columns=None, title='Bookmarks'):
+        self.stream = stream
+        self.title = title or 'Bookmarks'
+        self.folder = None
+
+    def begin(self):
+        self.stream.write(
+            '<!DOCTYPE NETSCAPE-Bookmark-file-1>\n'
+            '<META HTTP-EQUIV="Content-Type" CONTENT="text/html; charset=UTF-8">\n'
+            f'<TITLE>{html.escape(self.title)}</TITLE>\n<H1>{html.escape(self.title)}</H1>\n<DL><p>\n'
+        )
+
+    def write(self, row: Dict[str, Any]):
+        folder = row.get('folder') or None
+        if folder != self.folder:
+            if self.folder is not None:
+                self.stream.write('    </DL><p>\n')
+            if folder is not None:
+                self.stream.write(f'    <DT><H3>{html.escape(folder)}</H3>\n    <DL><p>\n')
+            self.folder = folder
+
+        added = ''
+        timestamp = row.get('timestamp')
+        if timestamp:
+            try:
+                added = f' ADD_DATE="{int(datetime.fromisoformat(timestamp).timestamp())}"'
+            except (TypeError, ValueError):
+                pass
+        indent = '        ' if self.folder is not None else '    '
+        self.stream.write(
+            f'{indent}<DT><A HREF="{html.escape(row.get("url", ""))}"{added}>'
+            f'{html.escape(row.get("title") or row.get("url", ""))}</A>\n'
+        )
+
+    def end(self):
+        if self.folder is not None:
+            self.stream.write('    </DL><p>\n')
+        self.stream.write('</DL><p>\n')
+
+
+WRITERS = {
+    'json': JsonArrayWriter,
+    'csv': CsvRowWriter,
+    'txt': TextWriter,
+    'html': NetscapeBookmarkWriter
+}
+
+
+def format_for_path(path: str, default: str = 'json') -> Tuple[str, bool]:
+    """(format, gzip) guessed from a file name such as ``history.csv.gz``"""
+    name = path.lower()
+    compress = name.endswith('.gz')
+    if compress:
+        name = name[:-3]
+    ext = os.path.splitext(name)[1].lstrip('.')
+    if ext in ('htm', 'html'):
+        ext = 'html'
+    return (ext if ext in WRITERS else default), compress
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+def export_rows(rows: Iterable[Dict[str, Any]], path: str, fmt: str = 'json',
+                columns: Optional[List[Tuple[str, str]]] = None, title: str = '',
+                compress: bool = False, total: int = 0,
+                progress: Optional[Callable[[int, int], None]] = None,
+                is_cancelled: Optional[Callable[[], bool]] = None) -> int:
+    """
+    Stream ``rows`` into ``path``; returns the number of rows written.
+
+    Output goes to a temp file next to ``path`` that replaces it only when
+    the export completes, so a cancelled or failed export leaves no partial
+    file behind.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.export.', suffix='.tmp', dir=directory)
+    os.close(fd)
+
+    count = 0
+    try:
+        if compress:
+            stream = gzip.open(tmp_path, 'wt', encoding='utf-8', newline='')
+        else:
+            stream = open(tmp_path, 'w', encoding='utf-8', newline='')
+        with stream:
+            writer = WRITERS[fmt](stream, columns or HISTORY_COLUMNS, title)
+            writer.begin()
+            for row in rows:
+                writer.write(row)
+                count += 1
+                if count % PROGRESS_EVERY == 0:
+                    if is_cancelled and is_cancelled():
+                        raise ExportCancelled()
+                    if progress:
+                        progress(count, total)
+            writer.end()
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    if progress:
+        progress(count, total)
+    return count
+
+
+class ExportWorker(QThread):
+    """
+    Runs ``export_rows`` off the UI thread.
+
+    ``rows_factory`` is called on the worker thread, so generators over the
+    history store are created (and consumed) there.
+    """
+
+    progress = pyqtSignal(int, int)
+    export_finished = pyqtSignal(int, str)
+    export_failed = pyqtSignal(str)
+    export_cancelled = pyqtSignal()
+
+    def __init__(self, rows_factory: Callable[[], Iterable[Dict[str, Any]]], path: str,
+                 fmt: Optional[str] = None, columns: Optional[List[Tuple[str, str]]] = None,
+                 title: str = '', compress: Optional[bool] = None, total: int = 0, parent=None):
+        super().__init__(parent)
+        guessed_fmt, guessed_gzip = format_for_path(path)
+        self.rows_factory = rows_factory
+        self.path = path
+        self.fmt = fmt or guessed_fmt
+        self.columns = columns
+        self.title = title
+        self.compress = guessed_gzip if compress is None else compress
+        self.total = total
+        self._cancelled = False
+        self.stats = {'rows': 0, 'seconds': 0.0}
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        started = time.perf_counter()
+        try:
+            count = export_rows(self.rows_factory(), self.path, self.fmt, self.columns, self.title,
+                                self.compress, self.total, self.progress.emit,
+                                lambda: self._cancelled)
+        except ExportCancelled:
+            self.export_cancelled.emit()
+            return
+        except Exception as e:
+            print(f"[WARNING] Export to {self.path} failed: {e}")
+            self.export_failed.emit(str(e))
+            return
+
+        self.stats['rows'] = count
+        self.stats['seconds'] = time.perf_counter() - started
+        print(f"[INFO] Exported {count} rows to {self.path} in {self.stats['seconds']:.1f}s")
+        self.export_finished.emit(count, self.path)
+
+
+def start_export(parent, worker: ExportWorker, label: str, cancel_text: str = "Cancel") -> ExportWorker:
+    """Show a modeless progress dialog for ``worker`` and start it"""
+    dialog = QProgressDialog(label, cancel_text, 0, max(worker.total, 1), parent)
+    dialog.setWindowTitle(label)
+    dialog.setMinimumDuration(300)
+    dialog.setAutoClose(False)
+    dialog.setAutoReset(False)
+
+    def on_progress(done, total):
+        if total:
+            dialog.setMaximum(max(total, done))
+        dialog.setValue(done)
+
+    worker.progress.connect(on_progress)
+    dialog.canceled.connect(worker.cancel)
+    for signal in (worker.export_finished, worker.export_failed, worker.export_cancelled):
+        signal.connect(dialog.close)
+    worker.finished.connect(worker.deleteLater)
+
+    # Keep the worker alive while it runs
+    if parent is not None:
+        running = getattr(parent, '_export_workers', set())
+        running.add(worker)
+        parent._export_workers = running
+        worker.finished.connect(lambda: running.discard(worker))
+
+    worker.start()
+    return worker
@@ -0,0 +1,383 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming Data Import
+Incremental readers for browser bookmark / history exports (Netscape
+bookmark HTML via html.parser, large JSON arrays via an iterative decoder,
+Chrome-style bookmark trees, CSV). Rows are normalized on a worker thread
+and handed to the UI thread in batches, with throughput reporting and
+cancellation
+"""
+
+import csv
+import io
+import json
+import os
+import time
+from datetime import datetime
+from html.parser import HTMLParser
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from PyQt5.QtCore import QThread, pyqtSignal
+from PyQt5.QtWidgets import QProgressDialog
+
+from history_store import HistoryStore, parse_timestamp
+
+# Bytes read from the source file per parser step
+CHUNK_SIZE = 256 * 1024
+
+# Rows handed over per batch
+BATCH_SIZE = 5000
+
+IMPORT_SCHEMES = ('http://', 'https://', 'ftp://', 'file://')
+
+
+def clean_url(url: Any) -> Optional[str]:
+    """Trimmed URL if it is something a browser tab can open, else None"""
+    if not isinstance(url, str):
+        return None
+    url = url.strip()
+    return url if url.lower().startswith(IMPORT_SCHEMES) else None
+
+
+def make_bookmark(url: str, title: str = '', folder: Optional[str] = None,
+                  timestamp: Any = None, tags: Optional[List[str]] = None) -> Dict[str, Any]:
+    if isinstance(timestamp, str) and timestamp.isdigit():
+        # Netscape ADD_DATE: epoch seconds
+        timestamp = int(timestamp)
+    moment = datetime.fromtimestamp(parse_timestamp(timestamp)) if timestamp else datetime.now()
+    bookmark = {
+        'title': (title or '').strip() or url,
+        'url': url,
+        'timestamp': moment.isoformat(),
+        'tags': tags or [],
+        'favicon': '',
+        'visits': 0
+    }
+    if folder:
+        bookmark['folder'] = folder
+    return bookmark
+
+
+# ----------------------------------------------------------------------
+# Readers
+# ----------------------------------------------------------------------
+class NetscapeBookmarkParser(HTMLParser):
+    """
+    Incremental parser for the Netscape bookmark file format.
+
+    Feed it chunks; parsed bookmarks accumulate in ``bookmarks`` and are
+    taken out by the caller after every ``feed``. Nested folders are
+    flattened to the innermost folder name.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.bookmarks: List[Dict[str, Any]] = []
+        self.folders: List[str] = []
+        self._pending_folder: Optional[str] = None
+        self._in_folder_title = False
+        self._link: Optional[Dict[str, Any]] = None
+        self._text: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'a':
+            attrs = dict(attrs)
+            self._link = attrs
+            self._text = []
+        elif tag == 'h3':
+            self._in_folder_title = True
+            self._text = []
+        elif tag == 'dl':
+            # A <DL> right after an <H3> opens that folder
+            self.folders.append(self._pending_folder or (self.folders[-1] if self.folders else ''))
+            self._pending_folder = None
+
+    def handle_endtag(self, tag):
+        if tag == 'a' and self._link is not None:
+            url = clean_url(self._link.get('href'))
+            if url:
+                tags = [t for t in (self._link.get('tags') or '').split(',') if t]
+                folder = self.folders[-1] if self.folders else None
+                self.bookmarks.append(make_bookmark(
+                    url, ''.join(self._text), folder or None, self._link.get('add_date'), tags
+                ))
+            self._link = None
+        elif tag == 'h3' and self._in_folder_title:
+            self._in_folder_title = False
+            self._pending_folder = ''.join(self._text).strip()
+        elif tag == 'dl' and self.folders:
+            self.folders.pop()
+
+    def handle_data(self, data):
+        if self._link is not None or self._in_folder_title:
+            self._text.append(data)
+
+
+def iter_chunks(f, on_read: Optional[Callable[[], None]] = None) -> Iterator[str]:
+    while True:
+        chunk = f.read(CHUNK_SIZE)
+        if not chunk:
+            return
+        if on_read:
+            on_read()
+        yield chunk
+
+
+def iter_netscape_html(f, on_read=None) -> Iterator[Dict[str, Any]]:
+    parser = NetscapeBookmarkParser()
+    for chunk in iter_chunks(f, on_read):
+        parser.feed(chunk)
+        if parser.bookmarks:
+            yield from parser.bookmarks
+            parser.bookmarks = []
+    parser.close()
+    yield from parser.bookmarks
+
+
+def iter_json_array(f, on_read=None) -> Iterator[Any]:
+    """Elements of a top-level JSON array, decoded one at a time"""
+    decoder = json.JSONDecoder()
+    chunks = iter_chunks(f, on_read)
+    buffer = ''
+    pos = 0
+    started = False
+
+    def fill():
+        nonlocal buffer, pos
+        chunk = next(chunks, None)
+        if chunk is None:
+            return False
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        return True
+
+    while True:
+        # Skip whitespace and separators
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buffer) or not fill():
+                break
+        if pos >= len(buffer):
+            return
+        if not started:
+            if buffer[pos] != '[':
+                raise ValueError("JSON file does not contain an array")
+            started = True
+            pos += 1
+            continue
+        if buffer[pos] == ']':
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except ValueError:
+            # Element continues in the next chunk
+            if not fill():
+                raise
+            continue
+        # Every element is followed by "," or "]"; anything else means a number
+        # was cut at the chunk border, so decode again with more data
+        after = end
+        while after < len(buffer) and buffer[after] in ' \t\r\n':
+            after += 1
+        if (after == len(buffer) or buffer[after] not in ',]') and fill():
+            continue
+        pos = end
+        yield item
+
+
+def walk_bookmark_tree(node: Any, folder: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Bookmarks from nested JSON exports (Chrome "roots"/"children", v1.1 "folders")"""
+    if isinstance(node, list):
+        for item in node:
+            yield from walk_bookmark_tree(item, folder)
+        return
+    if not isinstance(node, dict):
+        return
+
+    url = clean_url(node.get('url'))
+    if url:
+        # Chrome stores microseconds since 1601-01-01 in date_added
+        timestamp = node.get('timestamp')
+        if not timestamp and str(node.get('date_added', '')).isdigit():
+            timestamp = int(node['date_added']) / 1000000 - 11644473600
+        yield make_bookmark(url, node.get('title') or node.get('name', ''),
+                            node.get('folder') or folder, timestamp, node.get('tags'))
+        return
+
+    if isinstance(node.get('folders'), dict):
+        for name, child in node['folders'].items():
+            yield from walk_bookmark_tree(child.get('bookmarks', []), name)
+    if isinstance(node.get('roots'), dict):
+        for child in node['roots'].values():
+            yield from walk_bookmark_tree(child, folder)
+    if isinstance(node.get('children'), list):
+        name = node.get('name') or folder
+        yield from walk_bookmark_tree(node['children'], name)
+    if isinstance(node.get('bookmarks'), list):
+        yield from walk_bookmark_tree(node['bookmarks'], folder)
+
+
+def sniff(f) -> str:
+    """First non-whitespace character of a text file (the stream is rewound)"""
+    while True:
+        ch = f.read(1)
+        if not ch or not ch.isspace():
+            f.seek(0)
+            return ch
+
+
+def iter_bookmarks_file(f, on_read=None) -> Iterator[Dict[str, Any]]:
+    first = sniff(f)
+    if first == '<':
+        yield from iter_netscape_html(f, on_read)
+    elif first == '[':
+        for item in iter_json_array(f, on_read):
+            yield from walk_bookmark_tree(item)
+    else:
+        data = json.load(f)
+        if on_read:
+            on_read()
+        yield from walk_bookmark_tree(data)
+
+
+def iter_history_file(f, on_read=None) -> Iterator[Dict[str, Any]]:
+    """History rows ({'url', 'title', 'timestamp'}) from a JSON array or CSV export"""
+    first = sniff(f)
+    if first == '[':
+        for item in iter_json_array(f, on_read):
+            if not isinstance(item, dict):
+                continue
+            url = clean_url(item.get('url'))
+            if url:
+                yield {
+                    'url': url,
+                    'title': item.get('title') or '',
+                    'timestamp': (item.get('timestamp') or item.get('visit_time')
+                                  or item.get('lastVisitTime'))
+                }
+        return
+
+    reader = csv.reader(f)
+    header = [h.strip().lower() for h in next(reader, [])]
+    url_col = header.index('url') if 'url' in header else 0
+    title_col = header.index('title') if 'title' in header else 1
+    time_col = header.index('time') if 'time' in header else (header.index('date') if 'date' in header else 2)
+    for row in reader:
+        if on_read and reader.line_num % 1000 == 0:
+            on_read()
+        if len(row) <= url_col:
+            continue
+        url = clean_url(row[url_col])
+        if url:
+            yield {
+                'url': url,
+                'title': row[title_col] if len(row) > title_col else '',
+                'timestamp': row[time_col] if len(row) > time_col else None
+            }
+
+
+# ----------------------------------------------------------------------
+# Worker
+# ----------------------------------------------------------------------
+class ImportWorker(QThread):
+    """
+    Reads ``path`` on a worker thread.
+
+    Bookmark imports hand rows to the UI thread through ``batch_ready``
+    (the receiver dedupes them against the bookmark index and commits once
+    per batch). History imports go straight into the thread-safe history
+    store, one transaction per batch.
+    """
+
+    BOOKMARKS = 'bookmarks'
+    HISTORY = 'history'
+
+    progress = pyqtSignal(int, int)
+    batch_ready = pyqtSignal(list)
+    import_finished = pyqtSignal(dict)
+    import_failed = pyqtSignal(str)
+    import_cancelled = pyqtSignal()
+
+    def __init__(self, path: str, kind: str = BOOKMARKS,
+                 store: Optional[HistoryStore] = None, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.kind = kind
+        self.store = store
+        self.total = max(os.path.getsize(path), 1) if os.path.exists(path) else 1
+        self._cancelled = False
+        self._raw = None
+        self._bytes_read = 0
+        self.stats = {'rows': 0, 'added': 0, 'seconds': 0.0, 'rows_per_second': 0.0}
+
+    def cancel(self):
+        self._cancelled = True
+
+    def _on_read(self):
+        # Progress in bytes of the file (the parsers count decoded characters)
+        self._bytes_read = min(self._raw.tell(), self.total)
+        self.progress.emit(self._bytes_read, self.total)
+
+    def _flush(self, batch: List[Dict[str, Any]]):
+        if self.kind == self.HISTORY:
+            self.stats['added'] += self.store.add_visits(batch)
+        else:
+            self.batch_ready.emit(batch)
+
+    def run(self):
+        started = time.perf_counter()
+        reader = iter_history_file if self.kind == self.HISTORY else iter_bookmarks_file
+        batch: List[Dict[str, Any]] = []
+        try:
+            with open(self.path, 'rb') as self._raw, \
+                    io.TextIOWrapper(self._raw, encoding='utf-8-sig', errors='replace', newline='') as f:
+                for row in reader(f, self._on_read):
+                    if self._cancelled:
+                        break
+                    batch.append(row)
+                    self.stats['rows'] += 1
+                    if len(batch) >= BATCH_SIZE:
+                        self._flush(batch)
+                        batch = []
+            if batch and not self._cancelled:
+                self._flush(batch)
+        except Exception as e:
+            print(f"[WARNING] Import of {self.path} failed: {e}")
+            self.import_failed.emit(str(e))
+            return
+
+        elapsed = time.perf_counter() - started
+        self.stats['seconds'] = elapsed
+        self.stats['rows_per_second'] = self.stats['rows'] / elapsed if elapsed else 0.0
+        print(f"[INFO] Imported {self.stats['rows']} {self.kind} rows from {self.path} "
+              f"in {elapsed:.1f}s ({self.stats['rows_per_second']:.0f} rows/s)")
+        if self._cancelled:
+            self.import_cancelled.emit()
+        else:
+            self.import_finished.emit(dict(self.stats))
+
+
+def start_import(parent, worker: ImportWorker, label: str, cancel_text: str = "Cancel") -> ImportWorker:
+    """Show a modeless progress dialog for ``worker`` and start it"""
+    dialog = QProgressDialog(label, cancel_text, 0, worker.total, parent)
+    dialog.setWindowTitle(label)
+    dialog.setMinimumDuration(300)
+    dialog.setAutoClose(False)
+    dialog.setAutoReset(False)
+
+    worker.progress.connect(lambda done, total: dialog.setValue(done))
+    dialog.canceled.connect(worker.cancel)
+    for signal in (worker.import_finished, worker.import_failed, worker.import_cancelled):
+        signal.connect(dialog.close)
+    worker.finished.connect(worker.deleteLater)
+
+    # Keep the worker alive while it runs
+    if parent is not None:
+        running = getattr(parent, '_import_workers', set())
+        running.add(worker)
+        parent._import_workers = running
+        worker.finished.connect(lambda: running.discard(worker))
+
+    worker.start()
+    return worker
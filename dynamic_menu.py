@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+Dynamic Menu Sections
+The URL-keyed tail of a QMenu (recent history, first bookmarks). Actions are
+created when the menu is about to show and then kept in sync with single
+add/remove updates from change signals, so an idle window does no menu work
+"""
+
+from typing import Any, Callable, Dict, List, Optional
+
+from PyQt5.QtCore import QObject
+from PyQt5.QtWidgets import QAction, QMenu
+
+Entry = Dict[str, Any]
+
+
+class MenuSection(QObject):
+    """
+    Up to ``limit`` entry actions appended after the static actions of ``menu``.
+
+    ``loader(count)`` returns the first ``count`` entries in display order; it
+    only runs on ``aboutToShow`` after the section was invalidated. ``prepend``
+    / ``append`` / ``remove`` patch single actions of a populated section; a
+    section that has never been shown ignores them and loads fresh later.
+    """
+
+    def __init__(self, menu: QMenu, loader: Callable[[int], List[Entry]],
+                 make_text: Callable[[Entry], str], on_open: Callable[[str], None],
+                 limit: int, more_text: Optional[str] = None,
+                 on_more: Optional[Callable[[], None]] = None):
+        super().__init__(menu)
+        self.menu = menu
+        self.loader = loader
+        self.make_text = make_text
+        self.on_open = on_open
+        self.limit = limit
+
+        self.separator: Optional[QAction] = None
+        self.more_action: Optional[QAction] = None
+        self.more_text = more_text
+        self.on_more = on_more
+
+        self.actions: List[QAction] = []
+        self.stale = True
+        self.stats = {'populates': 0, 'incremental_updates': 0}
+
+        menu.aboutToShow.connect(self.ensure_populated)
+
+    # ------------------------------------------------------------------
+    # Population
+    # ------------------------------------------------------------------
+    def _ensure_anchors(self):
+        if self.separator is None:
+            self.separator = self.menu.addSeparator()
+            self.more_action = QAction(self.more_text or '', self.menu)
+            if self.on_more:
+                self.more_action.triggered.connect(self.on_more)
+            self.more_action.setVisible(False)
+            self.menu.addAction(self.more_action)
+
+    def _make_action(self, entry: Entry) -> QAction:
+        action = QAction(self.make_text(entry), self.menu)
+        url = entry['url']
+        action.setData(url)
+        action.triggered.connect(lambda checked=False, url=url: self.on_open(url))
+        return action
+
+    def _drop_action(self, action: QAction):
+        self.menu.removeAction(action)
+        action.deleteLater()
+
+    def _sync_chrome(self, has_more: Optional[bool] = None):
+        self.separator.setVisible(bool(self.actions))
+        if has_more is not None:
+            self.more_action.setVisible(bool(self.more_text) and has_more)
+
+    def ensure_populated(self):
+        if self.stale:
+            self.populate()
+
+    def populate(self):
+        """Recreate every entry action from ``loader``"""
+        self._ensure_anchors()
+        for action in self.actions:
+            self._drop_action(action)
+
+        entries = self.loader(self.limit + 1)
+        self.actions = [self._make_action(entry) for entry in entries[:self.limit]]
+        for action in self.actions:
+            self.menu.insertAction(self.more_action, action)
+
+        self._sync_chrome(has_more=len(entries) > self.limit)
+        self.stale = False
+        self.stats['populates'] += 1
+
+    def invalidate(self):
+        """Bulk change in the source: reload on next show (or now, if the menu is open)"""
+        self.stale = True
+        if self.menu.isVisible():
+            self.populate()
+
+    # ------------------------------------------------------------------
+    # Incremental updates
+    # ------------------------------------------------------------------
+    def _index_of(self, url: str) -> int:
+        for i, action in enumerate(self.actions):
+            if action.data() == url:
+                return i
+        return -1
+
+    def prepend(self, entry: Entry):
+        """Put ``entry`` first (moving its previous action, if any)"""
+        if self.stale:
+            return
+        index = self._index_of(entry['url'])
+        if index >= 0:
+            self._drop_action(self.actions.pop(index))
+
+        action = self._make_action(entry)
+        before = self.actions[0] if self.actions else self.more_action
+        self.menu.insertAction(before, action)
+        self.actions.insert(0, action)
+
+        trimmed = len(self.actions) > self.limit
+        if trimmed:
+            self._drop_action(self.actions.pop())
+        self._sync_chrome(has_more=True if trimmed else None)
+        self.stats['incremental_updates'] += 1
+
+    def append(self, entry: Entry):
+        """Add ``entry`` at the end if the section still has room"""
+        if self.stale or self._index_of(entry['url']) >= 0:
+            return
+        if len(self.actions) < self.limit:
+            action = self._make_action(entry)
+            self.menu.insertAction(self.more_action, action)
+            self.actions.append(action)
+            self._sync_chrome()
+        else:
+            self._sync_chrome(has_more=True)
+        self.stats['incremental_updates'] += 1
+
+    def remove(self, url: str):
+        index = -1 if self.stale else self._index_of(url)
+        if index < 0:
+            return
+        self._drop_action(self.actions.pop(index))
+        if self.more_action.isVisible():
+            # An entry past the limit moves up into the section
+            self.invalidate()
+            return
+        self._sync_chrome()
+        self.stats['incremental_updates'] += 1
+
+    def update(self, url: str, entry: Entry):
+        """Retitle the action for ``url`` in place"""
+        index = -1 if self.stale else self._index_of(url)
+        if index < 0:
+            return
+        action = self.actions[index]
+        action.setText(self.make_text(entry))
+        self.stats['incremental_updates'] += 1
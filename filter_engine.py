@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+Background Filter Engine
+Debounced search-as-you-type for list dialogs: the query runs on a
+QThreadPool worker, a newer keystroke cancels the running query, and
+results are streamed back to the UI thread in chunks (a small first chunk
+so the first screenful appears quickly). Latency and cancellation counters
+are kept for instrumentation
+"""
+
+import itertools
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+# Items in the first streamed chunk (about one screenful) and in later ones
+FIRST_CHUNK = 100
+CHUNK_SIZE = 2000
+
+
+def chunked(items: Iterable[Any], first: int = FIRST_CHUNK, size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """
+    Split ``items`` into a ``first``-sized chunk followed by ``size``-sized
+    ones. Sequences (lists, NumPy arrays) are sliced; other iterables are
+    consumed lazily, so a cancelled query stops pulling from them.
+    """
+    if hasattr(items, '__len__') and hasattr(items, '__getitem__'):
+        start, step = 0, first
+        while start < len(items):
+            yield items[start:start + step]
+            start, step = start + step, size
+        return
+
+    iterator = iter(items)
+    step = first
+    while True:
+        chunk = list(itertools.islice(iterator, step))
+        if not chunk:
+            return
+        yield chunk
+        step = size
+
+
+class _QuerySignals(QObject):
+    chunk = pyqtSignal(int, object, bool)
+    done = pyqtSignal(int, float, bool)
+    failed = pyqtSignal(int, str)
+
+
+class _QueryTask(QRunnable):
+    """One query generation; stops between chunks once it is no longer current"""
+
+    def __init__(self, engine: 'FilterEngine', generation: int, query: Any):
+        super().__init__()
+        self.engine = engine
+        self.generation = generation
+        self.query = query
+        self.signals = engine._signals
+        self.setAutoDelete(True)
+
+    def is_cancelled(self) -> bool:
+        return self.engine._generation != self.generation
+
+    def run(self):
+        started = time.perf_counter()
+        first = True
+        try:
+            for chunk in self.engine.query_func(self.query, self.is_cancelled):
+                if self.is_cancelled():
+                    self.signals.done.emit(self.generation, time.perf_counter() - started, True)
+                    return
+                self.signals.chunk.emit(self.generation, chunk, first)
+                first = False
+        except Exception as e:
+            print(f"[WARNING] Filter query failed: {e}")
+            self.signals.failed.emit(self.generation, str(e))
+            return
+        self.signals.done.emit(self.generation, time.perf_counter() - started, self.is_cancelled())
+
+
+class FilterEngine(QObject):
+    """
+    Runs ``query_func(query, is_cancelled)`` off the UI thread.
+
+    ``query_func`` is a generator yielding result chunks (see ``chunked``);
+    it should check ``is_cancelled()`` in long loops. ``set_query`` debounces
+    keystrokes, ``submit`` starts at once (for combo boxes and refreshes).
+    Only chunks of the newest query reach ``chunk_ready``: the first one has
+    ``is_first=True`` and replaces whatever the view showed before.
+    """
+
+    chunk_ready = pyqtSignal(object, bool)
+    query_finished = pyqtSignal(object)
+    query_failed = pyqtSignal(str)
+
+    def __init__(self, query_func: Callable[[Any, Callable[[], bool]], Iterable[Any]],
+                 delay_ms: int = 150, parent=None, pool: QThreadPool = None):
+        super().__init__(parent)
+        self.query_func = query_func
+        self.pool = pool or QThreadPool.globalInstance()
+
+        self._generation = 0
+        self._pending_query = None
+        self._current_query = None
+        self._started_at = 0.0
+        self._first_chunk_seen = False
+
+        self._signals = _QuerySignals()
+        self._signals.chunk.connect(self._on_chunk)
+        self._signals.done.connect(self._on_done)
+        self._signals.failed.connect(self._on_failed)
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay_ms)
+        self._timer.timeout.connect(self._fire)
+
+        self.stats = {
+            'requests': 0,
+            'debounced': 0,
+            'queries_started': 0,
+            'queries_completed': 0,
+            'queries_cancelled': 0,
+            'queries_failed': 0,
+            'stale_chunks_dropped': 0,
+            'last_first_chunk_ms': 0.0,
+            'last_total_ms': 0.0,
+            'total_query_ms': 0.0,
+            'max_total_ms': 0.0
+        }
+
+    # ------------------------------------------------------------------
+    # Requests
+    # ------------------------------------------------------------------
+    def set_query(self, query: Any):
+        """Debounced request: only the last query within ``delay_ms`` runs"""
+        self.stats['requests'] += 1
+        if self._timer.isActive():
+            self.stats['debounced'] += 1
+        self._pending_query = query
+        self._timer.start()
+
+    def submit(self, query: Any):
+        """Run ``query`` now, cancelling any pending or running one"""
+        self.stats['requests'] += 1
+        self._timer.stop()
+        self._pending_query = query
+        self._fire()
+
+    def cancel(self):
+        """Drop the pending keystroke and stop the running query"""
+        self._timer.stop()
+        self._generation += 1
+
+    def _fire(self):
+        self._generation += 1
+        self._current_query = self._pending_query
+        self._started_at = time.perf_counter()
+        self._first_chunk_seen = False
+        self.stats['queries_started'] += 1
+        self.pool.start(_QueryTask(self, self._generation, self._current_query))
+
+    # ------------------------------------------------------------------
+    # Results (UI thread)
+    # ------------------------------------------------------------------
+    def _on_chunk(self, generation: int, chunk: Any, first: bool):
+        if generation != self._generation:
+            self.stats['stale_chunks_dropped'] += 1
+            return
+        if not self._first_chunk_seen:
+            self._first_chunk_seen = True
+            self.stats['last_first_chunk_ms'] = (time.perf_counter() - self._started_at) * 1000
+        self.chunk_ready.emit(chunk, first)
+
+    def _on_done(self, generation: int, seconds: float, cancelled: bool):
+        if cancelled or generation != self._generation:
+            self.stats['queries_cancelled'] += 1
+            return
+        elapsed_ms = (time.perf_counter() - self._started_at) * 1000
+        self.stats['queries_completed'] += 1
+        self.stats['last_total_ms'] = elapsed_ms
+        self.stats['total_query_ms'] += elapsed_ms
+        self.stats['max_total_ms'] = max(self.stats['max_total_ms'], elapsed_ms)
+        if not self._first_chunk_seen:
+            # Empty result: tell the view to clear itself
+            self.chunk_ready.emit([], True)
+        self.query_finished.emit(self._current_query)
+
+    def _on_failed(self, generation: int, error: str):
+        self.stats['queries_failed'] += 1
+        if generation == self._generation:
+            self.query_failed.emit(error)
+
+    def is_busy(self) -> bool:
+        return self._timer.isActive() or (self.stats['queries_started'] > self.stats['queries_completed']
+                                           + self.stats['queries_cancelled'] + self.stats['queries_failed'])
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        completed = stats['queries_completed']
+        stats['avg_total_ms'] = stats['total_query_ms'] / completed if completed else 0.0
+        return stats
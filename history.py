@@ -3,67 +3,42 @@
 Менеджер истории браузера
 """
 
-import json
 import os
-from datetime import datetime
+
+from profile_data import get_profile_data
 
 class HistoryManager:
     def __init__(self, filename='data/history.json'):
         self.filename = filename
-        self.history = []
-        self.load_history()
+        # История хранится в SQLite (data/history.db), history.json импортируется один раз.
+        # Изменения идут через профиль, чтобы окна получали сигналы history_*
+        self.profile_data = get_profile_data(os.path.dirname(filename) or '.')
+        self.store = self.profile_data.history_store
+    
+    @property
+    def history(self):
+        """История в хронологическом порядке (одна запись на URL)"""
+        return list(reversed(self.store.get_history()))
     
     def load_history(self):
         """Загрузить историю"""
-        if os.path.exists(self.filename):
-            try:
-                with open(self.filename, 'r', encoding='utf-8') as f:
-                    self.history = json.load(f)
-            except:
-                self.history = []
-        else:
-            self.history = []
+        # Данные читаются из хранилища по запросу
+        pass
     
     def save_history(self):
         """Сохранить историю"""
-        # Сохраняем только последние 1000 записей
-        if len(self.history) > 1000:
-            self.history = self.history[-1000:]
-        
-        with open(self.filename, 'w', encoding='utf-8') as f:
-            json.dump(self.history, f, ensure_ascii=False, indent=2)
+        # Каждое посещение записывается сразу в add_to_history
+        pass
     
     def add_to_history(self, url, title):
         """Добавить в историю"""
-        history_entry = {
-            'url': url,
-            'title': title,
-            'timestamp': datetime.now().isoformat(),
-            'visit_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        }
-        
-        # Удаляем старые записи с тем же URL
-        self.history = [h for h in self.history if h['url'] != url]
-        
-        # Добавляем новую запись
-        self.history.append(history_entry)
-        self.save_history()
+        # Дубликаты URL убирает upsert в хранилище
+        self.profile_data.add_visit(url, title)
     
     def clear_history(self, days_old=None):
         """Очистить историю"""
-        if days_old:
-            cutoff_date = datetime.now().timestamp() - (days_old * 24 * 60 * 60)
-            self.history = [
-                h for h in self.history 
-                if datetime.fromisoformat(h['timestamp']).timestamp() > cutoff_date
-            ]
-        else:
-            self.history = []
-        
-        self.save_history()
+        self.profile_data.clear_history(days_old)
     
     def get_history(self):
         """Получить историю"""
-        return sorted(self.history, 
-                     key=lambda x: x['timestamp'], 
-                     reverse=True)
\ No newline at end of file
+        return self.store.get_history()
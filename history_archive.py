@@ -0,0 +1,355 @@
+# -*- coding: utf-8 -*-
+"""
+History Archive
+Time-partitioned cold storage for browsing history. Recent visits stay in
+the SQLite hot segment; whole months older than the retention window are
+rolled into immutable compressed segment files (one per month) that carry a
+small index header, so history can grow without limits while startup and
+range queries only touch the partitions they need
+"""
+
+import json
+import lzma
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+from array import array
+from bisect import bisect_left
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from history_store import HistoryStore, format_entry
+from persistence import atomic_write
+
+SEGMENT_MAGIC = b'HSEG'
+SEGMENT_VERSION = 1
+
+# magic, version, codec, reserved, visits, urls, min_time, max_time, payload size
+HEADER = struct.Struct('<4sBBHIIddI')
+
+CODEC_ZLIB = 0
+CODEC_LZMA = 1
+CODECS = {'zlib': CODEC_ZLIB, 'lzma': CODEC_LZMA}
+
+SEGMENT_NAME_RE = re.compile(r'^(\d{4})-(\d{2})\.seg$')
+
+# Months (including the current one) kept in the SQLite hot segment
+HOT_MONTHS = 3
+
+
+def month_start(year: int, month: int) -> float:
+    """Local midnight of the first day of a month as epoch seconds"""
+    while month > 12:
+        year, month = year + 1, month - 12
+    while month < 1:
+        year, month = year - 1, month + 12
+    return datetime(year, month, 1).timestamp()
+
+
+def url_hash(url: str) -> int:
+    """Stable 32-bit URL hash stored in segment headers"""
+    return zlib.crc32(url.encode('utf-8'))
+
+
+class SegmentHeader:
+    """Index header of one monthly segment (read without touching the payload)"""
+
+    __slots__ = ('path', 'year', 'month', 'codec', 'visit_count', 'url_count',
+                 'min_time', 'max_time', 'payload_size', 'url_hashes', 'offset')
+
+    def __init__(self, path, year, month, codec, visit_count, url_count,
+                 min_time, max_time, payload_size, url_hashes, offset):
+        self.path = path
+        self.year = year
+        self.month = month
+        self.codec = codec
+        self.visit_count = visit_count
+        self.url_count = url_count
+        self.min_time = min_time
+        self.max_time = max_time
+        self.payload_size = payload_size
+        self.url_hashes = url_hashes
+        self.offset = offset
+
+    def overlaps(self, start: Optional[float], end: Optional[float]) -> bool:
+        if start is not None and self.max_time < start:
+            return False
+        if end is not None and self.min_time >= end:
+            return False
+        return True
+
+    def may_contain(self, url: str) -> bool:
+        key = url_hash(url)
+        pos = bisect_left(self.url_hashes, key)
+        return pos < len(self.url_hashes) and self.url_hashes[pos] == key
+
+
+def encode_segment(visits: List[Tuple[str, str, float]], codec: int) -> bytes:
+    """Serialize (url, title, visit_time) rows sorted by time into segment bytes"""
+    url_ids: Dict[str, int] = {}
+    urls: List[str] = []
+    titles: List[str] = []
+    rows = []
+    for url, title, visit_time in visits:
+        url_id = url_ids.get(url)
+        if url_id is None:
+            url_id = url_ids[url] = len(urls)
+            urls.append(url)
+            titles.append(title or '')
+        elif title:
+            titles[url_id] = title
+        rows.append([url_id, visit_time])
+
+    payload = json.dumps({'urls': urls, 'titles': titles, 'visits': rows},
+                         ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    if codec == CODEC_LZMA:
+        payload = lzma.compress(payload, preset=6)
+    else:
+        payload = zlib.compress(payload, 9)
+
+    hashes = array('I', sorted({url_hash(url) for url in urls}))
+    header = HEADER.pack(SEGMENT_MAGIC, SEGMENT_VERSION, codec, 0, len(rows), len(hashes),
+                         visits[0][2], visits[-1][2], len(payload))
+    return header + hashes.tobytes() + payload
+
+
+class HistoryArchive:
+    """
+    Monthly compressed segments next to the SQLite hot segment.
+
+    ``rollover`` moves every complete month older than ``hot_months`` out of
+    the ``visits`` table (the per-URL ``urls`` rows stay, so search and
+    suggestions keep working). Headers are read lazily and cached; payloads
+    are only decompressed by queries whose time range overlaps the segment.
+    """
+
+    def __init__(self, store: HistoryStore, archive_dir: str,
+                 hot_months: int = HOT_MONTHS, codec: str = 'zlib'):
+        self.store = store
+        self.archive_dir = archive_dir
+        self.hot_months = hot_months
+        self.codec = CODECS.get(codec, CODEC_ZLIB)
+        self._lock = threading.RLock()
+        self._headers: Dict[str, SegmentHeader] = {}
+        self._rollover_thread: Optional[threading.Thread] = None
+
+        if not os.path.exists(archive_dir):
+            os.makedirs(archive_dir)
+
+        self.stats = {
+            'rollovers': 0,
+            'visits_archived': 0,
+            'segments_read': 0,
+            'segments_dropped': 0,
+            'segments_rewritten': 0
+        }
+
+    # ------------------------------------------------------------------
+    # Segment files
+    # ------------------------------------------------------------------
+    def _segment_path(self, year: int, month: int) -> str:
+        return os.path.join(self.archive_dir, f"{year:04d}-{month:02d}.seg")
+
+    def segment_names(self) -> List[str]:
+        """Segment file names, oldest first (directory listing only)"""
+        try:
+            names = [name for name in os.listdir(self.archive_dir) if SEGMENT_NAME_RE.match(name)]
+        except OSError:
+            return []
+        return sorted(names)
+
+    def _read_header(self, name: str) -> Optional[SegmentHeader]:
+        header = self._headers.get(name)
+        if header is not None:
+            return header
+
+        path = os.path.join(self.archive_dir, name)
+        year, month = (int(part) for part in SEGMENT_NAME_RE.match(name).groups())
+        try:
+            with open(path, 'rb') as f:
+                fixed = f.read(HEADER.size)
+                (magic, version, codec, _reserved, visit_count, url_count,
+                 min_time, max_time, payload_size) = HEADER.unpack(fixed)
+                if magic != SEGMENT_MAGIC or version != SEGMENT_VERSION:
+                    raise ValueError("unknown segment format")
+                hashes = array('I')
+                hashes.frombytes(f.read(url_count * hashes.itemsize))
+        except (OSError, struct.error, ValueError) as e:
+            print(f"[WARNING] Skipping history segment {name}: {e}")
+            return None
+
+        header = SegmentHeader(path, year, month, codec, visit_count, url_count, min_time,
+                               max_time, payload_size, hashes, HEADER.size + url_count * 4)
+        self._headers[name] = header
+        return header
+
+    def headers(self) -> List[SegmentHeader]:
+        with self._lock:
+            return [h for h in (self._read_header(name) for name in self.segment_names()) if h]
+
+    def _read_visits(self, header: SegmentHeader) -> List[Tuple[str, str, float]]:
+        self.stats['segments_read'] += 1
+        with open(header.path, 'rb') as f:
+            f.seek(header.offset)
+            payload = f.read(header.payload_size)
+        if header.codec == CODEC_LZMA:
+            payload = lzma.decompress(payload)
+        else:
+            payload = zlib.decompress(payload)
+        data = json.loads(payload)
+        urls, titles = data['urls'], data['titles']
+        return [(urls[url_id], titles[url_id], visit_time) for url_id, visit_time in data['visits']]
+
+    def _write_segment(self, year: int, month: int, visits: List[Tuple[str, str, float]]):
+        path = self._segment_path(year, month)
+        name = os.path.basename(path)
+        self._headers.pop(name, None)
+        if not visits:
+            if os.path.exists(path):
+                os.remove(path)
+                self.stats['segments_dropped'] += 1
+            return
+        visits.sort(key=lambda row: row[2])
+        atomic_write(path, encode_segment(visits, self.codec))
+
+    # ------------------------------------------------------------------
+    # Rollover
+    # ------------------------------------------------------------------
+    def hot_cutoff(self, now: Optional[float] = None) -> float:
+        """Start of the oldest month kept in the hot segment"""
+        moment = datetime.fromtimestamp(now if now is not None else time.time())
+        return month_start(moment.year, moment.month - self.hot_months + 1)
+
+    def rollover(self, now: Optional[float] = None) -> int:
+        """Move complete months older than the hot window into segments; returns visits moved"""
+        cutoff = self.hot_cutoff(now)
+        moved = 0
+        with self._lock:
+            oldest = self.store.oldest_visit_time()
+            while oldest is not None and oldest < cutoff:
+                moment = datetime.fromtimestamp(oldest)
+                start = month_start(moment.year, moment.month)
+                end = month_start(moment.year, moment.month + 1)
+
+                visits, max_id = self.store.snapshot_visits_between(start, end)
+                path = self._segment_path(moment.year, moment.month)
+                existing = self._read_header(os.path.basename(path)) if os.path.exists(path) else None
+                if existing is not None:
+                    # Late visits for an archived month (e.g. imports): segments are
+                    # immutable, so the month is rewritten as a whole. Rows already in
+                    # the segment are skipped, so a rollover interrupted between the
+                    # write and the delete below does not archive them twice
+                    archived = self._read_visits(existing)
+                    seen = {(url, visit_time) for url, _title, visit_time in archived}
+                    visits = archived + [row for row in visits if (row[0], row[2]) not in seen]
+                    self.stats['segments_rewritten'] += 1
+                self._write_segment(moment.year, moment.month, visits)
+                moved += self.store.delete_visits_between(start, end, max_id)
+                oldest = self.store.oldest_visit_time()
+
+        if moved:
+            self.stats['rollovers'] += 1
+            self.stats['visits_archived'] += moved
+            print(f"[INFO] Archived {moved} history visits older than "
+                  f"{datetime.fromtimestamp(cutoff).strftime('%Y-%m')}")
+        return moved
+
+    def start_rollover(self):
+        """Run ``rollover`` on a background thread so startup never waits for it"""
+        if self._rollover_thread and self._rollover_thread.is_alive():
+            return
+
+        def run():
+            try:
+                self.rollover()
+            except Exception as e:
+                print(f"[WARNING] History rollover failed: {e}")
+
+        self._rollover_thread = threading.Thread(target=run, name='HistoryRollover', daemon=True)
+        self._rollover_thread.start()
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def iter_visits(self, start: Optional[float] = None, end: Optional[float] = None,
+                    newest_first: bool = True) -> Iterator[Tuple[str, str, float]]:
+        """
+        (url, title, visit_time) rows in ``[start, end)`` across the hot and
+        archived partitions, decompressing only the overlapping segments
+        """
+        hot = self.store.iter_visits(start, end, newest_first=newest_first)
+        if newest_first:
+            yield from hot
+            yield from self.iter_archived(start, end, newest_first=True)
+        else:
+            yield from self.iter_archived(start, end, newest_first=False)
+            yield from hot
+
+    def iter_archived(self, start: Optional[float] = None, end: Optional[float] = None,
+                      newest_first: bool = True) -> Iterator[Tuple[str, str, float]]:
+        """Like ``iter_visits`` restricted to the archived segments"""
+        headers = [h for h in self.headers() if h.overlaps(start, end)]
+        if newest_first:
+            headers.reverse()
+
+        def in_range(visit_time):
+            return (start is None or visit_time >= start) and (end is None or visit_time < end)
+
+        for header in headers:
+            rows = self._read_visits(header)
+            if newest_first:
+                rows.reverse()
+            yield from (row for row in rows if in_range(row[2]))
+
+    def get_visits(self, start: Optional[float] = None, end: Optional[float] = None,
+                   limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Visits in ``[start, end)`` as history dicts, most recent first"""
+        result = []
+        for url, title, visit_time in self.iter_visits(start, end):
+            result.append(format_entry(url, title, visit_time))
+            if limit and len(result) >= limit:
+                break
+        return result
+
+    def archived_visit_count(self) -> int:
+        return sum(h.visit_count for h in self.headers())
+
+    # ------------------------------------------------------------------
+    # Deletes (called by HistoryStore)
+    # ------------------------------------------------------------------
+    def drop_before(self, cutoff: Optional[float] = None):
+        """Drop archived visits older than ``cutoff`` (everything when None)"""
+        with self._lock:
+            for header in self.headers():
+                if cutoff is None or header.max_time < cutoff:
+                    # Whole partition is out of range: no decompression needed
+                    self._headers.pop(os.path.basename(header.path), None)
+                    os.remove(header.path)
+                    self.stats['segments_dropped'] += 1
+                elif header.min_time < cutoff:
+                    visits = [row for row in self._read_visits(header) if row[2] >= cutoff]
+                    self._write_segment(header.year, header.month, visits)
+                    self.stats['segments_rewritten'] += 1
+
+    def delete_url(self, url: str):
+        """Remove a URL from every segment whose header says it may contain it"""
+        with self._lock:
+            for header in self.headers():
+                if not header.may_contain(url):
+                    continue
+                visits = self._read_visits(header)
+                kept = [row for row in visits if row[0] != url]
+                if len(kept) != len(visits):
+                    self._write_segment(header.year, header.month, kept)
+                    self.stats['segments_rewritten'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        headers = self.headers()
+        stats = dict(self.stats)
+        stats['segments'] = len(headers)
+        stats['archived_visits'] = sum(h.visit_count for h in headers)
+        stats['archive_bytes'] = sum(h.offset + h.payload_size for h in headers)
+        return stats
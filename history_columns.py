@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+"""
+Columnar History
+In-memory column layout of browsing history for the history views: one
+int64 timestamp column, interned domain / URL id columns and shared string
+tables. Date, domain and search filters become NumPy boolean masks and the
+per-domain statistics a single bincount
+"""
+
+from array import array
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+# Timestamp used for entries whose time cannot be parsed (sorts before everything)
+MISSING_TIME = np.iinfo(np.int64).min
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def to_seconds(moment: datetime) -> int:
+    """Naive local datetime -> the wall-clock seconds used in ``HistoryColumns.times``"""
+    return int((moment.replace(tzinfo=None) - EPOCH).total_seconds())
+
+
+def from_seconds(seconds: int) -> datetime:
+    return EPOCH + timedelta(seconds=int(seconds))
+
+
+def url_domain(url: str) -> str:
+    """Host part of an http(s) URL, '' for everything else"""
+    if url.startswith(('http://', 'https://')):
+        parts = url.split('/')
+        if len(parts) > 2:
+            return parts[2]
+    return ''
+
+
+def utc_offset(epoch: int) -> int:
+    return to_seconds(datetime.fromtimestamp(epoch)) - epoch
+
+
+def local_seconds(epochs: Sequence[float]) -> np.ndarray:
+    """
+    Epoch seconds -> local wall-clock seconds. The UTC offset is looked up
+    once per distinct day, and per hour only on days where it changes
+    """
+    seconds = np.floor(np.asarray(epochs, dtype=np.float64)).astype(np.int64)
+    if not len(seconds):
+        return seconds
+    days, inverse = np.unique(seconds // SECONDS_PER_DAY, return_inverse=True)
+    day_offsets = np.array([utc_offset(int(day) * SECONDS_PER_DAY) for day in days], dtype=np.int64)
+    offsets = day_offsets[inverse]
+
+    # A change between two days with rows happened somewhere in the earlier one
+    changing = np.append(day_offsets[1:] != day_offsets[:-1], True)
+    rows = np.flatnonzero(changing[inverse])
+    if len(rows):
+        hours, hour_inverse = np.unique(seconds[rows] // 3600, return_inverse=True)
+        hour_offsets = np.array([utc_offset(int(hour) * 3600) for hour in hours], dtype=np.int64)
+        offsets[rows] = hour_offsets[hour_inverse]
+    return seconds + offsets
+
+
+def parse_times(timestamps: Sequence[str]) -> np.ndarray:
+    """Vectorized ISO-8601 parse into wall-clock seconds (int64)"""
+    if not timestamps:
+        return np.empty(0, dtype=np.int64)
+    try:
+        return np.array([ts[:19] for ts in timestamps], dtype='datetime64[s]').astype(np.int64)
+    except (TypeError, ValueError):
+        pass
+
+    # Slow path for mixed / broken legacy values
+    times = np.full(len(timestamps), MISSING_TIME, dtype=np.int64)
+    for i, ts in enumerate(timestamps):
+        try:
+            times[i] = to_seconds(datetime.fromisoformat(ts.replace('Z', '+00:00')))
+        except (AttributeError, TypeError, ValueError):
+            continue
+    return times
+
+
+class HistoryColumns:
+    """
+    Column store over a chronological list of history visits.
+
+    Row ``i`` describes the ``i``-th oldest visit it was built from; ``entry``
+    materializes a row as a history dict when a view needs one.
+    ``times`` holds local wall-clock seconds (``to_seconds``), which keeps
+    calendar-day grouping a plain integer division.
+
+    Domain id 0 is reserved for entries without an http(s) host.
+    """
+
+    def __init__(self, times: np.ndarray, url_ids: np.ndarray, domain_ids: np.ndarray,
+                 urls: List[str], titles: List[str], url_domains: np.ndarray,
+                 domains: List[str], url_lookup: Dict[str, int], domain_lookup: Dict[str, int]):
+        self.times = times
+        self.url_ids = url_ids
+        self.domain_ids = domain_ids
+        # String tables are shared between a store and the subsets derived from it
+        self.urls = urls
+        self.titles = titles
+        self.url_domains = url_domains
+        self.domains = domains
+        self.url_lookup = url_lookup
+        self.domain_lookup = domain_lookup
+
+    @classmethod
+    def _build(cls, pairs: Iterable[Tuple[str, str]], newest_first: bool,
+               times_of) -> 'HistoryColumns':
+        """Intern (url, title) pairs into id columns; ``times_of()`` returns the time column after"""
+        urls: List[str] = []
+        titles: List[str] = []
+        url_domain_ids: List[int] = []
+        domains: List[str] = ['']
+        url_lookup: Dict[str, int] = {}
+        domain_lookup: Dict[str, int] = {'': 0}
+
+        row_url_ids = []
+        for url, title in pairs:
+            url_id = url_lookup.get(url)
+            if url_id is None:
+                url_id = url_lookup[url] = len(urls)
+                urls.append(url)
+                titles.append(title)
+                domain = url_domain(url)
+                domain_id = domain_lookup.get(domain)
+                if domain_id is None:
+                    domain_id = domain_lookup[domain] = len(domains)
+                    domains.append(domain)
+                url_domain_ids.append(domain_id)
+            elif title and not (newest_first and titles[url_id]):
+                # The newest non-empty title wins
+                titles[url_id] = title
+            row_url_ids.append(url_id)
+
+        url_ids = np.array(row_url_ids, dtype=np.int32)
+        times = times_of()
+        if newest_first:
+            # Rows are kept oldest first
+            url_ids, times = url_ids[::-1].copy(), times[::-1].copy()
+        url_domains = np.array(url_domain_ids, dtype=np.int32)
+        domain_ids = url_domains[url_ids] if len(url_ids) else np.empty(0, dtype=np.int32)
+        return cls(times, url_ids, domain_ids, urls, titles,
+                   url_domains, domains, url_lookup, domain_lookup)
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[Dict[str, Any]]) -> 'HistoryColumns':
+        """Build columns from history dicts ({'url', 'title', 'timestamp'}, oldest first)"""
+        timestamps = []
+
+        def pairs():
+            for entry in entries:
+                timestamps.append(entry.get('timestamp') or '')
+                yield entry.get('url', ''), entry.get('title', '')
+
+        return cls._build(pairs(), False, lambda: parse_times(timestamps))
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[str, str, float]],
+                  newest_first: bool = False) -> 'HistoryColumns':
+        """
+        Build columns from history store rows (url, title, epoch visit_time)
+        without creating a dict per visit; ``newest_first`` rows (the order
+        the store pages them in) are flipped to oldest first
+        """
+        epochs = array('d')
+
+        def pairs():
+            for url, title, visit_time in rows:
+                epochs.append(visit_time)
+                yield url, title or ''
+
+        return cls._build(pairs(), newest_first, lambda: local_seconds(epochs))
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def subset(self, rows: np.ndarray) -> 'HistoryColumns':
+        """Rows selected by a boolean mask or index array, sharing the string tables"""
+        return HistoryColumns(self.times[rows], self.url_ids[rows], self.domain_ids[rows],
+                              self.urls, self.titles, self.url_domains, self.domains,
+                              self.url_lookup, self.domain_lookup)
+
+    # ------------------------------------------------------------------
+    # Masks
+    # ------------------------------------------------------------------
+    def all_rows(self) -> np.ndarray:
+        return np.ones(len(self.times), dtype=bool)
+
+    def time_mask(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> np.ndarray:
+        """Rows with ``start <= time < end``"""
+        mask = self.times != MISSING_TIME
+        if start is not None:
+            mask &= self.times >= to_seconds(start)
+        if end is not None:
+            mask &= self.times < to_seconds(end)
+        return mask
+
+    def domain_mask(self, domain: str) -> np.ndarray:
+        domain_id = self.domain_lookup.get(domain)
+        if domain_id is None:
+            return np.zeros(len(self.times), dtype=bool)
+        return self.domain_ids == domain_id
+
+    def url_mask(self, urls: Iterable[str]) -> np.ndarray:
+        """Rows whose URL is in ``urls`` (e.g. the result of a full-text query)"""
+        ids = [self.url_lookup[url] for url in urls if url in self.url_lookup]
+        if not ids:
+            return np.zeros(len(self.times), dtype=bool)
+        selected = np.zeros(len(self.urls), dtype=bool)
+        selected[ids] = True
+        return selected[self.url_ids]
+
+    # ------------------------------------------------------------------
+    # Aggregates
+    # ------------------------------------------------------------------
+    def domain_counts(self, mask: Optional[np.ndarray] = None) -> List[Tuple[str, int]]:
+        """(domain, visits) pairs, most visited first; entries without a host are skipped"""
+        ids = self.domain_ids if mask is None else self.domain_ids[mask]
+        counts = np.bincount(ids, minlength=len(self.domains))
+        counts[0] = 0
+        nonzero = np.flatnonzero(counts)
+        order = nonzero[np.argsort(-counts[nonzero], kind='stable')]
+        return [(self.domains[i], int(counts[i])) for i in order]
+
+    def present_domains(self) -> List[str]:
+        """Sorted domains that occur in at least one row"""
+        present = np.zeros(len(self.domains), dtype=bool)
+        present[self.domain_ids] = True
+        present[0] = False
+        return sorted(self.domains[i] for i in np.flatnonzero(present))
+
+    def count_between(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> int:
+        return int(np.count_nonzero(self.time_mask(start, end)))
+
+    def group_by_day(self, rows: np.ndarray) -> List[Tuple[datetime, np.ndarray]]:
+        """
+        Split row indices into calendar days, newest day first; rows inside a
+        day are ordered newest first as well
+        """
+        rows = rows[self.times[rows] != MISSING_TIME]
+        if not len(rows):
+            return []
+        order = rows[np.argsort(-self.times[rows], kind='stable')]
+        days = self.times[order] // SECONDS_PER_DAY
+        starts = np.flatnonzero(np.diff(days)) + 1
+        return [(from_seconds(int(group_days[0]) * SECONDS_PER_DAY), group)
+                for group_days, group in zip(np.split(days, starts), np.split(order, starts))]
+
+    def group_by_domain(self, rows: np.ndarray, per_domain: Optional[int] = None
+                        ) -> List[Tuple[str, int, np.ndarray]]:
+        """
+        (domain, visits, newest rows) for the given row indices, most visited
+        domain first; ``per_domain`` caps the rows returned per group
+        """
+        ids = self.domain_ids[rows]
+        keep = ids != 0
+        rows, ids = rows[keep], ids[keep]
+        if not len(rows):
+            return []
+        counts = np.bincount(ids, minlength=len(self.domains))
+        order = np.lexsort((-self.times[rows], ids))
+        sorted_rows = rows[order]
+        bounds = np.concatenate(([0], np.cumsum(counts)))
+
+        result = []
+        for domain_id in np.argsort(-counts, kind='stable'):
+            count = int(counts[domain_id])
+            if not count:
+                break
+            group = sorted_rows[bounds[domain_id]:bounds[domain_id + 1]]
+            if per_domain:
+                group = group[:per_domain]
+            result.append((self.domains[domain_id], count, group))
+        return result
+
+    def entry(self, row: int) -> Dict[str, Any]:
+        """Materialize one row as a history dict"""
+        url_id = int(self.url_ids[row])
+        moment = from_seconds(self.times[row]) if self.times[row] != MISSING_TIME else EPOCH
+        return {
+            'url': self.urls[url_id],
+            'title': self.titles[url_id],
+            'timestamp': moment.isoformat(),
+            'visit_time': moment.strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+    def memory_usage(self) -> int:
+        """Approximate bytes held by the columns (string tables excluded)"""
+        return int(self.times.nbytes + self.url_ids.nbytes + self.domain_ids.nbytes
+                   + self.url_domains.nbytes)
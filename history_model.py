@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+"""
+History List Model
+Virtualized Qt model/view for the history page: the model holds the display
+order as one integer array (history rows plus group header rows) and
+materializes entries only when the view asks for a visible row. Rows are
+exposed in fetchMore pages so the first paint costs the same for 1k or 1M
+visits; the unfiltered list is paged straight out of the history store
+"""
+
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, QRect, QSize, Qt
+from PyQt5.QtGui import QColor, QFont, QFontMetrics
+from PyQt5.QtWidgets import QStyle, QStyledItemDelegate
+
+from history_columns import HistoryColumns
+from history_store import format_entry
+
+# Rows handed to the view per fetchMore
+FETCH_BATCH = 256
+
+# Custom roles (Qt.UserRole keeps the history dict, as QListWidgetItem did)
+EntryRole = Qt.UserRole
+HeaderRole = Qt.UserRole + 1
+UrlRole = Qt.UserRole + 2
+TimeRole = Qt.UserRole + 3
+
+
+def group_layout(groups: Sequence[Tuple[str, np.ndarray]]) -> Tuple[np.ndarray, List[str]]:
+    """(layout, headers) with one header row before the rows of every ``(title, rows)`` group"""
+    headers = [title for title, _rows in groups]
+    parts = []
+    for k, (_title, rows) in enumerate(groups):
+        parts.append(np.array([-(k + 1)], dtype=np.int64))
+        parts.append(np.asarray(rows, dtype=np.int64))
+    layout = np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+    return layout, headers
+
+
+class HistoryListModel(QAbstractListModel):
+    """
+    Flat list of history rows and group headers.
+
+    ``layout`` is an int64 array in display order: a value ``r >= 0`` is row
+    ``r`` of ``columns``, a value ``-(k + 1)`` is ``headers[k]``.
+    Building a layout is a NumPy operation over row indices; no Python
+    object is created per row until the view paints it.
+
+    ``set_stream`` shows store rows instead (no columns needed): every
+    fetchMore pulls the next batch from the row iterator.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.columns: Optional[HistoryColumns] = None
+        self.layout = np.empty(0, dtype=np.int64)
+        self.headers: List[str] = []
+        self.stream: Optional[Iterator[Tuple[str, str, float]]] = None
+        self.stream_rows: Optional[List[Tuple[str, str, float]]] = None
+        self.loaded = 0
+        self.stats = {'resets': 0, 'fetches': 0, 'entry_lookups': 0}
+
+    # ------------------------------------------------------------------
+    # Layouts
+    # ------------------------------------------------------------------
+    def set_layout(self, columns: HistoryColumns, layout: np.ndarray,
+                   headers: Optional[List[str]] = None):
+        self.beginResetModel()
+        self.columns = columns
+        self.layout = np.asarray(layout, dtype=np.int64)
+        self.headers = headers or []
+        self.stream = self.stream_rows = None
+        self.loaded = min(FETCH_BATCH, len(self.layout))
+        self.endResetModel()
+        self.stats['resets'] += 1
+
+    def set_stream(self, rows: Iterator[Tuple[str, str, float]]):
+        """Plain list of (url, title, visit_time) rows in display order, pulled one batch per fetchMore"""
+        self.beginResetModel()
+        self.columns = None
+        self.layout = np.empty(0, dtype=np.int64)
+        self.headers = []
+        self.stream = iter(rows)
+        self.stream_rows = self._next_batch()
+        self.loaded = len(self.stream_rows)
+        self.endResetModel()
+        self.stats['resets'] += 1
+
+    def is_streaming(self) -> bool:
+        return self.stream_rows is not None
+
+    def _next_batch(self) -> List[Tuple[str, str, float]]:
+        rows = list(islice(self.stream, FETCH_BATCH))
+        if len(rows) < FETCH_BATCH:
+            # Exhausted: canFetchMore turns false
+            self.stream = None
+        return rows
+
+    def set_rows(self, columns: HistoryColumns, rows: np.ndarray):
+        """Plain list, ``rows`` already in display order"""
+        self.set_layout(columns, rows)
+
+    def set_groups(self, columns: HistoryColumns, groups: Sequence[Tuple[str, np.ndarray]]):
+        """One header row followed by its rows for every ``(title, rows)`` group"""
+        layout, headers = group_layout(groups)
+        self.set_layout(columns, layout, headers)
+
+    def total_rows(self) -> int:
+        """Rows in the layout, including the ones not fetched by the view yet"""
+        if self.stream_rows is not None:
+            return len(self.stream_rows)
+        return len(self.layout)
+
+    def entry_count(self) -> int:
+        if self.stream_rows is not None:
+            return len(self.stream_rows)
+        return int(np.count_nonzero(self.layout >= 0))
+
+    # ------------------------------------------------------------------
+    # QAbstractListModel
+    # ------------------------------------------------------------------
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.loaded
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        if self.stream_rows is not None:
+            return self.stream is not None
+        return self.loaded < len(self.layout)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        if self.stream_rows is not None:
+            if self.stream is None:
+                return
+            first = self.loaded
+            rows = self._next_batch()
+            if rows:
+                self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+                self.stream_rows.extend(rows)
+                self.loaded = len(self.stream_rows)
+                self.endInsertRows()
+                self.stats['fetches'] += 1
+            return
+        count = min(FETCH_BATCH, len(self.layout) - self.loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self.loaded, self.loaded + count - 1)
+        self.loaded += count
+        self.endInsertRows()
+        self.stats['fetches'] += 1
+
+    def _value(self, row: int) -> int:
+        """Layout value of ``row``: a columns row (or stream row) >= 0, a header < 0"""
+        return row if self.stream_rows is not None else int(self.layout[row])
+
+    def is_header(self, index: QModelIndex) -> bool:
+        return index.isValid() and self._value(index.row()) < 0
+
+    def entry(self, index: QModelIndex) -> Optional[Dict[str, Any]]:
+        if not index.isValid() or index.row() >= self.loaded:
+            return None
+        value = self._value(index.row())
+        if value < 0:
+            return None
+        self.stats['entry_lookups'] += 1
+        if self.stream_rows is not None:
+            return format_entry(*self.stream_rows[value])
+        return self.columns.entry(value)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= self.loaded:
+            return None
+
+        value = self._value(index.row())
+        if value < 0:
+            if role in (Qt.DisplayRole, HeaderRole):
+                return self.headers[-value - 1]
+            return None
+
+        if role in (Qt.DisplayRole, EntryRole, UrlRole, TimeRole, Qt.ToolTipRole):
+            entry = self.entry(index)
+            if role == Qt.DisplayRole:
+                return entry.get('title') or 'Без названия'
+            if role in (UrlRole, Qt.ToolTipRole):
+                return entry.get('url', '')
+            if role == TimeRole:
+                return entry.get('visit_time', '')
+            return entry
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        if self._value(index.row()) < 0:
+            return Qt.ItemIsEnabled
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+
+class HistoryItemDelegate(QStyledItemDelegate):
+    """Paints time / title / URL in one row and bold group headers, without per-row widgets"""
+
+    ROW_HEIGHT = 30
+    HEADER_HEIGHT = 28
+    PADDING = 8
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.title_color = QColor('#2c3e50')
+        self.url_color = QColor('#7f8c8d')
+        self.time_color = QColor('#95a5a6')
+        self.header_background = QColor(240, 240, 240)
+
+    def sizeHint(self, option, index):
+        height = self.HEADER_HEIGHT if index.data(HeaderRole) is not None else self.ROW_HEIGHT
+        return QSize(option.rect.width(), height)
+
+    def paint(self, painter, option, index):
+        painter.save()
+        rect = option.rect
+        header = index.data(HeaderRole)
+
+        if header is not None:
+            painter.fillRect(rect, self.header_background)
+            font = QFont(option.font)
+            font.setBold(True)
+            painter.setFont(font)
+            painter.setPen(self.title_color)
+            painter.drawText(rect.adjusted(self.PADDING, 0, -self.PADDING, 0),
+                             Qt.AlignVCenter | Qt.AlignLeft, header)
+            painter.restore()
+            return
+
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(rect, option.palette.highlight())
+
+        x = rect.left() + self.PADDING
+        right = rect.right() - self.PADDING
+
+        # Time
+        small = QFont(option.font)
+        small.setPointSizeF(max(option.font.pointSizeF() - 1, 6))
+        painter.setFont(small)
+        painter.setPen(self.time_color)
+        time_text = index.data(TimeRole) or ''
+        if time_text:
+            width = QFontMetrics(small).horizontalAdvance(time_text)
+            painter.drawText(QRect(x, rect.top(), width, rect.height()),
+                             Qt.AlignVCenter | Qt.AlignLeft, time_text)
+            x += width + self.PADDING
+
+        # Title (at most 40% of the row) and URL in the rest
+        bold = QFont(option.font)
+        bold.setBold(True)
+        painter.setFont(bold)
+        painter.setPen(self.title_color)
+        title_width = max(min(QFontMetrics(bold).horizontalAdvance(index.data(Qt.DisplayRole)),
+                              int((right - x) * 0.4)), 0)
+        title = QFontMetrics(bold).elidedText(index.data(Qt.DisplayRole), Qt.ElideRight, title_width)
+        painter.drawText(QRect(x, rect.top(), title_width, rect.height()),
+                         Qt.AlignVCenter | Qt.AlignLeft, title)
+        x += title_width + self.PADDING
+
+        painter.setFont(option.font)
+        painter.setPen(self.url_color)
+        url = QFontMetrics(option.font).elidedText(index.data(UrlRole) or '', Qt.ElideMiddle,
+                                                   max(right - x, 0))
+        painter.drawText(QRect(x, rect.top(), max(right - x, 0), rect.height()),
+                         Qt.AlignVCenter | Qt.AlignLeft, url)
+        painter.restore()
@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+"""
+History Full-Text Search
+SQLite FTS5 index over history titles and URLs, kept in sync with the
+history store by triggers. Token-prefix queries are ranked with bm25 and
+visit frequency; substring and regex queries are pre-filtered through a
+trigram index before the exact match is checked in Python
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+try:
+    import re._parser as sre_parse
+    import re._constants as sre_constants
+except ImportError:  # Python < 3.11
+    import sre_parse
+    import sre_constants
+
+from history_store import HistoryStore, format_entry, get_history_store
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS urls_fts USING fts5(
+    title, url, content='urls', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+);
+CREATE TRIGGER IF NOT EXISTS urls_fts_ai AFTER INSERT ON urls BEGIN
+    INSERT INTO urls_fts(rowid, title, url) VALUES (new.id, new.title, new.url);
+END;
+CREATE TRIGGER IF NOT EXISTS urls_fts_ad AFTER DELETE ON urls BEGIN
+    INSERT INTO urls_fts(urls_fts, rowid, title, url) VALUES ('delete', old.id, old.title, old.url);
+END;
+CREATE TRIGGER IF NOT EXISTS urls_fts_au AFTER UPDATE OF title, url ON urls
+WHEN old.title IS NOT new.title OR old.url IS NOT new.url BEGIN
+    INSERT INTO urls_fts(urls_fts, rowid, title, url) VALUES ('delete', old.id, old.title, old.url);
+    INSERT INTO urls_fts(rowid, title, url) VALUES (new.id, new.title, new.url);
+END;
+"""
+
+TRIGRAM_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS urls_trigram USING fts5(
+    title, url, content='urls', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS urls_trigram_ai AFTER INSERT ON urls BEGIN
+    INSERT INTO urls_trigram(rowid, title, url) VALUES (new.id, new.title, new.url);
+END;
+CREATE TRIGGER IF NOT EXISTS urls_trigram_ad AFTER DELETE ON urls BEGIN
+    INSERT INTO urls_trigram(urls_trigram, rowid, title, url) VALUES ('delete', old.id, old.title, old.url);
+END;
+CREATE TRIGGER IF NOT EXISTS urls_trigram_au AFTER UPDATE OF title, url ON urls
+WHEN old.title IS NOT new.title OR old.url IS NOT new.url BEGIN
+    INSERT INTO urls_trigram(urls_trigram, rowid, title, url) VALUES ('delete', old.id, old.title, old.url);
+    INSERT INTO urls_trigram(rowid, title, url) VALUES (new.id, new.title, new.url);
+END;
+"""
+
+# Minimum literal length the trigram index can use
+MIN_TRIGRAM_LITERAL = 3
+
+# Upper bound of FTS hits that get bm25-ranked for a limited query
+RANK_CANDIDATES = 2000
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def fts_quote(text: str) -> str:
+    """Quote a string as an FTS5 phrase"""
+    return '"' + text.replace('"', '""') + '"'
+
+
+def extract_literals(pattern: str, flags: int = 0) -> List[str]:
+    """
+    Literal strings that every match of ``pattern`` must contain.
+
+    Only top-level sequences (and groups that must match at least once) are
+    considered; alternations, classes and optional parts break a literal run.
+    An empty result means the pattern cannot be pre-filtered.
+    """
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except (re.error, sre_constants.error):
+        return []
+
+    literals = []
+    current = []
+
+    def flush():
+        if current:
+            literals.append(''.join(current))
+            current.clear()
+
+    def walk(items):
+        for op, av in items:
+            if op is sre_constants.LITERAL:
+                current.append(chr(av))
+            elif op is sre_constants.SUBPATTERN:
+                walk(av[-1])
+            elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT):
+                low, _high, sub = av
+                flush()
+                if low >= 1:
+                    walk(sub)
+                    flush()
+            elif op is sre_constants.AT:
+                continue
+            else:
+                flush()
+
+    walk(parsed)
+    flush()
+    return [lit for lit in literals if len(lit) >= MIN_TRIGRAM_LITERAL]
+
+
+class HistorySearchIndex:
+    """
+    Ranked search over the history store.
+
+    ``search`` handles plain keystroke queries, ``search_regex`` handles the
+    regex option. Both return entries in the layout of ``HistoryStore``.
+    """
+
+    def __init__(self, store: HistoryStore):
+        self.store = store
+        self.has_trigram = False
+        self.stats = {
+            'queries': 0,
+            'regex_queries': 0,
+            'regex_candidates': 0,
+            'regex_full_scans': 0
+        }
+        self._ensure_schema()
+
+    def _ensure_schema(self):
+        created = not self.store.query(
+            "SELECT name FROM sqlite_master WHERE name = 'urls_fts'"
+        )
+        self.store.execute_script(FTS_SCHEMA)
+        if created:
+            self.store.execute_script("INSERT INTO urls_fts(urls_fts) VALUES ('rebuild');")
+
+        try:
+            created = not self.store.query(
+                "SELECT name FROM sqlite_master WHERE name = 'urls_trigram'"
+            )
+            self.store.execute_script(TRIGRAM_SCHEMA)
+            if created:
+                self.store.execute_script("INSERT INTO urls_trigram(urls_trigram) VALUES ('rebuild');")
+            self.has_trigram = True
+        except Exception as e:
+            # trigram tokenizer needs SQLite >= 3.34
+            print(f"[WARNING] Trigram history index unavailable: {e}")
+
+        self.store.create_function('regexp', 2, self._sql_regexp)
+
+    @staticmethod
+    def _sql_regexp(pattern, value):
+        if value is None:
+            return False
+        return re.search(pattern, value) is not None
+
+    def _rows_to_entries(self, rows) -> List[Dict[str, Any]]:
+        return [format_entry(url, title, ts, count) for url, title, ts, count in rows]
+
+    def search(self, text: str, limit: Optional[int] = 200,
+               case_sensitive: bool = False) -> List[Dict[str, Any]]:
+        """Token-prefix search ranked by bm25 and visit count, topped up with substring hits"""
+        self.stats['queries'] += 1
+        text = text.strip()
+        if not text:
+            return self._rows_to_entries(self.store.query(
+                "SELECT url, title, last_visit_time, visit_count FROM urls "
+                "ORDER BY last_visit_time DESC LIMIT ?", (limit or -1,)
+            ))
+
+        tokens = TOKEN_RE.findall(text)
+        results = []
+        seen = set()
+
+        if tokens:
+            match = ' AND '.join(fts_quote(token) + '*' for token in tokens)
+            # Rank only the newest candidates so common prefixes stay in budget
+            rows = self.store.query(
+                "SELECT u.url, u.title, u.last_visit_time, u.visit_count "
+                "FROM (SELECT rowid, bm25(urls_fts, 10.0, 2.0) AS score FROM urls_fts "
+                "      WHERE urls_fts MATCH ? ORDER BY rowid DESC LIMIT ?) AS hits "
+                "JOIN urls u ON u.id = hits.rowid "
+                "ORDER BY hits.score * (1.0 + 0.05 * MIN(u.visit_count, 100)), "
+                "u.last_visit_time DESC LIMIT ?",
+                (match, RANK_CANDIDATES if limit else -1, limit or -1)
+            )
+            for row in rows:
+                seen.add(row[0])
+                results.append(row)
+
+        # Plain substring semantics (e.g. "ogle" in "google") via the trigram index
+        if self.has_trigram and len(text) >= MIN_TRIGRAM_LITERAL and (not limit or len(results) < limit):
+            rows = self.store.query(
+                "SELECT u.url, u.title, u.last_visit_time, u.visit_count "
+                "FROM urls_trigram JOIN urls u ON u.id = urls_trigram.rowid "
+                "WHERE urls_trigram MATCH ? "
+                "ORDER BY u.visit_count DESC, u.last_visit_time DESC LIMIT ?",
+                (fts_quote(text), limit or -1)
+            )
+            for row in rows:
+                if row[0] not in seen:
+                    seen.add(row[0])
+                    results.append(row)
+
+        if case_sensitive:
+            results = [row for row in results if text in row[1] or text in row[0]]
+
+        if limit:
+            results = results[:limit]
+        return self._rows_to_entries(results)
+
+    def search_regex(self, pattern: str, case_sensitive: bool = False,
+                     limit: Optional[int] = 200) -> List[Dict[str, Any]]:
+        """Regex search; candidates come from the trigram index when literals can be extracted"""
+        self.stats['regex_queries'] += 1
+        flags = 0 if case_sensitive else re.IGNORECASE
+        try:
+            regex = re.compile(pattern, flags)
+        except re.error:
+            return []
+
+        literals = extract_literals(pattern, flags) if self.has_trigram else []
+        if literals:
+            match = ' AND '.join(fts_quote(lit) for lit in literals)
+            rows = self.store.query(
+                "SELECT u.url, u.title, u.last_visit_time, u.visit_count "
+                "FROM urls_trigram JOIN urls u ON u.id = urls_trigram.rowid "
+                "WHERE urls_trigram MATCH ? ORDER BY u.last_visit_time DESC",
+                (match,)
+            )
+        else:
+            self.stats['regex_full_scans'] += 1
+            rows = self.store.query(
+                "SELECT url, title, last_visit_time, visit_count FROM urls "
+                "WHERE regexp(?, title) OR regexp(?, url) "
+                "ORDER BY last_visit_time DESC",
+                (regex.pattern if case_sensitive else f"(?i){regex.pattern}",) * 2
+            )
+
+        self.stats['regex_candidates'] += len(rows)
+        results = []
+        for row in rows:
+            if regex.search(row[1]) or regex.search(row[0]):
+                results.append(row)
+                if limit and len(results) >= limit:
+                    break
+        return self._rows_to_entries(results)
+
+    def matching_urls(self, text: str, case_sensitive: bool = False, use_regex: bool = False) -> set:
+        """Set of URLs matching the query (for filtering already loaded lists)"""
+        if use_regex or case_sensitive:
+            if use_regex:
+                entries = self.search_regex(text, case_sensitive, limit=None)
+            else:
+                entries = self.search(text, limit=None, case_sensitive=True)
+            return {entry['url'] for entry in entries}
+
+        self.stats['queries'] += 1
+        text = text.strip()
+        tokens = TOKEN_RE.findall(text)
+        urls = set()
+        if tokens:
+            match = ' AND '.join(fts_quote(token) + '*' for token in tokens)
+            urls.update(row[0] for row in self.store.query(
+                "SELECT u.url FROM urls_fts JOIN urls u ON u.id = urls_fts.rowid "
+                "WHERE urls_fts MATCH ?", (match,)
+            ))
+        if self.has_trigram and len(text) >= MIN_TRIGRAM_LITERAL:
+            urls.update(row[0] for row in self.store.query(
+                "SELECT u.url FROM urls_trigram JOIN urls u ON u.id = urls_trigram.rowid "
+                "WHERE urls_trigram MATCH ?", (fts_quote(text),)
+            ))
+        return urls
+
+
+# Global history search index instance
+_history_search = None
+
+def get_history_search(data_dir: str = 'data') -> HistorySearchIndex:
+    """Get global history search index bound to the global history store"""
+    global _history_search
+    if _history_search is None:
+        _history_search = HistorySearchIndex(get_history_store(data_dir))
+    return _history_search
@@ -0,0 +1,375 @@
+# -*- coding: utf-8 -*-
+"""
+History Storage Engine
+SQLite-backed browsing history with indexed lookups, upsert-based dedupe
+and a per-visit table, so recording one visit is one small indexed write
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS urls (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL DEFAULT '',
+    visit_count INTEGER NOT NULL DEFAULT 0,
+    last_visit_time REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_urls_last_visit ON urls(last_visit_time);
+
+CREATE TABLE IF NOT EXISTS visits (
+    id INTEGER PRIMARY KEY,
+    url_id INTEGER NOT NULL REFERENCES urls(id) ON DELETE CASCADE,
+    visit_time REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_visits_time ON visits(visit_time);
+CREATE INDEX IF NOT EXISTS idx_visits_url ON visits(url_id);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+UPSERT_URL = """
+INSERT INTO urls (url, title, visit_count, last_visit_time)
+VALUES (?, ?, 1, ?)
+ON CONFLICT(url) DO UPDATE SET
+    title = CASE WHEN excluded.title != '' THEN excluded.title ELSE urls.title END,
+    visit_count = urls.visit_count + 1,
+    last_visit_time = MAX(urls.last_visit_time, excluded.last_visit_time)
+"""
+
+
+def parse_timestamp(value: Any) -> float:
+    """Convert an ISO string / epoch value from legacy history.json to epoch seconds"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str) and value:
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+        except ValueError:
+            try:
+                return datetime.strptime(value, '%Y-%m-%d %H:%M:%S').timestamp()
+            except ValueError:
+                pass
+    return time.time()
+
+
+def format_entry(url: str, title: str, visit_time: float, visit_count: int = 1) -> Dict[str, Any]:
+    """Build a history entry in the dict layout used across the browser UI"""
+    moment = datetime.fromtimestamp(visit_time)
+    return {
+        'url': url,
+        'title': title,
+        'timestamp': moment.isoformat(),
+        'visit_time': moment.strftime('%Y-%m-%d %H:%M:%S'),
+        'visit_count': visit_count
+    }
+
+
+class HistoryStore:
+    """
+    Browsing history on SQLite in WAL mode.
+
+    ``urls`` holds one row per distinct URL (dedupe via upsert on the unique
+    ``url`` index), ``visits`` holds one row per page load. All public methods
+    are safe to call from worker threads.
+
+    ``visits`` is the hot segment: when an ``archive`` is attached, old months
+    are rolled out into compressed segments and deletes are forwarded to it.
+    """
+
+    def __init__(self, db_path: str = 'data/history.db'):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+        self.archive = None
+
+        self.stats = {
+            'visits_written': 0,
+            'entries_imported': 0
+        }
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+    def add_visit(self, url: str, title: str = '', visit_time: Optional[float] = None) -> int:
+        """Record one visit; returns the url id"""
+        if visit_time is None:
+            visit_time = time.time()
+
+        with self._lock, self._conn:
+            self._conn.execute(UPSERT_URL, (url, title or '', visit_time))
+            url_id = self._conn.execute(
+                "SELECT id FROM urls WHERE url = ?", (url,)
+            ).fetchone()[0]
+            self._conn.execute(
+                "INSERT INTO visits (url_id, visit_time) VALUES (?, ?)",
+                (url_id, visit_time)
+            )
+        self.stats['visits_written'] += 1
+        return url_id
+
+    def add_visits(self, entries: Iterable[Dict[str, Any]]) -> int:
+        """Bulk-insert legacy entries ({'url', 'title', 'timestamp'}) in one transaction"""
+        count = 0
+        with self._lock, self._conn:
+            for entry in entries:
+                url = entry.get('url') if isinstance(entry, dict) else None
+                if not url:
+                    continue
+                visit_time = parse_timestamp(entry.get('timestamp') or entry.get('visit_time'))
+                self._conn.execute(UPSERT_URL, (url, entry.get('title') or '', visit_time))
+                self._conn.execute(
+                    "INSERT INTO visits (url_id, visit_time) "
+                    "SELECT id, ? FROM urls WHERE url = ?",
+                    (visit_time, url)
+                )
+                count += 1
+        return count
+
+    def delete_url(self, url: str):
+        """Remove a URL together with all of its visits"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM urls WHERE url = ?", (url,))
+        if self.archive:
+            self.archive.delete_url(url)
+
+    def clear(self, days_old: Optional[int] = None):
+        """Clear the whole history, or only visits older than ``days_old`` days"""
+        cutoff = time.time() - days_old * 24 * 60 * 60 if days_old else None
+        with self._lock, self._conn:
+            if cutoff is not None:
+                self._conn.execute("DELETE FROM visits WHERE visit_time < ?", (cutoff,))
+                # A URL last visited before the cutoff has no newer visits anywhere
+                self._conn.execute("DELETE FROM urls WHERE last_visit_time < ?", (cutoff,))
+            else:
+                self._conn.execute("DELETE FROM visits")
+                self._conn.execute("DELETE FROM urls")
+        if self.archive:
+            self.archive.drop_before(cutoff)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def get_history(self, limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
+        """One entry per URL, most recently visited first"""
+        query = ("SELECT url, title, last_visit_time, visit_count FROM urls "
+                 "ORDER BY last_visit_time DESC LIMIT ? OFFSET ?")
+        with self._lock:
+            rows = self._conn.execute(query, (limit if limit else -1, offset)).fetchall()
+        return [format_entry(url, title, ts, count) for url, title, ts, count in rows]
+
+    def get_visits(self, limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
+        """One entry per visit, most recent first; continues into the archive past the hot segment"""
+        query = ("SELECT u.url, u.title, v.visit_time, u.visit_count "
+                 "FROM visits v JOIN urls u ON u.id = v.url_id "
+                 "ORDER BY v.visit_time DESC LIMIT ? OFFSET ?")
+        with self._lock:
+            rows = self._conn.execute(query, (limit if limit else -1, offset)).fetchall()
+            hot_count = self._conn.execute("SELECT COUNT(*) FROM visits").fetchone()[0]
+        result = [format_entry(url, title, ts, count) for url, title, ts, count in rows]
+
+        if self.archive is None or (limit and len(result) >= limit):
+            return result
+        # Archived visits are all older than the hot ones
+        skip = max(offset - hot_count, 0)
+        wanted = limit - len(result) if limit else None
+        archived = islice(self.archive.iter_archived(newest_first=True), skip,
+                          skip + wanted if wanted is not None else None)
+        result.extend(format_entry(url, title, ts) for url, title, ts in archived)
+        return result
+
+    def visits_between(self, start: Optional[float] = None, end: Optional[float] = None,
+                       newest_first: bool = False) -> List[tuple]:
+        """(url, title, visit_time) rows of the hot segment with ``start <= visit_time < end``"""
+        query = ("SELECT u.url, u.title, v.visit_time FROM visits v JOIN urls u ON u.id = v.url_id "
+                 "WHERE v.visit_time >= ? AND v.visit_time < ? ORDER BY v.visit_time "
+                 + ("DESC" if newest_first else "ASC"))
+        with self._lock:
+            return self._conn.execute(query, (
+                start if start is not None else float('-inf'),
+                end if end is not None else float('inf')
+            )).fetchall()
+
+    def iter_visits(self, start: Optional[float] = None, end: Optional[float] = None,
+                    newest_first: bool = False, batch_size: int = 5000) -> Iterator[tuple]:
+        """
+        Like ``visits_between`` but paged (keyset on visit_time, id), so
+        callers can walk millions of rows without holding them in memory
+        or the store lock between pages
+        """
+        op, order = ('<', 'DESC') if newest_first else ('>', 'ASC')
+        # The bare "visit_time <= / >= ?" term gives SQLite an index range to seek to
+        query = ("SELECT u.url, u.title, v.visit_time, v.id FROM visits v JOIN urls u ON u.id = v.url_id "
+                 "WHERE v.visit_time >= ? AND v.visit_time < ? "
+                 f"AND v.visit_time {op}= ? AND (v.visit_time {op} ? OR v.id {op} ?) "
+                 f"ORDER BY v.visit_time {order}, v.id {order} LIMIT ?")
+        low = start if start is not None else float('-inf')
+        high = end if end is not None else float('inf')
+        last_time, last_id = (float('inf') if newest_first else float('-inf')), 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    query, (low, high, last_time, last_time, last_id, batch_size)
+                ).fetchall()
+            for url, title, visit_time, _visit_id in rows:
+                yield url, title, visit_time
+            if len(rows) < batch_size:
+                return
+            last_time, last_id = rows[-1][2], rows[-1][3]
+
+    def oldest_visit_time(self) -> Optional[float]:
+        with self._lock:
+            return self._conn.execute("SELECT MIN(visit_time) FROM visits").fetchone()[0]
+
+    def snapshot_visits_between(self, start: float, end: float) -> Tuple[List[tuple], int]:
+        """``visits_between(start, end)`` plus the highest visit id at the time of the read"""
+        with self._lock:
+            rows = self.visits_between(start, end)
+            max_id = self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM visits").fetchone()[0]
+        return rows, max_id
+
+    def delete_visits_between(self, start: float, end: float, max_id: Optional[int] = None) -> int:
+        """
+        Drop hot visits in ``[start, end)`` (after they were archived); urls rows
+        stay. With ``max_id`` visits recorded after the archived snapshot are kept
+        """
+        query = "DELETE FROM visits WHERE visit_time >= ? AND visit_time < ?"
+        params: tuple = (start, end)
+        if max_id is not None:
+            query += " AND id <= ?"
+            params += (max_id,)
+        with self._lock, self._conn:
+            return self._conn.execute(query, params).rowcount
+
+    def get_entry(self, url: str) -> Optional[Dict[str, Any]]:
+        """Lookup a single URL via the unique index"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, title, last_visit_time, visit_count FROM urls WHERE url = ?",
+                (url,)
+            ).fetchone()
+        return format_entry(*row) if row else None
+
+    def count(self) -> int:
+        """Number of distinct URLs"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+
+    def visit_count(self) -> int:
+        """Number of recorded visits"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM visits").fetchone()[0]
+
+    # ------------------------------------------------------------------
+    # Meta / import
+    # ------------------------------------------------------------------
+    def get_meta(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key: str, value: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+            )
+
+    def import_json(self, json_path: str) -> int:
+        """
+        One-time import of a legacy history.json file.
+
+        The file is renamed to ``<name>.imported`` afterwards so that it is
+        neither imported twice nor read by stale code paths.
+        """
+        meta_key = f"imported:{os.path.abspath(json_path)}"
+        if not os.path.exists(json_path) or self.get_meta(meta_key):
+            return 0
+
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[WARNING] History import failed for {json_path}: {e}")
+            return 0
+
+        if not isinstance(entries, list):
+            entries = []
+
+        imported = self.add_visits(entries)
+        self.set_meta(meta_key, datetime.now().isoformat())
+        self.stats['entries_imported'] += imported
+
+        try:
+            os.replace(json_path, json_path + '.imported')
+        except OSError:
+            pass
+
+        print(f"[INFO] Imported {imported} history entries from {json_path}")
+        return imported
+
+    # ------------------------------------------------------------------
+    # Extension hooks (used by the search index and other history views)
+    # ------------------------------------------------------------------
+    def query(self, sql: str, params: tuple = ()) -> List[tuple]:
+        """Run a read query under the store lock"""
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def execute_script(self, sql: str):
+        """Run DDL / maintenance statements in one transaction"""
+        with self._lock, self._conn:
+            self._conn.executescript(sql)
+
+    def create_function(self, name: str, num_params: int, func):
+        with self._lock:
+            self._conn.create_function(name, num_params, func)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# Global history store instance
+_history_store = None
+
+def get_history_store(data_dir: str = 'data') -> HistoryStore:
+    """Get global history store; the legacy history.json import runs as a profile migration"""
+    global _history_store
+    if _history_store is None:
+        from history_archive import HistoryArchive
+        from profile_migrations import get_profile_migrator
+
+        _history_store = HistoryStore(os.path.join(data_dir, 'history.db'))
+        get_profile_migrator(data_dir).migrate('history', _history_store)
+        _history_store.archive = HistoryArchive(
+            _history_store, os.path.join(data_dir, 'history_archive')
+        )
+        _history_store.archive.start_rollover()
+    return _history_store
+
+def cleanup_history_store():
+    """Close global history store"""
+    global _history_store
+    if _history_store:
+        _history_store.close()
+        _history_store = None
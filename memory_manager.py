@@ -265,26 +265,42 @@ class MemoryPool:
     Generic memory pool for specific object types
     """
     
-    def __init__(self, obj_class, max_size: int = 100, factory_args=None, factory_kwargs=None):
+    def __init__(self, obj_class, max_size: int = 100, factory_args=None, factory_kwargs=None,
+                 factory=None):
         self.obj_class = obj_class
         self.max_size = max_size
         self.factory_args = factory_args or []
         self.factory_kwargs = factory_kwargs or {}
+        # Optional callable used instead of obj_class to build new objects
+        self.factory = factory or obj_class
         self.pool = deque(maxlen=max_size)
         self.active_objects = weakref.WeakSet()
+        self.stats = {'hits': 0, 'misses': 0}
         
     def acquire(self, *args, **kwargs) -> Any:
         """Acquire object from pool"""
         if self.pool:
             obj = self.pool.popleft()
+            self.stats['hits'] += 1
             if hasattr(obj, 'reset'):
                 obj.reset(*args, **kwargs)
         else:
-            obj = self.obj_class(*self.factory_args, **self.factory_kwargs)
+            obj = self.factory(*self.factory_args, **self.factory_kwargs)
+            self.stats['misses'] += 1
         
         self.active_objects.add(obj)
         return obj
     
+    def put(self, obj: Any) -> bool:
+        """Add a freshly prepared object (never acquired) to the pool"""
+        if len(self.pool) >= self.max_size:
+            return False
+        self.pool.append(obj)
+        return True
+    
+    def available(self) -> int:
+        return len(self.pool)
+    
     def release(self, obj: Any):
         """Release object back to pool"""
         if obj in self.active_objects:
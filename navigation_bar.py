@@ -10,6 +10,8 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import pyqtSignal, Qt, QUrl
 from PyQt5.QtGui import QIcon
 
+from suggestions import SuggestionCompleter, get_suggestion_engine
+
 class NavigationBar(QWidget):
     url_changed = pyqtSignal(QUrl)
     search_requested = pyqtSignal(str)
@@ -42,6 +44,10 @@ class NavigationBar(QWidget):
         self.url_bar = QLineEdit()
         self.url_bar.setPlaceholderText("Введите URL или поисковый запрос")
         
+        # Подсказки по истории и закладкам (frecency)
+        self.completer = SuggestionCompleter(self.url_bar, get_suggestion_engine())
+        self.completer.activated[str].connect(self.on_suggestion_activated)
+        
         # Кнопка перехода
         self.go_btn = QPushButton("Перейти")
         self.go_btn.setFixedSize(80, 30)
@@ -79,6 +85,11 @@ class NavigationBar(QWidget):
         if text:
             self.search_requested.emit(text)
     
+    def on_suggestion_activated(self, url):
+        """Переход по выбранной подсказке"""
+        self.url_bar.setText(url)
+        self.search_requested.emit(url)
+    
     def on_back_clicked(self):
         """Назад"""
         self.url_changed.emit(QUrl())
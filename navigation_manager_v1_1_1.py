@@ -8,7 +8,6 @@ Enhanced navigation with history, bookmarks, and search features
 
 import sys
 import os
-import json
 import datetime
 import re
 from pathlib import Path
@@ -16,6 +15,12 @@ from PyQt5.QtWidgets import *
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 
+from data_export import ExportWorker, start_export
+from filter_engine import FilterEngine, chunked
+from history_search import get_history_search
+from session_store import capture_tab
+from suggestions import get_suggestion_engine
+
 class NavigationManagerV1_1_1:
     """Enhanced navigation manager with full v1.1.1 features"""
     
@@ -33,6 +38,12 @@ class NavigationManagerV1_1_1:
         self.search_history = []
         self.current_search_query = ""
         
+        # History dialog filter (worker thread, debounced); created with the dialog
+        self.history_filter = None
+        
+        # Snapshots of tabs closed from the tab history dialog, oldest first
+        self.closed_tabs = []
+        
         print(f"[NAV] Navigation Manager v{self.version} initialized")
     
     def create_navigation_widget(self):
@@ -248,46 +259,8 @@ class NavigationManagerV1_1_1:
             self.current_search_query = text
     
     def get_search_suggestions(self, query):
-        """Get search suggestions based on query"""
-        suggestions = []
-        
-        # Bookmark suggestions
-        for bookmark in self.bookmarks:
-            if query.lower() in bookmark.get('title', '').lower():
-                suggestions.append({
-                    'type': 'bookmark',
-                    'title': bookmark['title'],
-                    'url': bookmark['url'],
-                    'icon': '📁'
-                })
-            elif query.lower() in bookmark.get('url', '').lower():
-                suggestions.append({
-                    'type': 'bookmark',
-                    'title': bookmark['title'],
-                    'url': bookmark['url'],
-                    'icon': '📁'
-                })
-        
-        # History suggestions
-        for item in self.navigation_history[:20]:  # Last 20 items
-            if query.lower() in item.get('title', '').lower():
-                suggestions.append({
-                    'type': 'history',
-                    'title': item['title'],
-                    'url': item['url'],
-                    'icon': '🕐',
-                    'timestamp': item.get('timestamp', '')
-                })
-            elif query.lower() in item.get('url', '').lower():
-                suggestions.append({
-                    'type': 'history',
-                    'title': item['title'],
-                    'url': item['url'],
-                    'icon': '🕐',
-                    'timestamp': item.get('timestamp', '')
-                })
-        
-        return suggestions
+        """Get search suggestions based on query (frecency-ranked, top 10)"""
+        return get_suggestion_engine().suggest(query, limit=10)
     
     def perform_search(self):
         """Perform comprehensive search"""
@@ -405,38 +378,20 @@ class NavigationManagerV1_1_1:
         return results
     
     def search_history_query(self, query, case_sensitive=False, use_regex=False):
-        """Search navigation history"""
-        results = []
-        
-        for item in self.navigation_history:
-            title = item.get('title', '')
-            url = item.get('url', '')
-            timestamp = item.get('timestamp', '')
-            
-            match = False
-            
-            if use_regex:
-                try:
-                    pattern = re.compile(query, 0 if case_sensitive else re.IGNORECASE)
-                    match = bool(pattern.search(title) or pattern.search(url))
-                except re.error:
-                    match = False
-            else:
-                if case_sensitive:
-                    match = query in title or query in url
-                else:
-                    match = query.lower() in title.lower() or query.lower() in url.lower()
-            
-            if match:
-                results.append({
-                    'type': 'history',
-                    'title': title,
-                    'url': url,
-                    'timestamp': timestamp,
-                    'icon': '🕐'
-                })
-        
-        return results
+        """Search browsing history through the full-text index"""
+        index = get_history_search()
+        if use_regex:
+            entries = index.search_regex(query, case_sensitive)
+        else:
+            entries = index.search(query, case_sensitive=case_sensitive)
+        
+        return [{
+            'type': 'history',
+            'title': item.get('title', ''),
+            'url': item.get('url', ''),
+            'timestamp': item.get('timestamp', ''),
+            'icon': '🕐'
+        } for item in entries]
     
     def display_search_results(self, results):
         """Display search results"""
@@ -568,6 +523,8 @@ class NavigationManagerV1_1_1:
         # History list
         self.history_list = QListWidget()
         self.history_list.setAlternatingRowColors(True)
+        self.history_filter = FilterEngine(self.run_history_query, parent=self.history_list)
+        self.history_filter.chunk_ready.connect(self.add_history_chunk)
         self.populate_history_list()
         
         layout.addWidget(self.history_list)
@@ -580,7 +537,7 @@ class NavigationManagerV1_1_1:
         clear_history_btn.setStyleSheet("background-color: #f44336; color: white;")
         
         export_history_btn = QPushButton("Export History")
-        export_history_btn.clicked.connect(self.export_navigation_history)
+        export_history_btn.clicked.connect(lambda: self.export_navigation_history(dialog))
         
         close_btn = QPushButton("Close")
         close_btn.clicked.connect(dialog.accept)
@@ -640,7 +597,7 @@ class NavigationManagerV1_1_1:
         button_layout = QHBoxLayout()
         
         close_current_btn = QPushButton("Close Current")
-        close_current_btn.clicked.connect(lambda: current_window.tab_widget.removeTab(current_window.tab_widget.currentIndex()))
+        close_current_btn.clicked.connect(lambda: self.close_tab(current_window, current_window.tab_widget.currentIndex()))
         
         close_others_btn = QPushButton("Close Others")
         close_others_btn.clicked.connect(lambda: self.close_other_tabs(current_window))
@@ -660,43 +617,85 @@ class NavigationManagerV1_1_1:
         current_window.tab_widget.setCurrentWidget(tab['widget'])
         print(f"[NAV] Switched to tab {tab['index']+1}: {tab['title']}")
     
+    def close_tab(self, current_window, index):
+        """Close a tab, keeping a snapshot for restore_all_closed_tabs"""
+        tab_widget = current_window.tab_widget
+        snapshot = capture_tab(tab_widget, index)
+        if snapshot is not None:
+            self.closed_tabs.append(snapshot)
+        widget = tab_widget.widget(index)
+        tab_widget.removeTab(index)
+        if widget is not None:
+            widget.deleteLater()
+    
     def close_other_tabs(self, current_window):
         """Close all tabs except current"""
         current_index = current_window.tab_widget.currentIndex()
         
         while current_window.tab_widget.count() > current_index + 1:
-            current_window.tab_widget.removeTab(current_index + 1)
+            self.close_tab(current_window, current_index + 1)
     
     def restore_all_closed_tabs(self, current_window, tabs):
         """Restore all closed tabs"""
-        # In a real implementation, would reopen closed tabs
-        print(f"[NAV] Restoring {len(tabs)} closed tabs")
+        if not self.closed_tabs:
+            print("[NAV] No closed tabs to restore")
+            return
+        
+        closed, self.closed_tabs = self.closed_tabs, []
+        restorer = getattr(current_window, 'session_restorer', None)
+        if restorer:
+            # Reopened as placeholders: only the last closed tab loads at once
+            restorer.restore([(snapshot, 0.0) for snapshot in closed], active=len(closed) - 1,
+                             replace_blank=False)
+        else:
+            for snapshot in closed:
+                current_window.add_new_tab(snapshot.url)
+        print(f"[NAV] Restored {len(closed)} closed tabs")
     
     def filter_history(self, text):
         """Filter history based on search text"""
-        self.populate_history_list(text)
+        self.history_filter.set_query((text, tuple(self.navigation_history)))
     
     def populate_history_list(self, filter_text=""):
         """Populate history list with optional filter"""
-        self.history_list.clear()
+        if self.history_filter is None:
+            return
+        self.history_filter.submit((filter_text, tuple(self.navigation_history)))
+    
+    def run_history_query(self, query, is_cancelled):
+        """History filter query (worker thread): yields chunks of (text, item, recent)"""
+        filter_text, history = query
+        filter_text = filter_text.lower()
+        
+        def matches():
+            for item in reversed(history):
+                title = item.get('title', 'No title')
+                url = item.get('url', '')
+                timestamp = item.get('timestamp', '')
+                
+                if filter_text and filter_text not in title.lower() and filter_text not in url.lower():
+                    continue
+                
+                # Format: Title - URL - Date
+                date_str = timestamp[:10] if timestamp else "Unknown"
+                yield f"{title}\n{url}\nVisited: {date_str}", item, self.is_recent_history_item(item)
         
-        for item in reversed(self.navigation_history):
-            title = item.get('title', 'No title')
-            url = item.get('url', '')
-            timestamp = item.get('timestamp', '')
-            
-            if filter_text and filter_text.lower() not in title.lower() and filter_text.lower() not in url.lower():
-                continue
-            
-            # Format: Title - URL - Date
-            date_str = timestamp[:10] if timestamp else "Unknown"
-            item_text = f"{title}\n{url}\nVisited: {date_str}"
-            
+        for chunk in chunked(matches()):
+            if is_cancelled():
+                return
+            yield chunk
+    
+    def add_history_chunk(self, chunk, first):
+        """Add a chunk of filter results to the history list"""
+        if first:
+            self.history_list.clear()
+        
+        for item_text, item, recent in chunk:
             list_item = QListWidgetItem(item_text)
             list_item.setData(Qt.UserRole, item)
             
             # Set color based on recency
-            if self.is_recent_history_item(item):
+            if recent:
                 list_item.setBackground(QColor("#e8f5e8"))
             
             self.history_list.addItem(list_item)
@@ -729,23 +728,27 @@ class NavigationManagerV1_1_1:
             QMessageBox.information(self, "History Cleared", "Navigation history has been cleared.")
             print("[NAV] Navigation history cleared")
     
-    def export_navigation_history(self):
-        """Export navigation history"""
+    def export_navigation_history(self, parent=None):
+        """Export navigation history; ``parent`` is the widget that owns the progress dialog"""
+        # The manager itself is not a QWidget: fall back to the current browser window
+        parent = parent or self.get_current_browser_window()
         if not self.navigation_history:
-            QMessageBox.information(self, "Export History", "No history to export.")
+            QMessageBox.information(parent, "Export History", "No history to export.")
             return
         
         timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"navigation_history_v1.1.1_{timestamp}.json"
         
-        try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(self.navigation_history, f, indent=2, ensure_ascii=False)
-            
-            QMessageBox.information(self, "History Exported", f"History exported to:\n{filename}")
-            print(f"[NAV] History exported to: {filename}")
-        except Exception as e:
-            QMessageBox.warning(self, "Export Error", f"Failed to export history:\n{e}")
+        # Snapshot the list; rows are streamed to disk on a worker thread
+        history = list(self.navigation_history)
+        worker = ExportWorker(lambda: iter(history), filename, total=len(history))
+        worker.export_finished.connect(
+            lambda count, path: QMessageBox.information(parent, "History Exported", f"History exported to:\n{path}"))
+        worker.export_finished.connect(
+            lambda count, path: print(f"[NAV] History exported to: {path}"))
+        worker.export_failed.connect(
+            lambda error: QMessageBox.warning(parent, "Export Error", f"Failed to export history:\n{error}"))
+        start_export(parent, worker, "Exporting history...")
     
     def navigate_to_url(self, url, title=None):
         """Navigate to URL and add to history"""
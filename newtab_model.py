@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+New Tab Data Model
+Top sites (frecency), recent pages and pinned bookmarks for the new-tab
+page, kept precomputed in memory and patched from the profile change
+signals; tile thumbnails come from the shared thumbnail cache. Opening a
+new tab reads only this model; the history store is scanned once in the
+background (and again only after bulk history changes)
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtGui import QPixmap
+
+from profile_data import ProfileDataService, get_profile_data
+from suggestions import frecency
+from thumbnail_cache import ThumbnailCache
+from thumbnail_service import get_thumbnail_service
+
+TOP_SITES = 8
+RECENT_PAGES = 5
+PINNED_BOOKMARKS = 8
+
+
+def site_entry(url: str, title: str, visit_count: int, last_visit: float) -> Dict[str, Any]:
+    """Tile data with the display strings formatted once"""
+    return {
+        'url': url,
+        'title': title or url,
+        'visit_count': visit_count,
+        'last_visit': last_visit,
+        'visit_time': datetime.fromtimestamp(last_visit).strftime('%Y-%m-%d %H:%M:%S') if last_visit else ''
+    }
+
+
+class NewTabModel(QObject):
+    """
+    Precomputed new-tab content.
+
+    The relative frecency order of two URLs does not change while time
+    passes (every score decays by the same factor), so the top sites only
+    change when a URL is visited: ``on_visit`` re-ranks the few entries
+    held. Deletions and clears reload from the store on a worker thread;
+    visits arriving meanwhile are replayed on the fresh lists.
+    """
+
+    changed = pyqtSignal()
+    _history_loaded = pyqtSignal(int, object, object)
+
+    def __init__(self, profile_data: ProfileDataService, thumbnails: ThumbnailCache,
+                 top_count: int = TOP_SITES, recent_count: int = RECENT_PAGES,
+                 pinned_count: int = PINNED_BOOKMARKS):
+        super().__init__()
+        self.profile_data = profile_data
+        self.thumbnails = thumbnails
+        self.top_count = top_count
+        self.recent_count = recent_count
+        self.pinned_count = pinned_count
+
+        self.top_sites: List[Dict[str, Any]] = []
+        self.recent: List[Dict[str, Any]] = []
+        self.pinned: List[Dict[str, Any]] = []
+        self.loaded = False
+
+        self._generation = 0
+        self._loading = False
+        self._replay: List[Dict[str, Any]] = []
+
+        self.stats = {
+            'history_loads': 0,
+            'last_load_ms': 0.0,
+            'incremental_updates': 0
+        }
+
+        # Ranked inside SQLite, so the scan never materializes the urls table
+        profile_data.history_store.create_function('frecency', 3, frecency)
+        self._history_loaded.connect(self._on_history_loaded)
+        profile_data.history_visit_added.connect(self.on_visit)
+        profile_data.history_changed.connect(self.reload_history)
+        profile_data.bookmarks_changed.connect(self.update_bookmarks)
+        thumbnails.stored.connect(self.on_thumbnail_stored)
+
+        self.update_bookmarks()
+        self.reload_history()
+
+    # ------------------------------------------------------------------
+    # History
+    # ------------------------------------------------------------------
+    def reload_history(self):
+        """Rebuild top sites and recent pages from the store on a worker thread"""
+        self._generation += 1
+        self._loading = True
+        self._replay = []
+        thread = threading.Thread(target=self._load_history, args=(self._generation,), daemon=True)
+        thread.start()
+
+    def _load_history(self, generation: int):
+        started = time.perf_counter()
+        store = self.profile_data.history_store
+        top = [site_entry(*row) for row in store.query(
+            "SELECT url, title, visit_count, last_visit_time FROM urls "
+            "ORDER BY frecency(visit_count, last_visit_time, ?) DESC LIMIT ?",
+            (time.time(), self.top_count))]
+        recent = [site_entry(*row) for row in store.query(
+            "SELECT url, title, visit_count, last_visit_time FROM urls "
+            "ORDER BY last_visit_time DESC LIMIT ?", (self.recent_count,))]
+        self.stats['last_load_ms'] = (time.perf_counter() - started) * 1000
+        self._history_loaded.emit(generation, top, recent)
+
+    def _on_history_loaded(self, generation: int, top: List[Dict[str, Any]], recent: List[Dict[str, Any]]):
+        if generation != self._generation:
+            return
+        self.top_sites = top
+        self.recent = recent
+        self.loaded = True
+        self._loading = False
+        self.stats['history_loads'] += 1
+        replay, self._replay = self._replay, []
+        for entry in replay:
+            self._apply_visit(entry)
+        self.changed.emit()
+
+    def on_visit(self, entry: Dict[str, Any]):
+        if self._loading:
+            self._replay.append(entry)
+        if not self.loaded:
+            return
+        self._apply_visit(entry)
+        self.stats['incremental_updates'] += 1
+        self.changed.emit()
+
+    def _apply_visit(self, entry: Dict[str, Any]):
+        url = entry['url']
+        now = time.time()
+        site = site_entry(url, entry.get('title', ''), entry.get('visit_count', 1), now)
+
+        self.top_sites = [s for s in self.top_sites if s['url'] != url] + [site]
+        self.top_sites.sort(key=lambda s: frecency(s['visit_count'], s['last_visit'], now), reverse=True)
+        del self.top_sites[self.top_count:]
+
+        self.recent = [site] + [s for s in self.recent if s['url'] != url]
+        del self.recent[self.recent_count:]
+
+    # ------------------------------------------------------------------
+    # Bookmarks
+    # ------------------------------------------------------------------
+    def update_bookmarks(self):
+        """Pinned bookmarks, or the first ones if none is pinned"""
+        bookmarks = self.profile_data.bookmark_list()
+        pinned = [b for b in bookmarks if b.get('pinned')]
+        self.pinned = list((pinned or bookmarks)[:self.pinned_count])
+        self.changed.emit()
+
+    # ------------------------------------------------------------------
+    # Thumbnails
+    # ------------------------------------------------------------------
+    def thumbnail(self, url: str) -> Optional[QPixmap]:
+        return self.thumbnails.get(url)
+
+    def on_thumbnail_stored(self, url: str):
+        if any(s['url'] == url for s in self.top_sites) or any(b.get('url') == url for b in self.pinned):
+            self.changed.emit()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'top_sites': tuple(self.top_sites),
+            'recent': tuple(self.recent),
+            'pinned': tuple(self.pinned)
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats['thumbnails'] = self.thumbnails.get_stats()
+        return stats
+
+
+# Global new tab model instance
+_newtab_model = None
+
+def get_newtab_model(data_dir: str = 'data') -> NewTabModel:
+    """Get global new tab model; the first call starts loading it in the background"""
+    global _newtab_model
+    if _newtab_model is None:
+        thumbnails = get_thumbnail_service(data_dir).cache
+        _newtab_model = NewTabModel(get_profile_data(data_dir), thumbnails)
+    return _newtab_model
+
+def cleanup_newtab_model():
+    """Drop global new tab model"""
+    global _newtab_model
+    _newtab_model = None
@@ -3,7 +3,6 @@
 Enhanced Bookmarks Page with folder organization and search
 """
 
-import json
 import os
 import webbrowser
 from datetime import datetime
@@ -11,6 +10,14 @@ from PyQt5.QtWidgets import *
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 
+from profile_data import get_profile_data
+from bookmarks_model import (BookmarkFilterProxy, BookmarkItemDelegate, BookmarkListModel,
+                             NO_FOLDER, SORT_DATE, SORT_TITLE, SORT_URL, filter_rows)
+from filter_engine import FilterEngine, chunked
+
+# Ключи сортировки для пунктов списка
+SORT_KEYS = {'По дате': SORT_DATE, 'По названию': SORT_TITLE, 'По URL': SORT_URL}
+
 class BookmarksPage(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -21,36 +28,29 @@ class BookmarksPage(QDialog):
         
         # Data
         self.bookmarks_file = 'data/bookmarks.json'
+        self.profile_data = get_profile_data(os.path.dirname(self.bookmarks_file))
         self.bookmarks = self.load_bookmarks()
-        self.filtered_bookmarks = self.bookmarks.copy()
         
         # Folders
         self.folders = set()
         self.current_folder = "Все закладки"
         self.extract_folders()
         
+        # Search/folder/sort queries run on a worker and stream rows back in chunks
+        self.filter_engine = FilterEngine(self.run_filter_query, parent=self)
+        self.filter_engine.chunk_ready.connect(self.on_filter_results)
+        
         self.init_ui()
         self.setStyleSheet(self.get_style())
     
     def load_bookmarks(self):
-        """Load bookmarks from file"""
-        if os.path.exists(self.bookmarks_file):
-            try:
-                with open(self.bookmarks_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                return []
-        return []
+        """Load bookmarks from the shared profile data"""
+        return list(self.profile_data.bookmark_list())
     
     def save_bookmarks(self):
-        """Save bookmarks to file"""
-        os.makedirs(os.path.dirname(self.bookmarks_file), exist_ok=True)
-        with open(self.bookmarks_file, 'w', encoding='utf-8') as f:
-            json.dump(self.bookmarks, f, ensure_ascii=False, indent=2)
-        
-        # Notify parent to refresh
-        if self.parent and hasattr(self.parent, 'bookmarks_manager'):
-            self.parent.bookmarks_manager.load_bookmarks()
+        """Save bookmarks (written behind; listeners get bookmarks_changed)"""
+        # The edits below already updated the shared URL index
+        self.profile_data.set_bookmark_list(self.bookmarks, reindex=False)
     
     def extract_folders(self):
         """Extract folders from bookmarks"""
@@ -169,10 +169,18 @@ class BookmarksPage(QDialog):
         widget = QWidget()
         layout = QVBoxLayout()
         
-        # Bookmarks list
-        self.bookmarks_list = QListWidget()
+        # Bookmarks list (one delegate paints all rows; the proxy filters and sorts)
+        self.bookmarks_model = BookmarkListModel(self)
+        self.bookmarks_model.set_bookmarks(self.bookmarks)
+        self.bookmarks_proxy = BookmarkFilterProxy(self)
+        self.bookmarks_proxy.setSourceModel(self.bookmarks_model)
+        
+        self.bookmarks_list = QListView()
+        self.bookmarks_list.setModel(self.bookmarks_proxy)
+        self.bookmarks_list.setItemDelegate(BookmarkItemDelegate(self.bookmarks_list))
+        self.bookmarks_list.setUniformItemSizes(True)
         self.bookmarks_list.setSelectionMode(QAbstractItemView.ExtendedSelection)
-        self.bookmarks_list.itemDoubleClicked.connect(self.open_bookmark)
+        self.bookmarks_list.doubleClicked.connect(self.open_bookmark)
         
         # Add context menu
         self.bookmarks_list.setContextMenuPolicy(Qt.CustomContextMenu)
@@ -192,31 +200,8 @@ class BookmarksPage(QDialog):
     
     def filter_bookmarks(self):
         """Filter bookmarks based on search"""
-        search_text = self.search_input.text().lower()
-        
-        if not search_text:
-            self.filtered_bookmarks = self.get_folder_bookmarks(self.current_folder)
-        else:
-            folder_bookmarks = self.get_folder_bookmarks(self.current_folder)
-            self.filtered_bookmarks = [
-                b for b in folder_bookmarks
-                if search_text in b.get('title', '').lower() or 
-                   search_text in b.get('url', '').lower()
-            ]
-        
-        self.update_bookmarks_display()
-        self.update_status()
-    
-    def get_folder_bookmarks(self, folder):
-        """Get bookmarks from specific folder"""
-        if folder == "Все закладки":
-            return self.bookmarks
-        
-        return [
-            b for b in self.bookmarks
-            if folder == "Без папки" and not b.get('folder') or
-               b.get('folder') == folder
-        ]
+        self.bookmarks_proxy.set_search_text(self.search_input.text(), apply=False)
+        self.filter_engine.set_query(self.bookmarks_proxy.snapshot())
     
     def on_folder_selected(self):
         """Handle folder selection"""
@@ -226,88 +211,39 @@ class BookmarksPage(QDialog):
             if folder_data == "all":
                 self.current_folder = "Все закладки"
             else:
-                self.current_folder = folder_data if folder_data else "Без папки"
+                self.current_folder = folder_data if folder_data else NO_FOLDER
             
-            self.filtered_bookmarks = self.get_folder_bookmarks(self.current_folder)
-            
-            # Apply search filter if active
-            if self.search_input.text():
-                self.filter_bookmarks()
-            else:
-                self.update_bookmarks_display()
-            
-            self.update_status()
+            self.bookmarks_proxy.set_folder(
+                None if self.current_folder == "Все закладки" else self.current_folder,
+                apply=False
+            )
+            self.filter_engine.submit(self.bookmarks_proxy.snapshot())
     
     def sort_bookmarks(self, sort_type):
         """Sort bookmarks"""
-        if sort_type == 'По дате':
-            self.filtered_bookmarks.sort(
-                key=lambda x: x.get('date_added', ''), reverse=True
-            )
-        elif sort_type == 'По названию':
-            self.filtered_bookmarks.sort(
-                key=lambda x: x.get('title', '').lower()
-            )
-        elif sort_type == 'По URL':
-            self.filtered_bookmarks.sort(
-                key=lambda x: x.get('url', '').lower()
-            )
-        
-        self.update_bookmarks_display()
+        self.bookmarks_proxy.set_sort_key(SORT_KEYS.get(sort_type), apply=False)
+        self.filter_engine.submit(self.bookmarks_proxy.snapshot())
+    
+    def run_filter_query(self, query, is_cancelled):
+        """Filter query (worker thread): visible rows in chunks"""
+        rows = filter_rows(*query)
+        if not is_cancelled():
+            yield from chunked(rows)
+    
+    def on_filter_results(self, rows, first):
+        """Show a chunk of the newest filter result"""
+        if first:
+            self.bookmarks_proxy.set_order(rows)
+        else:
+            self.bookmarks_proxy.append_order(rows)
+        self.update_status()
     
     def update_bookmarks_display(self):
         """Update bookmarks list display"""
-        self.bookmarks_list.clear()
-        
-        for bookmark in self.filtered_bookmarks:
-            item = self.create_bookmark_item(bookmark)
-            self.bookmarks_list.addItem(item)
-    
-    def create_bookmark_item(self, bookmark):
-        """Create a bookmark list item"""
-        item = QListWidgetItem()
-        item.setData(Qt.UserRole, bookmark)
-        
-        # Create custom widget
-        widget = QWidget()
-        layout = QHBoxLayout()
-        
-        # Title
-        title = QLabel(bookmark.get('title', 'Без названия'))
-        title.setStyleSheet("font-weight: bold; color: #2c3e50;")
-        title.setMaximumWidth(300)
-        title.setWordWrap(True)
-        
-        # URL
-        url = QLabel(bookmark['url'])
-        url.setStyleSheet("color: #7f8c8d; font-size: 12px;")
-        url.setMaximumWidth(400)
-        
-        # Folder
-        if bookmark.get('folder'):
-            folder = QLabel(f"📁 {bookmark['folder']}")
-            folder.setStyleSheet("color: #3498db; font-size: 11px;")
-            layout.addWidget(folder)
-        
-        # Date
-        date_str = bookmark.get('date_added', '')
-        if date_str:
-            try:
-                date_obj = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-                date_label = QLabel(date_obj.strftime('%d.%m.%Y'))
-                date_label.setStyleSheet("color: #95a5a6; font-size: 11px;")
-                layout.addWidget(date_label)
-            except:
-                pass
-        
-        layout.addWidget(title)
-        layout.addWidget(url)
-        layout.addStretch()
-        
-        widget.setLayout(layout)
-        item.setSizeHint(widget.sizeHint())
-        
-        return item
+        # Strings for painting are prepared once here, not per repaint.
+        # A running query still refers to the old rows, so it is dropped
+        self.filter_engine.cancel()
+        self.bookmarks_model.set_bookmarks(self.bookmarks)
     
     def add_bookmark(self):
         """Add new bookmark"""
@@ -323,6 +259,9 @@ class BookmarksPage(QDialog):
             if bookmark_data.get('folder'):
                 bookmark['folder'] = bookmark_data['folder']
             
+            if not self.profile_data.bookmark_index().add(bookmark):
+                QMessageBox.information(self, "Закладки", "Эта страница уже есть в закладках")
+                return
             self.bookmarks.append(bookmark)
             self.save_bookmarks()
             self.extract_folders()
@@ -330,7 +269,7 @@ class BookmarksPage(QDialog):
     
     def delete_selected(self):
         """Delete selected bookmarks"""
-        selected_items = self.bookmarks_list.selectedItems()
+        selected_items = self.bookmarks_list.selectionModel().selectedIndexes()
         if not selected_items:
             QMessageBox.warning(self, "Предупреждение", "Выберите закладки для удаления")
             return
@@ -348,13 +287,16 @@ class BookmarksPage(QDialog):
                 urls_to_delete.append(bookmark['url'])
             
             self.bookmarks = [b for b in self.bookmarks if b['url'] not in urls_to_delete]
+            index = self.profile_data.bookmark_index()
+            for url in urls_to_delete:
+                index.remove(url)
             self.save_bookmarks()
             self.extract_folders()
             self.refresh_all()
     
-    def open_bookmark(self, item):
+    def open_bookmark(self, index):
         """Open bookmark in browser"""
-        bookmark = item.data(Qt.UserRole)
+        bookmark = index.data(Qt.UserRole)
         if self.parent:
             self.parent.add_new_tab(bookmark['url'])
         else:
@@ -362,16 +304,16 @@ class BookmarksPage(QDialog):
     
     def show_context_menu(self, position):
         """Show context menu for bookmark"""
-        item = self.bookmarks_list.itemAt(position)
-        if not item:
+        index = self.bookmarks_list.indexAt(position)
+        if not index.isValid():
             return
         
-        bookmark = item.data(Qt.UserRole)
+        bookmark = index.data(Qt.UserRole)
         
         menu = QMenu(self)
         
         open_action = menu.addAction("🔗 Открыть")
-        open_action.triggered.connect(lambda: self.open_bookmark(item))
+        open_action.triggered.connect(lambda: self.open_bookmark(index))
         
         edit_action = menu.addAction("✏️ Изменить")
         edit_action.triggered.connect(lambda: self.edit_bookmark(bookmark))
@@ -388,6 +330,7 @@ class BookmarksPage(QDialog):
             bookmark_data = dialog.get_bookmark_data()
             
             # Update bookmark
+            old_url = bookmark['url']
             bookmark['url'] = bookmark_data['url']
             bookmark['title'] = bookmark_data['title']
             
@@ -396,6 +339,7 @@ class BookmarksPage(QDialog):
             elif 'folder' in bookmark:
                 del bookmark['folder']
             
+            self.profile_data.bookmark_index().update(old_url, bookmark)
             self.save_bookmarks()
             self.extract_folders()
             self.refresh_all()
@@ -410,17 +354,14 @@ class BookmarksPage(QDialog):
         
         if reply == QMessageBox.Yes:
             self.bookmarks = [b for b in self.bookmarks if b['url'] != bookmark['url']]
+            self.profile_data.bookmark_index().remove(bookmark['url'])
             self.save_bookmarks()
             self.extract_folders()
             self.refresh_all()
     
     def refresh_all(self):
         """Refresh all displays"""
-        self.filtered_bookmarks = self.get_folder_bookmarks(self.current_folder)
-        if self.search_input.text():
-            self.filter_bookmarks()
-        else:
-            self.update_bookmarks_display()
+        self.update_bookmarks_display()
         self.update_status()
         self.refresh_folder_tree()
     
@@ -449,7 +390,7 @@ class BookmarksPage(QDialog):
     def update_status(self):
         """Update status bar"""
         self.status_label.setText(
-            f"Показано: {len(self.filtered_bookmarks)} | Всего: {len(self.bookmarks)}"
+            f"Показано: {self.bookmarks_proxy.rowCount()} | Всего: {len(self.bookmarks)}"
         )
     
     def get_style(self):
@@ -462,7 +403,7 @@ class BookmarksPage(QDialog):
                 border: 1px solid #ddd;
                 border-radius: 4px;
             }
-            QListWidget {
+            QListView {
                 border: 1px solid #ddd;
                 border-radius: 4px;
             }
@@ -3,14 +3,26 @@
 Enhanced History Page with filtering and search capabilities
 """
 
-import json
 import os
+import threading
 import webbrowser
 from datetime import datetime, timedelta
+import numpy as np
 from PyQt5.QtWidgets import *
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 
+from profile_data import get_profile_data
+from history_search import get_history_search
+from history_columns import HistoryColumns
+from history_model import HistoryItemDelegate, HistoryListModel, group_layout
+from filter_engine import FilterEngine
+from data_export import (ExportWorker, HISTORY_COLUMNS, format_for_path,
+                         history_total, iter_history, start_export)
+
+# Поля текстового экспорта
+TEXT_COLUMNS = [('url', 'URL'), ('title', 'Название'), ('visit_time', 'Дата')]
+
 class HistoryPage(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -21,26 +33,43 @@ class HistoryPage(QDialog):
         
         # Data
         self.history_file = 'data/history.json'
-        self.history = self.load_history()
-        self.filtered_history = self.history.copy()
+        self.profile_data = get_profile_data(os.path.dirname(self.history_file))
+        # Columns for filters and statistics (no dict per visit); built on the
+        # filter worker after the first page of the list is on screen
+        self.columns = None
+        self.columns_version = 0
+        self._columns_lock = threading.Lock()
+        self._loaded_columns = None
+        self.filtered_rows = None
         
         # Filters
         self.search_text = ""
         self.date_filter = "Все время"
         self.domain_filter = "Все домены"
         
+        # Filtering runs on a worker; keystrokes are debounced, stale queries dropped
+        self.filter_engine = FilterEngine(self.run_filter_query, parent=self)
+        self.filter_engine.chunk_ready.connect(self.on_filter_results)
+        
         self.init_ui()
         self.setStyleSheet(self.get_style())
     
     def load_history(self):
-        """Load history from file"""
-        if os.path.exists(self.history_file):
-            try:
-                with open(self.history_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                return []
-        return []
+        """Columns built straight from the history store rows"""
+        return HistoryColumns.from_rows(self.profile_data.iter_history_rows(), newest_first=True)
+    
+    def load_columns(self, version):
+        """Columns of the given version, read from the store at most once (filter worker)"""
+        with self._columns_lock:
+            if self._loaded_columns is None or self._loaded_columns[0] != version:
+                self._loaded_columns = (version, self.load_history())
+            return self._loaded_columns[1]
+    
+    def history_total(self):
+        """Number of visits, without building the columns"""
+        if self.columns is not None:
+            return len(self.columns)
+        return history_total(self.profile_data.history_store)
     
     def init_ui(self):
         """Initialize the user interface"""
@@ -181,10 +210,13 @@ class HistoryPage(QDialog):
         widget = QWidget()
         layout = QVBoxLayout()
         
-        # History list
-        self.history_list = QListWidget()
+        # History list (virtualized: the view only asks for visible rows)
+        self.history_model = HistoryListModel(self)
+        self.history_list = QListView()
+        self.history_list.setModel(self.history_model)
+        self.history_list.setItemDelegate(HistoryItemDelegate(self.history_list))
         self.history_list.setSelectionMode(QAbstractItemView.ExtendedSelection)
-        self.history_list.itemDoubleClicked.connect(self.open_history_item)
+        self.history_list.doubleClicked.connect(self.open_history_item)
         
         # Add context menu
         self.history_list.setContextMenuPolicy(Qt.CustomContextMenu)
@@ -198,59 +230,33 @@ class HistoryPage(QDialog):
     def create_status_bar(self):
         """Create status bar"""
         status_bar = QStatusBar()
-        self.status_label = QLabel(f"Всего записей: {len(self.history)}")
+        self.status_label = QLabel(f"Всего записей: {self.history_total()}")
         status_bar.addWidget(self.status_label)
         return status_bar
     
     def extract_domains(self):
         """Extract unique domains from history"""
-        domains = set()
-        for item in self.history:
-            try:
-                url = item.get('url', '')
-                if url.startswith(('http://', 'https://')):
-                    domain = url.split('/')[2]
-                    domains.add(domain)
-            except:
-                pass
-        return sorted(list(domains))
+        return self.columns.present_domains() if self.columns is not None else []
     
     def update_statistics(self):
         """Update statistics display"""
-        total = len(self.history)
+        total = self.history_total()
+        if self.columns is None:
+            self.stats_label.setText(f"Всего посещений: {total}\nЗагрузка статистики...")
+            return
         
         # Count today's visits
-        today = datetime.now().date()
-        today_visits = 0
-        
-        # Count unique domains
-        domains = set()
-        
-        # Most visited domain
-        domain_counts = {}
-        
-        for item in self.history:
-            try:
-                date_str = item.get('timestamp', '')
-                if date_str:
-                    date_obj = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-                    if date_obj.date() == today:
-                        today_visits += 1
-                
-                url = item.get('url', '')
-                if url.startswith(('http://', 'https://')):
-                    domain = url.split('/')[2]
-                    domains.add(domain)
-                    domain_counts[domain] = domain_counts.get(domain, 0) + 1
-            except:
-                pass
-        
-        most_visited = max(domain_counts.items(), key=lambda x: x[1])[0] if domain_counts else "Нет данных"
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        today_visits = self.columns.count_between(today, today + timedelta(days=1))
+        
+        # Visits per domain (one bincount over the domain id column)
+        domain_counts = self.columns.domain_counts()
+        most_visited = domain_counts[0][0] if domain_counts else "Нет данных"
         
         stats_text = f"""
 Всего посещений: {total}
 Сегодня: {today_visits}
-Уникальных доменов: {len(domains)}
+Уникальных доменов: {len(domain_counts)}
 Популярный домен: {most_visited}
         """.strip()
         
@@ -259,7 +265,7 @@ class HistoryPage(QDialog):
     def on_search_changed(self, text):
         """Handle search text change"""
         self.search_text = text.lower()
-        self.apply_filters()
+        self.filter_engine.set_query(self.filter_state())
     
     def on_date_filter_changed(self, filter_type):
         """Handle date filter change"""
@@ -271,201 +277,136 @@ class HistoryPage(QDialog):
         self.domain_filter = domain
         self.apply_filters()
     
+    def filter_state(self):
+        """Snapshot of everything a filter query depends on"""
+        return (self.columns, self.columns_version, self.search_text, self.date_filter,
+                self.domain_filter, self.view_combo.currentText())
+    
+    def is_unfiltered(self):
+        """Plain list of all visits: shown straight from the store"""
+        return (not self.search_text and self.date_filter == "Все время"
+                and self.domain_filter == "Все домены" and self.view_combo.currentText() == "Список")
+    
     def apply_filters(self):
         """Apply all filters"""
-        filtered = self.history.copy()
-        
-        # Apply search filter
-        if self.search_text:
-            filtered = [
-                item for item in filtered
-                if self.search_text in item.get('title', '').lower() or 
-                   self.search_text in item.get('url', '').lower()
-            ]
+        self.filter_engine.submit(self.filter_state())
+    
+    def show_store_rows(self):
+        """Page the unfiltered list out of the store (newest first)"""
+        self.history_model.set_stream(self.profile_data.iter_history_rows())
+    
+    def run_filter_query(self, state, is_cancelled):
+        """Filter query (worker thread): yields (columns, rows, layout, headers)"""
+        columns, version, search_text, date_filter, domain_filter, view = state
+        if columns is None:
+            columns = self.load_columns(version)
+            if is_cancelled():
+                return
+        mask = columns.all_rows()
+        
+        # Apply search filter (full-text index instead of lowercasing every entry)
+        if search_text:
+            matching = get_history_search().matching_urls(search_text)
+            if is_cancelled():
+                return
+            mask &= columns.url_mask(matching)
         
         # Apply date filter
-        if self.date_filter != "Все время":
-            filtered = self.apply_date_filter(filtered)
+        if date_filter != "Все время":
+            mask &= self.apply_date_filter(columns, date_filter)
         
         # Apply domain filter
-        if self.domain_filter != "Все домены":
-            filtered = [
-                item for item in filtered
-                if item.get('url', '').find(self.domain_filter) != -1
-            ]
+        if domain_filter != "Все домены":
+            mask &= columns.domain_mask(domain_filter)
         
-        self.filtered_history = filtered
-        self.update_history_display()
+        rows = np.flatnonzero(mask)
+        if is_cancelled():
+            return
+        
+        # Group by date if detailed view
+        if view == "Детально":
+            layout, headers = self.display_detailed_view(columns, rows)
+        elif view == "По доменам":
+            layout, headers = self.display_domain_view(columns, rows)
+        else:
+            layout, headers = self.display_list_view(columns, rows)
+        yield columns, rows, layout, headers
+    
+    def on_filter_results(self, result, first):
+        """Show the result of the newest filter query"""
+        if not result:
+            return
+        columns, self.filtered_rows, layout, headers = result
+        if self.columns is None:
+            self.on_columns_loaded(columns)
+        if not (self.is_unfiltered() and self.history_model.is_streaming()):
+            self.history_model.set_layout(self.columns, layout, headers)
         self.update_status()
     
-    def apply_date_filter(self, items):
-        """Apply date filter to items"""
+    def on_columns_loaded(self, columns):
+        """Columns arrived from the worker: fill the domain filter and statistics"""
+        self.columns = columns
+        with self._columns_lock:
+            self._loaded_columns = None
+        self.domain_combo.blockSignals(True)
+        self.domain_combo.addItems(self.extract_domains())
+        self.domain_combo.blockSignals(False)
+        self.update_statistics()
+    
+    def apply_date_filter(self, columns=None, date_filter=None):
+        """Mask of history rows inside the selected date range"""
+        columns = columns if columns is not None else self.columns
+        date_filter = date_filter or self.date_filter
         now = datetime.now()
+        max_time = None
         
-        if self.date_filter == "Сегодня":
+        if date_filter == "Сегодня":
             cutoff = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        elif self.date_filter == "Вчера":
+        elif date_filter == "Вчера":
             cutoff = (now - timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
             max_time = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        elif self.date_filter == "Последние 7 дней":
+        elif date_filter == "Последние 7 дней":
             cutoff = now - timedelta(days=7)
-        elif self.date_filter == "Последние 30 дней":
+        elif date_filter == "Последние 30 дней":
             cutoff = now - timedelta(days=30)
-        elif self.date_filter == "Этот месяц":
+        elif date_filter == "Этот месяц":
             cutoff = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        elif self.date_filter == "Прошлый месяц":
+        elif date_filter == "Прошлый месяц":
             if now.month == 1:
                 cutoff = now.replace(year=now.year-1, month=12, day=1, hour=0, minute=0, second=0, microsecond=0)
-                max_time = now.replace(year=now.year-1, month=12, day=31, hour=23, minute=59, second=59)
+                max_time = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
             else:
                 cutoff = now.replace(month=now.month-1, day=1, hour=0, minute=0, second=0, microsecond=0)
                 max_time = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
         else:
-            return items
-        
-        filtered = []
-        for item in items:
-            try:
-                date_str = item.get('timestamp', '')
-                if date_str:
-                    date_obj = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-                    
-                    if self.date_filter == "Вчера":
-                        if cutoff <= date_obj < max_time:
-                            filtered.append(item)
-                    else:
-                        if date_obj >= cutoff:
-                            filtered.append(item)
-            except:
-                pass
-        
-        return filtered
+            return columns.all_rows()
+        
+        return columns.time_mask(cutoff, max_time)
     
     def update_history_display(self):
         """Update history list display"""
-        self.history_list.clear()
-        
-        # Group by date if detailed view
-        if self.view_combo.currentText() == "Детально":
-            self.display_detailed_view()
-        elif self.view_combo.currentText() == "По доменам":
-            self.display_domain_view()
-        else:
-            self.display_list_view()
-    
-    def display_list_view(self):
-        """Display simple list view"""
-        for item in reversed(self.filtered_history):  # Most recent first
-            list_item = self.create_history_list_item(item)
-            self.history_list.addItem(list_item)
-    
-    def display_detailed_view(self):
-        """Display detailed view grouped by date"""
-        # Group items by date
-        grouped = {}
-        for item in self.filtered_history:
-            try:
-                date_str = item.get('timestamp', '')
-                if date_str:
-                    date_obj = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-                    date_key = date_obj.strftime('%d.%m.%Y')
-                    
-                    if date_key not in grouped:
-                        grouped[date_key] = []
-                    grouped[date_key].append(item)
-            except:
-                continue
-        
-        # Display grouped items
-        for date in sorted(grouped.keys(), reverse=True):
-            # Add date header
-            header_item = QListWidgetItem(f"📅 {date}")
-            header_item.setBackground(QColor(240, 240, 240))
-            font = header_item.font()
-            font.setBold(True)
-            header_item.setFont(font)
-            self.history_list.addItem(header_item)
-            
-            # Add items for this date
-            for item in sorted(grouped[date], 
-                             key=lambda x: x.get('timestamp', ''), reverse=True):
-                list_item = self.create_history_list_item(item)
-                list_item.setData(Qt.UserRole, item)
-                self.history_list.addItem(list_item)
-    
-    def display_domain_view(self):
-        """Display view grouped by domain"""
-        # Group items by domain
-        grouped = {}
-        for item in self.filtered_history:
-            try:
-                url = item.get('url', '')
-                if url.startswith(('http://', 'https://')):
-                    domain = url.split('/')[2]
-                    
-                    if domain not in grouped:
-                        grouped[domain] = []
-                    grouped[domain].append(item)
-            except:
-                continue
-        
-        # Display grouped items
-        for domain in sorted(grouped.keys(), 
-                            key=lambda d: len(grouped[d]), reverse=True):
-            # Add domain header with count
-            header_item = QListWidgetItem(f"🌐 {domain} ({len(grouped[domain])})")
-            header_item.setBackground(QColor(240, 240, 240))
-            font = header_item.font()
-            font.setBold(True)
-            header_item.setFont(font)
-            self.history_list.addItem(header_item)
-            
-            # Add recent items for this domain
-            recent_items = sorted(grouped[domain], 
-                                key=lambda x: x.get('timestamp', ''), reverse=True)[:5]
-            for item in recent_items:
-                list_item = self.create_history_list_item(item)
-                self.history_list.addItem(list_item)
-    
-    def create_history_list_item(self, history_item):
-        """Create a history list item"""
-        item = QListWidgetItem()
-        item.setData(Qt.UserRole, history_item)
-        
-        # Create custom widget
-        widget = QWidget()
-        layout = QHBoxLayout()
-        
-        # Title
-        title = QLabel(history_item.get('title', 'Без названия'))
-        title.setStyleSheet("font-weight: bold; color: #2c3e50;")
-        title.setMaximumWidth(400)
-        title.setWordWrap(True)
-        
-        # URL
-        url = QLabel(history_item['url'])
-        url.setStyleSheet("color: #7f8c8d; font-size: 12px;")
-        url.setMaximumWidth(500)
-        
-        # Time
-        time_str = history_item.get('visit_time', '')
-        if time_str:
-            time_label = QLabel(time_str)
-            time_label.setStyleSheet("color: #95a5a6; font-size: 11px;")
-            layout.addWidget(time_label)
-        
-        layout.addWidget(title)
-        layout.addWidget(url)
-        layout.addStretch()
-        
-        widget.setLayout(layout)
-        item.setSizeHint(widget.sizeHint())
-        
-        return item
+        self.apply_filters()
+    
+    def display_list_view(self, columns, rows):
+        """Layout for the simple list view"""
+        # Most recent first
+        return rows[::-1], []
     
-    def open_history_item(self, item):
+    def display_detailed_view(self, columns, rows):
+        """Layout for the detailed view grouped by date"""
+        # Group rows by calendar day (newest first) on the timestamp column
+        return group_layout([(f"📅 {day.strftime('%d.%m.%Y')}", day_rows)
+                             for day, day_rows in columns.group_by_day(rows)])
+    
+    def display_domain_view(self, columns, rows):
+        """Layout for the view grouped by domain"""
+        # Group rows by domain id, most visited domain first, 5 newest rows each
+        return group_layout([(f"🌐 {domain} ({count})", domain_rows)
+                             for domain, count, domain_rows in columns.group_by_domain(rows, per_domain=5)])
+    
+    def open_history_item(self, index):
         """Open history item in browser"""
-        history_item = item.data(Qt.UserRole)
+        history_item = index.data(Qt.UserRole)
         if history_item:
             if self.parent:
                 self.parent.add_new_tab(history_item['url'])
@@ -474,18 +415,18 @@ class HistoryPage(QDialog):
     
     def show_context_menu(self, position):
         """Show context menu for history item"""
-        item = self.history_list.itemAt(position)
-        if not item:
+        index = self.history_list.indexAt(position)
+        if not index.isValid():
             return
         
-        history_item = item.data(Qt.UserRole)
+        history_item = index.data(Qt.UserRole)
         if not history_item:
             return
         
         menu = QMenu(self)
         
         open_action = menu.addAction("🔗 Открыть")
-        open_action.triggered.connect(lambda: self.open_history_item(item))
+        open_action.triggered.connect(lambda: self.open_history_item(index))
         
         open_new_tab = menu.addAction("📑 Открыть в новой вкладке")
         open_new_tab.triggered.connect(lambda: self.open_in_new_tab(history_item['url']))
@@ -522,14 +463,15 @@ class HistoryPage(QDialog):
         )
         
         if reply == QMessageBox.Yes:
-            self.history = [
-                h for h in self.history 
-                if h.get('timestamp') != history_item.get('timestamp') or 
-                   h.get('url') != history_item.get('url')
-            ]
+            self.profile_data.delete_history_url(history_item['url'])
+            if self.columns is not None:
+                keep = ~self.columns.url_mask([history_item.get('url')])
+                self.columns = self.columns.subset(keep)
+            else:
+                # Columns still loading: read them again without the URL
+                self.columns_version += 1
             self.save_history()
-            self.apply_filters()
-            self.update_statistics()
+            self.refresh_display()
     
     def clear_history(self):
         """Clear all history"""
@@ -540,61 +482,33 @@ class HistoryPage(QDialog):
         )
         
         if reply == QMessageBox.Yes:
-            self.history = []
+            self.profile_data.clear_history()
+            self.columns = HistoryColumns.from_rows([])
             self.save_history()
-            self.apply_filters()
-            self.update_statistics()
+            self.refresh_display()
     
     def export_history(self):
-        """Export history to file"""
+        """Export history to file (streamed from the store on a worker thread)"""
         filename, _ = QFileDialog.getSaveFileName(
             self, "Экспорт истории", 
             f"history_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-            "JSON files (*.json);;CSV files (*.csv);;Text files (*.txt)"
+            "JSON files (*.json);;CSV files (*.csv);;Text files (*.txt);;"
+            "Сжатые файлы (*.json.gz *.csv.gz *.txt.gz)"
         )
         
         if filename:
-            if filename.endswith('.json'):
-                self.export_json(filename)
-            elif filename.endswith('.csv'):
-                self.export_csv(filename)
-            else:
-                self.export_text(filename)
-            
-            QMessageBox.information(self, "Экспорт завершен", f"История экспортирована в {filename}")
-    
-    def export_json(self, filename):
-        """Export history as JSON"""
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(self.history, f, ensure_ascii=False, indent=2)
-    
-    def export_csv(self, filename):
-        """Export history as CSV"""
-        import csv
-        
-        with open(filename, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(['URL', 'Title', 'Date', 'Time'])
-            
-            for item in self.history:
-                writer.writerow([
-                    item.get('url', ''),
-                    item.get('title', ''),
-                    item.get('visit_time', ''),
-                    item.get('timestamp', '')
-                ])
-    
-    def export_text(self, filename):
-        """Export history as text"""
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write("История браузера\n")
-            f.write("=" * 50 + "\n\n")
-            
-            for item in reversed(self.history):
-                f.write(f"URL: {item.get('url', '')}\n")
-                f.write(f"Название: {item.get('title', '')}\n")
-                f.write(f"Дата: {item.get('visit_time', '')}\n")
-                f.write("-" * 30 + "\n\n")
+            store = self.profile_data.history_store
+            fmt, _compress = format_for_path(filename, default='txt')
+            columns = TEXT_COLUMNS if fmt == 'txt' else HISTORY_COLUMNS
+            worker = ExportWorker(lambda: iter_history(store), filename, fmt=fmt,
+                                  columns=columns, title="История браузера",
+                                  total=history_total(store))
+            worker.export_finished.connect(
+                lambda count, path: QMessageBox.information(
+                    self, "Экспорт завершен", f"История экспортирована в {path} ({count} записей)"))
+            worker.export_failed.connect(
+                lambda error: QMessageBox.warning(self, "Ошибка экспорта", error))
+            start_export(self, worker, "Экспорт истории...", "Отмена")
     
     def change_view(self, view_type):
         """Change view type"""
@@ -608,19 +522,12 @@ class HistoryPage(QDialog):
     
     def show_most_visited(self):
         """Show most visited sites"""
-        # Count visits by domain
-        domain_counts = {}
-        for item in self.history:
-            try:
-                url = item.get('url', '')
-                if url.startswith(('http://', 'https://')):
-                    domain = url.split('/')[2]
-                    domain_counts[domain] = domain_counts.get(domain, 0) + 1
-            except:
-                pass
-        
-        # Sort by visit count
-        sorted_domains = sorted(domain_counts.items(), key=lambda x: x[1], reverse=True)
+        if self.columns is None:
+            QMessageBox.information(self, "Часто посещаемые сайты", "Статистика ещё загружается")
+            return
+        
+        # Count visits by domain, sorted by visit count
+        sorted_domains = self.columns.domain_counts()
         
         # Show dialog
         dialog = QDialog(self)
@@ -638,30 +545,22 @@ class HistoryPage(QDialog):
         dialog.exec_()
     
     def save_history(self):
-        """Save history to file"""
-        os.makedirs(os.path.dirname(self.history_file), exist_ok=True)
-        
-        # Keep only last 1000 entries
-        if len(self.history) > 1000:
-            self.history = self.history[-1000:]
-        
-        with open(self.history_file, 'w', encoding='utf-8') as f:
-            json.dump(self.history, f, ensure_ascii=False, indent=2)
-        
-        # Notify parent
-        if self.parent and hasattr(self.parent, 'history_manager'):
-            self.parent.history_manager.load_history()
+        """History changes are written by the profile data service"""
+        # Other windows are notified through profile_data.history_changed
+        pass
     
     def refresh_display(self):
         """Refresh the entire display"""
+        if self.is_unfiltered():
+            # First page right away; the columns follow from the worker
+            self.show_store_rows()
         self.apply_filters()
         self.update_statistics()
     
     def update_status(self):
         """Update status bar"""
-        self.status_label.setText(
-            f"Показано: {len(self.filtered_history)} | Всего: {len(self.history)}"
-        )
+        shown = len(self.filtered_rows) if self.filtered_rows is not None else self.history_total()
+        self.status_label.setText(f"Показано: {shown} | Всего: {self.history_total()}")
     
     def get_style(self):
         """Get stylesheet"""
@@ -681,7 +580,7 @@ class HistoryPage(QDialog):
                 left: 10px;
                 padding: 0 5px 0 5px;
             }
-            QListWidget {
+            QListView {
                 border: 1px solid #ddd;
                 border-radius: 4px;
             }
@@ -5,12 +5,15 @@ Enhanced New Tab Page with quick access and customization
 
 import json
 import os
+import time
 from PyQt5.QtWidgets import *
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 from datetime import datetime
 import webbrowser
 
+from newtab_model import get_newtab_model
+
 class NewTabPage(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -23,6 +26,16 @@ class NewTabPage(QDialog):
         self.settings_file = 'data/newtab_settings.json'
         self.settings = self.load_settings()
         
+        # Содержимое берётся из заранее посчитанной модели, без чтения файлов
+        self.model = get_newtab_model()
+        self.model.changed.connect(self.on_model_changed)
+        self.sections_dirty = False
+        self.render_ms = 0.0
+        
+        # Часы тикают только пока страница видима (showEvent / hideEvent)
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.update_clock)
+        
         self.init_ui()
         self.setStyleSheet(self.get_style())
         
@@ -82,11 +95,13 @@ class NewTabPage(QDialog):
         if self.settings['show_quick_access']:
             content_layout.addWidget(self.create_quick_access_widget())
         
-        # Recent History
-        content_layout.addWidget(self.create_recent_history_widget())
-        
-        # Bookmarks
-        content_layout.addWidget(self.create_bookmarks_widget())
+        # Top sites, recent history and bookmarks (rebuilt when the model changes)
+        self.sections = QWidget()
+        self.sections_layout = QVBoxLayout(self.sections)
+        self.sections_layout.setContentsMargins(0, 0, 0, 0)
+        self.sections_layout.setSpacing(30)
+        self.refresh_sections()
+        content_layout.addWidget(self.sections)
         
         # Settings Button
         content_layout.addWidget(self.create_settings_widget())
@@ -96,12 +111,48 @@ class NewTabPage(QDialog):
         
         self.setLayout(layout)
         
-        # Update clock every second
-        if self.settings['show_clock']:
-            self.timer = QTimer()
-            self.timer.timeout.connect(self.update_clock)
+        if self.isVisible():
+            self.start_clock()
+    
+    def refresh_sections(self):
+        """Rebuild the model-driven sections from memory"""
+        started = time.perf_counter()
+        while self.sections_layout.count():
+            widget = self.sections_layout.takeAt(0).widget()
+            if widget:
+                widget.deleteLater()
+        
+        snapshot = self.model.snapshot()
+        if snapshot['top_sites']:
+            self.sections_layout.addWidget(self.create_top_sites_widget(snapshot['top_sites']))
+        self.sections_layout.addWidget(self.create_recent_history_widget(snapshot['recent']))
+        self.sections_layout.addWidget(self.create_bookmarks_widget(snapshot['pinned']))
+        
+        self.sections_dirty = False
+        self.render_ms = (time.perf_counter() - started) * 1000
+    
+    def on_model_changed(self):
+        # Скрытая страница обновится при следующем показе
+        if self.isVisible():
+            self.refresh_sections()
+        else:
+            self.sections_dirty = True
+    
+    def start_clock(self):
+        if self.settings['show_clock'] and hasattr(self, 'time_label'):
+            self.update_clock()
             self.timer.start(1000)
     
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.sections_dirty:
+            self.refresh_sections()
+        self.start_clock()
+    
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+    
     def create_clock_widget(self):
         """Create clock and date widget"""
         widget = QWidget()
@@ -277,7 +328,71 @@ class NewTabPage(QDialog):
         else:
             webbrowser.open(url)
     
-    def create_recent_history_widget(self):
+    def create_top_sites_widget(self, sites):
+        """Most visited sites (frecency) as thumbnail tiles"""
+        widget = QWidget()
+        layout = QVBoxLayout()
+        
+        title = QLabel("Часто посещаемые")
+        title.setStyleSheet("""
+            QLabel {
+                font-size: 24px;
+                font-weight: 600;
+                color: #2c3e50;
+                margin-bottom: 20px;
+            }
+        """)
+        layout.addWidget(title)
+        
+        grid_layout = QGridLayout()
+        grid_layout.setSpacing(15)
+        for i, site in enumerate(sites):
+            grid_layout.addWidget(self.create_top_site_tile(site), i // 4, i % 4)
+        layout.addLayout(grid_layout)
+        
+        widget.setLayout(layout)
+        return widget
+    
+    def create_top_site_tile(self, site):
+        """Tile with the cached page thumbnail (or the title if there is none yet)"""
+        btn = QPushButton()
+        btn.setFixedSize(200, 150)
+        btn.setToolTip(site['url'])
+        btn.setStyleSheet("""
+            QPushButton {
+                border: 1px solid #e0e0e0;
+                border-radius: 12px;
+                background-color: #ffffff;
+            }
+            QPushButton:hover {
+                border-color: #4285f4;
+            }
+        """)
+        
+        layout = QVBoxLayout()
+        layout.setContentsMargins(6, 6, 6, 6)
+        
+        preview = QLabel()
+        preview.setAlignment(Qt.AlignCenter)
+        pixmap = self.model.thumbnail(site['url'])
+        if pixmap is not None:
+            preview.setPixmap(pixmap.scaled(188, 110, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+        else:
+            preview.setText("🌐")
+            preview.setStyleSheet("font-size: 32px;")
+        
+        title_label = QLabel(site['title'])
+        title_label.setStyleSheet("color: #2c3e50; font-weight: 500;")
+        title_label.setAlignment(Qt.AlignCenter)
+        
+        layout.addWidget(preview)
+        layout.addWidget(title_label)
+        btn.setLayout(layout)
+        
+        btn.clicked.connect(lambda: self.open_site(site['url']))
+        return btn
+    
+    def create_recent_history_widget(self, history_items):
         """Create recent history widget"""
         widget = QWidget()
         layout = QVBoxLayout()
@@ -293,9 +408,6 @@ class NewTabPage(QDialog):
         """)
         layout.addWidget(title)
         
-        # Get recent history
-        history_items = self.get_recent_history()
-        
         if history_items:
             for item in history_items:
                 item_widget = self.create_history_item(item)
@@ -310,14 +422,7 @@ class NewTabPage(QDialog):
     
     def get_recent_history(self):
         """Get recent history items"""
-        if os.path.exists('data/history.json'):
-            try:
-                with open('data/history.json', 'r', encoding='utf-8') as f:
-                    history = json.load(f)
-                    return history[-5:] if history else []
-            except:
-                pass
-        return []
+        return list(self.model.snapshot()['recent'])
     
     def create_history_item(self, item):
         """Create a history item widget"""
@@ -363,7 +468,7 @@ class NewTabPage(QDialog):
         
         return widget
     
-    def create_bookmarks_widget(self):
+    def create_bookmarks_widget(self, bookmarks):
         """Create bookmarks widget"""
         widget = QWidget()
         layout = QVBoxLayout()
@@ -379,11 +484,8 @@ class NewTabPage(QDialog):
         """)
         layout.addWidget(title)
         
-        # Get bookmarks
-        bookmarks = self.get_bookmarks()
-        
         if bookmarks:
-            for bookmark in bookmarks[:8]:  # Show max 8 bookmarks
+            for bookmark in bookmarks:  # Pinned (or first 8) bookmarks
                 item_widget = self.create_bookmark_item(bookmark)
                 layout.addWidget(item_widget)
         else:
@@ -396,13 +498,7 @@ class NewTabPage(QDialog):
     
     def get_bookmarks(self):
         """Get bookmarks"""
-        if os.path.exists('data/bookmarks.json'):
-            try:
-                with open('data/bookmarks.json', 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                pass
-        return []
+        return list(self.model.snapshot()['pinned'])
     
     def create_bookmark_item(self, bookmark):
         """Create a bookmark item widget"""
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+Profile Persistence Service
+Write-behind, coalescing JSON persistence for profile files: managers mark
+their data dirty (which takes a private copy on the calling thread), a
+background thread batches the changes and writes each file atomically
+(temp file + fsync + rename) with compact encoding
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+def atomic_write(path: str, data: bytes):
+    """Write bytes to ``path`` so that readers see either the old or the new file"""
+    directory = os.path.dirname(path) or '.'
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def encode_json(obj: Any) -> bytes:
+    """Compact UTF-8 JSON encoding used for all profile files"""
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def copy_json(obj: Any) -> Any:
+    """Deep copy of JSON data (dicts, lists, scalars); much cheaper than copy.deepcopy"""
+    if isinstance(obj, dict):
+        return {key: copy_json(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [copy_json(value) for value in obj]
+    return obj
+
+
+class PersistenceService:
+    """
+    Coalescing write-behind persistence for JSON profile files.
+
+    Each manager registers a key with a target path and a snapshot callable
+    that returns the object to serialize. ``mark_dirty`` copies that object on
+    the owner's thread (``copy=False`` for snapshots that already return a
+    private copy) and never touches the disk, so the worker only encodes data
+    nobody mutates; it waits ``coalesce_window`` seconds after the first
+    change so that bursts of edits end up as a single write.
+    """
+
+    def __init__(self, coalesce_window: float = 0.5):
+        self.coalesce_window = coalesce_window
+        self._sources: Dict[str, tuple] = {}
+        # Pending key -> copy of its data
+        self._dirty: Dict[str, Any] = {}
+        self._first_dirty_at: Optional[float] = None
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._running = True
+
+        self.stats = {
+            'marks': 0,
+            'writes': 0,
+            'bytes_written': 0,
+            'errors': 0,
+            'last_error': None
+        }
+
+        self._thread = threading.Thread(target=self._run, name='PersistenceService', daemon=True)
+        self._thread.start()
+
+    def register(self, key: str, path: str, snapshot: Callable[[], Any], copy: bool = True):
+        """Register a profile file; ``snapshot`` returns the data to persist"""
+        with self._cond:
+            self._sources[key] = (path, snapshot, copy)
+
+    def unregister(self, key: str):
+        with self._cond:
+            self._sources.pop(key, None)
+            self._dirty.pop(key, None)
+
+    def mark_dirty(self, key: str):
+        """Schedule ``key`` for writing; copies its data now, writes it later"""
+        with self._cond:
+            source = self._sources.get(key)
+        if source is None:
+            return
+        _path, snapshot, copy = source
+        try:
+            data = copy_json(snapshot()) if copy else snapshot()
+        except Exception as e:
+            self.stats['errors'] += 1
+            self.stats['last_error'] = f"{key}: {e}"
+            print(f"[WARNING] Failed to snapshot {key}: {e}")
+            return
+
+        with self._cond:
+            self.stats['marks'] += 1
+            if not self._dirty:
+                self._first_dirty_at = time.monotonic()
+            self._dirty[key] = data
+            self._cond.notify()
+
+    def is_dirty(self, key: str) -> bool:
+        with self._cond:
+            return key in self._dirty
+
+    def flush(self):
+        """Synchronously write everything that is still pending (e.g. from closeEvent)"""
+        with self._cond:
+            batch = dict(self._dirty)
+            self._dirty.clear()
+            self._first_dirty_at = None
+        self._write_batch(batch)
+
+    def shutdown(self):
+        """Flush pending changes and stop the worker thread"""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        self._thread.join(timeout=5)
+        self.flush()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and not self._dirty:
+                    self._cond.wait()
+                if not self._running:
+                    return
+
+                # Coalesce: wait until the window since the first change has passed
+                remaining = self._first_dirty_at + self.coalesce_window - time.monotonic()
+                while self._running and remaining > 0:
+                    self._cond.wait(remaining)
+                    if self._first_dirty_at is None:
+                        break
+                    remaining = self._first_dirty_at + self.coalesce_window - time.monotonic()
+
+                batch = dict(self._dirty)
+                self._dirty.clear()
+                self._first_dirty_at = None
+
+            self._write_batch(batch)
+
+    def _write_batch(self, batch: Dict[str, Any]):
+        with self._write_lock:
+            for key, snapshot in batch.items():
+                with self._cond:
+                    source = self._sources.get(key)
+                if not source:
+                    continue
+                path = source[0]
+                try:
+                    data = encode_json(snapshot)
+                except Exception as e:
+                    self.stats['errors'] += 1
+                    self.stats['last_error'] = f"{key}: {e}"
+                    print(f"[WARNING] Failed to serialize {key}: {e}")
+                    continue
+
+                try:
+                    atomic_write(path, data)
+                    self.stats['writes'] += 1
+                    self.stats['bytes_written'] += len(data)
+                except OSError as e:
+                    self.stats['errors'] += 1
+                    self.stats['last_error'] = f"{key}: {e}"
+                    print(f"[WARNING] Failed to write {path}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            stats = dict(self.stats)
+            stats['pending'] = sorted(self._dirty)
+            stats['registered'] = sorted(self._sources)
+        return stats
+
+
+# Global persistence service instance
+_persistence_service = None
+
+def get_persistence_service() -> PersistenceService:
+    """Get global persistence service instance"""
+    global _persistence_service
+    if _persistence_service is None:
+        _persistence_service = PersistenceService()
+    return _persistence_service
+
+def cleanup_persistence_service():
+    """Flush and stop global persistence service"""
+    global _persistence_service
+    if _persistence_service:
+        _persistence_service.shutdown()
+        _persistence_service = None
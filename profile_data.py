@@ -0,0 +1,312 @@
+# -*- coding: utf-8 -*-
+"""
+Profile Data Service
+Process-wide owner of the parsed history, bookmarks and settings. Dialogs and
+additional windows read snapshots from memory and subscribe to change signals
+instead of re-opening the JSON files
+"""
+
+import json
+import os
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from bookmark_index import BookmarkIndex
+from history_store import format_entry, get_history_store
+from persistence import get_persistence_service
+from profile_migrations import get_profile_migrator
+
+
+def freeze(data: Any) -> Any:
+    """Shallow read-only view: dicts become mappingproxy, lists become tuples"""
+    if isinstance(data, dict):
+        return MappingProxyType(data)
+    if isinstance(data, list):
+        return tuple(data)
+    return data
+
+
+def flatten_bookmarks(data: Any) -> List[Dict[str, Any]]:
+    """Flat bookmark list for both the legacy list layout and the v1.1 folder layout"""
+    if isinstance(data, list):
+        return [b for b in data if isinstance(b, dict) and 'url' in b]
+    if isinstance(data, dict) and isinstance(data.get('folders'), dict):
+        result = []
+        for folder_name, folder in data['folders'].items():
+            for bookmark in folder.get('bookmarks', []):
+                if 'folder' not in bookmark:
+                    bookmark = dict(bookmark, folder=folder_name)
+                result.append(bookmark)
+        return result
+    return []
+
+
+class ProfileDataService(QObject):
+    """
+    Single in-process owner of profile data.
+
+    Owners (the browser window) get the live objects via ``bookmarks()`` /
+    ``settings()`` and call ``commit_*`` after mutating them; everybody else
+    uses the ``*_snapshot()`` methods and the change signals. Every disk read
+    goes through ``_read_json`` / the history store and is counted in
+    ``stats`` so that per-session file reads can be measured.
+    """
+
+    history_changed = pyqtSignal()
+    history_visit_added = pyqtSignal(dict)
+    bookmarks_changed = pyqtSignal()
+    # (action, url, entry) for edits made through a shared bookmark manager
+    # (get_shared): 'add', 'remove', 'update', or 'reload' after bulk changes
+    bookmark_edited = pyqtSignal(str, str, object)
+    settings_changed = pyqtSignal()
+
+    def __init__(self, data_dir: str = 'data'):
+        super().__init__()
+        self.data_dir = data_dir
+        if not os.path.exists(data_dir):
+            os.makedirs(data_dir)
+
+        self.bookmarks_file = os.path.join(data_dir, 'bookmarks.json')
+        self.settings_file = os.path.join(data_dir, 'settings.json')
+
+        self.history_store = get_history_store(data_dir)
+        self.persistence = get_persistence_service()
+        self.migrator = get_profile_migrator(data_dir)
+
+        self._bookmarks: Any = None
+        self._bookmark_index: Optional[BookmarkIndex] = None
+        self._settings: Optional[Dict[str, Any]] = None
+        self._shared: Dict[str, Any] = {}
+
+        self.stats = {
+            'file_reads': 0,
+            'store_reads': 0,
+            'snapshot_requests': 0,
+            'commits': 0
+        }
+
+        self.persistence.register('bookmarks', self.bookmarks_file, lambda: self._bookmarks)
+        self.persistence.register('settings', self.settings_file, lambda: self._settings)
+
+    def _read_json(self, path: str, default: Any) -> Any:
+        if not os.path.exists(path):
+            return default
+        self.stats['file_reads'] += 1
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return default
+
+    # ------------------------------------------------------------------
+    # History
+    # ------------------------------------------------------------------
+    def history_page(self, limit: int, offset: int = 0) -> Tuple[Dict[str, Any], ...]:
+        """``limit`` visits after the ``offset`` most recent ones, most recent first"""
+        self.stats['store_reads'] += 1
+        return tuple(self.history_store.get_visits(limit, offset))
+
+    def iter_history_rows(self) -> Iterator[Tuple[str, str, float]]:
+        """
+        Every visit as a (url, title, visit_time) row, most recent first, read
+        from the store page by page (and from the archive segments after the
+        hot ones), so nothing holds the whole history in memory
+        """
+        self.stats['store_reads'] += 1
+        store = self.history_store
+        if store.archive:
+            return store.archive.iter_visits(newest_first=True)
+        return store.iter_visits(newest_first=True)
+
+    def iter_history(self) -> Iterator[Dict[str, Any]]:
+        """``iter_history_rows`` as history dicts"""
+        for url, title, visit_time in self.iter_history_rows():
+            yield format_entry(url, title, visit_time)
+
+    def recent_history(self, count: int) -> Tuple[Dict[str, Any], ...]:
+        """Last ``count`` visits, oldest first"""
+        self.stats['snapshot_requests'] += 1
+        return tuple(reversed(self.history_page(count))) if count else ()
+
+    def add_visit(self, url: str, title: str = '') -> Dict[str, Any]:
+        """Record a visit in the store; returns the visit entry"""
+        self.history_store.add_visit(url, title)
+        entry = self.history_store.get_entry(url)
+        self.history_visit_added.emit(entry)
+        return entry
+
+    def delete_history_url(self, url: str):
+        self.history_store.delete_url(url)
+        self.history_changed.emit()
+
+    def clear_history(self, days_old: Optional[int] = None):
+        self.history_store.clear(days_old)
+        self.history_changed.emit()
+
+    def reload_history(self):
+        """Tell history views to re-query the store after bulk writes (e.g. imports)"""
+        self.history_changed.emit()
+
+    # ------------------------------------------------------------------
+    # Bookmarks
+    # ------------------------------------------------------------------
+    def bookmarks(self) -> Any:
+        """Live bookmark data for the owning window; call commit_bookmarks() after edits"""
+        if self._bookmarks is None:
+            data = self._read_json(self.bookmarks_file, [])
+            self._bookmarks = self.migrator.migrate('bookmarks', data, self.bookmarks_file)
+        return self._bookmarks
+
+    def bookmarks_snapshot(self) -> Any:
+        self.stats['snapshot_requests'] += 1
+        return freeze(self.bookmarks())
+
+    def bookmark_list(self) -> Tuple[Dict[str, Any], ...]:
+        """Flat, read-only bookmark list regardless of on-disk layout"""
+        self.stats['snapshot_requests'] += 1
+        return tuple(flatten_bookmarks(self.bookmarks()))
+
+    def set_bookmarks(self, data: Any, persist: bool = True, reindex: bool = True):
+        """Replace the bookmark data; ``persist=False`` only swaps the in-memory copy"""
+        self._bookmarks = data
+        if reindex:
+            self._bookmark_index = None
+        if persist:
+            self.commit_bookmarks(reindex=False)
+
+    def set_bookmark_list(self, bookmarks: List[Dict[str, Any]], reindex: bool = True):
+        """
+        Store a flat list, regrouping into folders when the profile uses the
+        v1.1 layout. Callers that applied their edits to ``bookmark_index()``
+        pass ``reindex=False``.
+        """
+        current = self.bookmarks()
+        if isinstance(current, dict) and isinstance(current.get('folders'), dict):
+            default_folder = current.get('default_folder', 'Без папки')
+            folders = current['folders']
+            for folder in folders.values():
+                folder['bookmarks'] = []
+            for bookmark in bookmarks:
+                name = bookmark.get('folder') or default_folder
+                if name not in folders:
+                    folders[name] = {'id': f"folder_{len(folders)}", 'name': name, 'bookmarks': []}
+                folders[name]['bookmarks'].append(bookmark)
+            self.commit_bookmarks(reindex=reindex)
+        else:
+            self.set_bookmarks(list(bookmarks), reindex=reindex)
+
+    def bookmark_index(self) -> BookmarkIndex:
+        """
+        Normalized URL index over all bookmarks. Editors keep it current with
+        ``add`` / ``update`` / ``remove``; it is only rebuilt after untracked
+        bulk replacements
+        """
+        if self._bookmark_index is None:
+            self._bookmark_index = BookmarkIndex(flatten_bookmarks(self.bookmarks()))
+        return self._bookmark_index
+
+    def is_bookmarked(self, url: str) -> bool:
+        return self.bookmark_index().contains(url)
+
+    def add_bookmarks(self, bookmarks: List[Dict[str, Any]]) -> int:
+        """
+        Append bookmarks whose normalized URL is not bookmarked yet (one commit
+        for the whole batch); returns how many were added
+        """
+        index = self.bookmark_index()
+        data = self.bookmarks()
+        folders = data.get('folders') if isinstance(data, dict) else None
+        if folders is None and not isinstance(data, list):
+            data = self._bookmarks = []
+
+        added = 0
+        for bookmark in bookmarks:
+            if folders is not None:
+                name = bookmark.get('folder') or data.get('default_folder', 'Без папки')
+                folder = folders.get(name)
+                if folder is None:
+                    folder = folders[name] = {'id': f"folder_{len(folders)}", 'name': name, 'bookmarks': []}
+                bookmark.setdefault('id', str(len(folder['bookmarks']) + 1))
+                bookmark['folder'] = name
+                if not index.add(bookmark):
+                    continue
+                folder['bookmarks'].append(bookmark)
+            else:
+                if not index.add(bookmark):
+                    continue
+                data.append(bookmark)
+            added += 1
+
+        if added:
+            self.commit_bookmarks(reindex=False)
+        return added
+
+    def commit_bookmarks(self, reindex: bool = True):
+        """
+        Persist edits to the live bookmark data. Callers that already updated
+        ``bookmark_index()`` themselves pass ``reindex=False``.
+        """
+        if reindex:
+            self._bookmark_index = None
+        self.stats['commits'] += 1
+        self.persistence.mark_dirty('bookmarks')
+        self.bookmarks_changed.emit()
+
+    # ------------------------------------------------------------------
+    # Settings
+    # ------------------------------------------------------------------
+    def settings(self) -> Dict[str, Any]:
+        """Live settings dict for the owning window; call commit_settings() after edits"""
+        if self._settings is None:
+            exists = os.path.exists(self.settings_file)
+            self._settings = self.migrator.migrate(
+                'settings', self._read_json(self.settings_file, {}),
+                self.settings_file if exists else None
+            )
+        return self._settings
+
+    def settings_snapshot(self) -> MappingProxyType:
+        self.stats['snapshot_requests'] += 1
+        return MappingProxyType(self.settings())
+
+    def commit_settings(self):
+        self.stats['commits'] += 1
+        self.persistence.mark_dirty('settings')
+        self.settings_changed.emit()
+
+    # ------------------------------------------------------------------
+    # Shared objects
+    # ------------------------------------------------------------------
+    def get_shared(self, name: str, factory: Callable[[], Any]) -> Any:
+        """Get or create a process-wide object (e.g. a manager shared by all windows)"""
+        if name not in self._shared:
+            self._shared[name] = factory()
+        return self._shared[name]
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats['bookmarks_loaded'] = self._bookmarks is not None
+        if self._bookmark_index is not None:
+            stats['bookmark_index'] = self._bookmark_index.get_stats()
+        stats['settings_loaded'] = self._settings is not None
+        return stats
+
+
+# Global profile data service instance
+_profile_data = None
+
+def get_profile_data(data_dir: str = 'data') -> ProfileDataService:
+    """Get global profile data service instance"""
+    global _profile_data
+    if _profile_data is None:
+        _profile_data = ProfileDataService(data_dir)
+    return _profile_data
+
+def cleanup_profile_data():
+    """Drop global profile data service"""
+    global _profile_data
+    if _profile_data:
+        _profile_data.persistence.flush()
+        _profile_data = None
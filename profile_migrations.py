@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+"""
+Profile Schema Migrations
+Ordered, one-shot migration steps for profile files (bookmarks, history,
+settings, security, downloads). The schema version of every file is kept in
+data/schema_versions.json; files that are already current skip the
+transforms entirely (after a cheap shape check, since other writers may have
+replaced them), migrated files are written back once
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from persistence import atomic_write, encode_json
+
+MANIFEST_NAME = 'schema_versions.json'
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    apply: Callable[[Any], Any]
+
+
+class MigrationRegistry:
+    """Migration steps per profile file key, applied in version order"""
+
+    def __init__(self):
+        self._steps: Dict[str, List[Migration]] = {}
+        self._shapes: Dict[str, Callable[[Any], bool]] = {}
+
+    def register(self, key: str, version: int, description: str):
+        """Decorator registering ``func(data) -> data`` as step ``version`` of ``key``"""
+        def decorator(func):
+            steps = self._steps.setdefault(key, [])
+            if any(step.version == version for step in steps):
+                raise ValueError(f"Duplicate migration {key} v{version}")
+            steps.append(Migration(version, description, func))
+            steps.sort(key=lambda step: step.version)
+            return func
+        return decorator
+
+    def shape(self, key: str):
+        """Decorator registering ``func(data) -> bool``: does ``data`` have the latest layout"""
+        def decorator(func):
+            self._shapes[key] = func
+            return func
+        return decorator
+
+    def matches(self, key: str, data: Any) -> bool:
+        check = self._shapes.get(key)
+        return check is None or check(data)
+
+    def latest(self, key: str) -> int:
+        steps = self._steps.get(key)
+        return steps[-1].version if steps else 0
+
+    def pending(self, key: str, version: int) -> List[Migration]:
+        return [step for step in self._steps.get(key, []) if step.version > version]
+
+
+registry = MigrationRegistry()
+
+
+# ----------------------------------------------------------------------
+# Bookmarks
+# ----------------------------------------------------------------------
+DEFAULT_FOLDER = 'Без папки'
+
+
+@registry.register('bookmarks', 1, "flat list -> v1.1 folders and tags")
+def bookmarks_to_v11(data):
+    if isinstance(data, dict) and isinstance(data.get('folders'), dict):
+        data.setdefault('version', '1.1')
+        data.setdefault('tags', ['важное', 'работа', 'личное', 'новое'])
+        data.setdefault('default_folder', DEFAULT_FOLDER)
+        return data
+
+    upgraded = {
+        'version': '1.1',
+        'folders': {
+            DEFAULT_FOLDER: {
+                'id': 'default',
+                'name': DEFAULT_FOLDER,
+                'color': '#3498db',
+                'bookmarks': []
+            }
+        },
+        'tags': ['важное', 'работа', 'личное', 'новое'],
+        'default_folder': DEFAULT_FOLDER
+    }
+
+    folder = upgraded['folders'][DEFAULT_FOLDER]['bookmarks']
+    for bookmark in data if isinstance(data, list) else []:
+        if isinstance(bookmark, dict) and 'url' in bookmark:
+            folder.append({
+                'id': str(len(folder) + 1),
+                'title': bookmark.get('title', 'Untitled'),
+                'url': bookmark['url'],
+                'timestamp': bookmark.get('timestamp', datetime.now().isoformat()),
+                'tags': bookmark.get('tags', []),
+                'favicon': bookmark.get('favicon', ''),
+                'visits': bookmark.get('visits', 0),
+                'folder': DEFAULT_FOLDER
+            })
+    return upgraded
+
+
+@registry.shape('bookmarks')
+def bookmarks_shape(data):
+    return isinstance(data, dict) and isinstance(data.get('folders'), dict)
+
+
+@registry.register('bookmarks', 2, "every bookmark records its folder")
+def bookmarks_folder_field(data):
+    for name, folder in data['folders'].items():
+        folder.setdefault('name', name)
+        folder.setdefault('bookmarks', [])
+        for bookmark in folder['bookmarks']:
+            bookmark.setdefault('folder', name)
+    return data
+
+
+# ----------------------------------------------------------------------
+# Settings / security / downloads
+# ----------------------------------------------------------------------
+@registry.register('settings', 1, "settings file is a dict")
+def settings_as_dict(data):
+    return data if isinstance(data, dict) else {}
+
+
+@registry.shape('settings')
+def settings_shape(data):
+    return isinstance(data, dict)
+
+
+@registry.register('security', 1, "security settings are booleans")
+def security_as_bools(data):
+    if not isinstance(data, dict):
+        return {}
+    return {key: bool(value) for key, value in data.items()}
+
+
+@registry.shape('security')
+def security_shape(data):
+    return isinstance(data, dict)
+
+
+@registry.register('downloads', 1, "downloads file is a list of dicts")
+def downloads_as_list(data):
+    if not isinstance(data, list):
+        return []
+    return [item for item in data if isinstance(item, dict)]
+
+
+@registry.shape('downloads')
+def downloads_shape(data):
+    return isinstance(data, list)
+
+
+# ----------------------------------------------------------------------
+# History (data is the HistoryStore; legacy JSON is imported once)
+# ----------------------------------------------------------------------
+@registry.register('history', 1, "history.json -> SQLite store")
+def history_import_json(store):
+    store.import_json(os.path.join(os.path.dirname(store.db_path), 'history.json'))
+    return store
+
+
+class ProfileMigrator:
+    """
+    Runs pending migrations for profile files and records their versions.
+
+    ``migrate`` is the only entry point: for a current file it is a dict
+    lookup plus the registered shape check; data that fails the check (the
+    file was replaced by a writer that does not know the schema) goes
+    through every step again, which is why steps must accept current data.
+    Otherwise the pending steps run in order, the result is written
+    atomically to ``path`` (when given) and only then the manifest is stamped.
+    """
+
+    def __init__(self, data_dir: str = 'data', migrations: MigrationRegistry = registry):
+        self.data_dir = data_dir
+        self.registry = migrations
+        self.manifest_path = os.path.join(data_dir, MANIFEST_NAME)
+        self._lock = threading.Lock()
+        self.versions: Dict[str, int] = self._load_manifest()
+        self.stats = {
+            'fast_path': 0,
+            'shape_mismatches': 0,
+            'migrated': 0,
+            'steps_applied': 0,
+            'migration_seconds': 0.0
+        }
+
+    def _load_manifest(self) -> Dict[str, int]:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                versions = json.load(f)
+            return {k: int(v) for k, v in versions.items()} if isinstance(versions, dict) else {}
+        except (OSError, ValueError, TypeError):
+            return {}
+
+    def version(self, key: str) -> int:
+        return self.versions.get(key, 0)
+
+    def is_current(self, key: str) -> bool:
+        return self.version(key) >= self.registry.latest(key)
+
+    def migrate(self, key: str, data: Any, path: Optional[str] = None) -> Any:
+        """Bring ``data`` of profile file ``key`` to the latest schema"""
+        with self._lock:
+            version = self.version(key)
+            steps = self.registry.pending(key, version)
+            if not steps:
+                if self.registry.matches(key, data):
+                    self.stats['fast_path'] += 1
+                    return data
+                print(f"[WARNING] {key} does not match schema v{version}, migrating again")
+                self.stats['shape_mismatches'] += 1
+                steps = self.registry.pending(key, 0)
+
+            started = time.perf_counter()
+            for step in steps:
+                data = step.apply(data)
+                self.stats['steps_applied'] += 1
+                print(f"[INFO] Migrated {key} to schema v{step.version}: {step.description}")
+
+            # Data first, stamp second: a crash in between only repeats the steps
+            if path is not None:
+                atomic_write(path, encode_json(data))
+            self.versions[key] = steps[-1].version
+            atomic_write(self.manifest_path, encode_json(self.versions))
+
+            self.stats['migrated'] += 1
+            self.stats['migration_seconds'] += time.perf_counter() - started
+            return data
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats['versions'] = dict(self.versions)
+        return stats
+
+
+# Global migrator instance
+_profile_migrator = None
+
+def get_profile_migrator(data_dir: str = 'data') -> ProfileMigrator:
+    """Get global profile migrator instance"""
+    global _profile_migrator
+    if _profile_migrator is None:
+        _profile_migrator = ProfileMigrator(data_dir)
+    return _profile_migrator
@@ -0,0 +1,413 @@
+# -*- coding: utf-8 -*-
+"""
+Reader Mode
+Main-article extraction for reading mode. The page HTML is taken once with
+toHtml, parsed with html.parser into a small tree and scored by text
+density (readability-style: paragraphs vote for their containers, link-heavy
+and navigation-like blocks lose) on a QThreadPool worker. Articles are
+cached per URL and content hash and shown in a QTextBrowser laid over the
+web view, so the page itself is never touched and toggling back is free
+"""
+
+import hashlib
+import html
+import re
+import time
+from collections import OrderedDict
+from html.parser import HTMLParser
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+from PyQt5.QtCore import QEvent, QObject, QRunnable, QThreadPool, QUrl, pyqtSignal
+from PyQt5.QtGui import QDesktopServices
+from PyQt5.QtWebEngineWidgets import QWebEngineView
+from PyQt5.QtWidgets import QTextBrowser
+
+# Content of these elements is never part of an article
+SKIP_TAGS = {
+    'script', 'style', 'noscript', 'template', 'svg', 'canvas', 'iframe', 'object',
+    'form', 'button', 'select', 'textarea', 'nav', 'aside', 'footer', 'header', 'head'
+}
+VOID_TAGS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+    'param', 'source', 'track', 'wbr'
+}
+# Tags kept in the reader document; any other element is unwrapped
+KEEP_TAGS = {
+    'p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'ul', 'ol', 'li', 'blockquote', 'pre',
+    'code', 'em', 'strong', 'b', 'i', 'a', 'br', 'hr', 'table', 'tr', 'td', 'th',
+    'dl', 'dt', 'dd', 'sub', 'sup'
+}
+BLOCK_TAGS = {'p', 'div', 'section', 'article', 'main', 'ul', 'ol', 'table', 'pre', 'blockquote',
+              'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'figure', 'dl'}
+# Elements whose text votes for the container holding them
+PARAGRAPH_TAGS = {'p', 'pre', 'td', 'blockquote', 'li', 'dd'}
+CONTAINER_SCORES = {'article': 10, 'main': 8, 'section': 3, 'div': 5, 'pre': 3, 'td': 3, 'blockquote': 3}
+
+POSITIVE_RE = re.compile(r'article|body|content|entry|main|page|post|text|blog|story', re.I)
+NEGATIVE_RE = re.compile(r'comment|meta|footer|footnote|foot|nav|menu|sidebar|sponsor|'
+                         r'ad-|advert|promo|related|share|social|widget|banner|cookie|popup', re.I)
+WHITESPACE_RE = re.compile(r'\s+')
+
+MIN_PARAGRAPH = 25
+CACHE_SIZE = 32
+
+READER_STYLE = """
+body { font-family: Georgia, serif; font-size: 18px; color: #333; background: #fff; }
+h1, h2, h3 { color: #000; margin-top: 1.2em; margin-bottom: 0.8em; }
+p { margin-bottom: 1.2em; line-height: 180%; }
+pre { font-family: monospace; font-size: 14px; background: #f5f5f5; }
+a { color: #1a5fb4; }
+.source { color: #888; font-size: 13px; }
+"""
+
+
+class _Node:
+    __slots__ = ('tag', 'attrs', 'children', 'parent', 'text_len', 'link_len', 'commas', 'score')
+
+    def __init__(self, tag: str, attrs: Dict[str, str], parent: Optional['_Node']):
+        self.tag = tag
+        self.attrs = attrs
+        self.children: List[Any] = []
+        self.parent = parent
+        self.text_len = 0
+        self.link_len = 0
+        self.commas = 0
+        self.score: Optional[float] = None
+
+
+class _TreeBuilder(HTMLParser):
+    """Tolerant element tree without the SKIP_TAGS subtrees"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = _Node('#root', {}, None)
+        self.current = self.root
+        self.skip = 0
+        self.title = ''
+        self._in_title = False
+        self._title_done = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'title' and not self._title_done:
+            self._in_title = True
+        if self.skip or tag in SKIP_TAGS:
+            if tag in SKIP_TAGS and tag not in VOID_TAGS:
+                self.skip += 1
+            return
+        # An unclosed <p> ends at the next block
+        if tag in BLOCK_TAGS and self.current.tag == 'p':
+            self.current = self.current.parent
+        node = _Node(tag, {k: v or '' for k, v in attrs}, self.current)
+        self.current.children.append(node)
+        if tag not in VOID_TAGS:
+            self.current = node
+
+    def handle_startendtag(self, tag, attrs):
+        if self.skip or tag in SKIP_TAGS:
+            return
+        self.current.children.append(_Node(tag, {k: v or '' for k, v in attrs}, self.current))
+
+    def handle_endtag(self, tag):
+        if tag == 'title' and self._in_title:
+            self._in_title = False
+            self._title_done = True
+        if self.skip:
+            if tag in SKIP_TAGS:
+                self.skip -= 1
+            return
+        node = self.current
+        while node is not self.root and node.tag != tag:
+            node = node.parent
+        if node is not self.root:
+            self.current = node.parent
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        if not self.skip and self.current is not self.root:
+            self.current.children.append(data)
+
+
+def parse_html(page_html: str) -> _TreeBuilder:
+    builder = _TreeBuilder()
+    builder.feed(page_html)
+    builder.close()
+    return builder
+
+
+def class_weight(node: _Node) -> int:
+    names = node.attrs.get('class', '') + ' ' + node.attrs.get('id', '')
+    weight = 0
+    if NEGATIVE_RE.search(names):
+        weight -= 25
+    if POSITIVE_RE.search(names):
+        weight += 25
+    return weight
+
+
+def _measure(root: _Node) -> List[_Node]:
+    """Fill text/link lengths bottom-up (iteratively: pages nest deeply); return nodes in document order"""
+    order = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        stack.extend(child for child in reversed(node.children) if isinstance(child, _Node))
+    for node in reversed(order):
+        for child in node.children:
+            if isinstance(child, _Node):
+                node.text_len += child.text_len
+                node.link_len += child.link_len
+                node.commas += child.commas
+            else:
+                text = WHITESPACE_RE.sub(' ', child).strip()
+                node.text_len += len(text)
+                node.commas += text.count(',')
+        if node.tag == 'a':
+            node.link_len = node.text_len
+    return order
+
+
+def _score(node: _Node) -> float:
+    if node.score is None:
+        node.score = CONTAINER_SCORES.get(node.tag, 0) + class_weight(node)
+    return node.score
+
+
+def find_article(root: _Node) -> Tuple[_Node, float]:
+    """Container with the best link-density-adjusted paragraph score"""
+    order = _measure(root)
+    candidates = []
+    for node in order:
+        if node.tag not in PARAGRAPH_TAGS or node.text_len < MIN_PARAGRAPH:
+            continue
+        parent = node.parent
+        if parent is None or parent is root:
+            continue
+        points = 1 + node.commas + min(node.text_len // 100, 3)
+        for ancestor, share in ((parent, 1.0), (parent.parent, 0.5)):
+            if ancestor is None or ancestor is root:
+                break
+            if ancestor.score is None:
+                candidates.append(ancestor)
+            ancestor.score = _score(ancestor) + points * share
+
+    best, best_score = None, 0.0
+    for node in candidates:
+        density = node.link_len / node.text_len if node.text_len else 1.0
+        score = node.score * (1.0 - density)
+        if best is None or score > best_score:
+            best, best_score = node, score
+    if best is None:
+        body = next((n for n in order if n.tag == 'body'), root)
+        return body, 0.0
+    return best, best_score
+
+
+def render_node(node: _Node, base_url: str, out: List[str], pre: bool = False):
+    """Append cleaned HTML of ``node`` to ``out``: safe tags only, no attributes but absolute hrefs"""
+    for child in node.children:
+        if not isinstance(child, _Node):
+            out.append(html.escape(child if pre else WHITESPACE_RE.sub(' ', child)))
+            continue
+        # Boilerplate blocks inside the article (share bars, comment lists)
+        if class_weight(child) < 0 and child.text_len < 500:
+            continue
+        if child.tag in ('img', 'picture', 'video', 'audio', 'figure') and child.text_len == 0:
+            continue
+        tag = child.tag if child.tag in KEEP_TAGS else None
+        if tag == 'a':
+            href = child.attrs.get('href', '')
+            if href and not href.lower().startswith('javascript:'):
+                out.append(f'<a href="{html.escape(urljoin(base_url, href))}">')
+            else:
+                tag = None
+        elif tag is not None:
+            out.append(f'<{tag}>')
+        if child.tag not in VOID_TAGS:
+            render_node(child, base_url, out, pre or child.tag == 'pre')
+            if tag is not None:
+                out.append(f'</{tag}>')
+
+
+def extract_article(page_html: str, url: str) -> Optional[Dict[str, Any]]:
+    """Reader document for ``page_html`` or None when there is no article-like text"""
+    started = time.perf_counter()
+    tree = parse_html(page_html)
+    node, score = find_article(tree.root)
+    if node.text_len < MIN_PARAGRAPH * 4:
+        return None
+
+    body: List[str] = []
+    render_node(node, url, body)
+    title = WHITESPACE_RE.sub(' ', tree.title).strip() or url
+    document = (
+        f'<html><head><title>{html.escape(title)}</title><style>{READER_STYLE}</style></head><body>'
+        f'<h1>{html.escape(title)}</h1>'
+        f'<p class="source"><a href="{html.escape(url)}">{html.escape(url)}</a></p>'
+        f'{"".join(body)}</body></html>'
+    )
+    return {
+        'url': url,
+        'title': title,
+        'html': document,
+        'text_length': node.text_len,
+        'score': score,
+        'extract_ms': (time.perf_counter() - started) * 1000
+    }
+
+
+def content_hash(page_html: str) -> str:
+    return hashlib.sha1(page_html.encode('utf-8', 'replace')).hexdigest()
+
+
+class _ExtractSignals(QObject):
+    done = pyqtSignal(int, object)
+
+
+class _ExtractTask(QRunnable):
+    def __init__(self, engine: 'ReaderEngine', token: int, url: str, page_html: str):
+        super().__init__()
+        self.engine = engine
+        self.token = token
+        self.url = url
+        self.page_html = page_html
+
+    def run(self):
+        key = (self.url, content_hash(self.page_html))
+        article = self.engine.cached(key)
+        if article is None:
+            try:
+                article = extract_article(self.page_html, self.url)
+            except Exception as e:
+                print(f"[WARNING] Reader extraction failed for {self.url}: {e}")
+                article = None
+            self.engine.store(key, article)
+        self.engine._signals.done.emit(self.token, article)
+
+
+class ReaderEngine(QObject):
+    """
+    ``extract(url, html, callback)`` calls ``callback(article or None)`` on
+    the UI thread. Hashing and extraction run on the pool; the LRU of the
+    last ``cache_size`` articles is keyed by (url, content hash), so an
+    unchanged page is never parsed twice and a changed one is.
+    """
+
+    def __init__(self, cache_size: int = CACHE_SIZE, pool: QThreadPool = None, parent=None):
+        super().__init__(parent)
+        self.cache_size = cache_size
+        self.pool = pool or QThreadPool.globalInstance()
+        self.cache: 'OrderedDict[Tuple[str, str], Optional[Dict[str, Any]]]' = OrderedDict()
+        self._callbacks: Dict[int, Callable[[Optional[Dict[str, Any]]], None]] = {}
+        self._token = 0
+
+        self._signals = _ExtractSignals()
+        self._signals.done.connect(self._on_done)
+
+        self.stats = {
+            'requests': 0,
+            'cache_hits': 0,
+            'extractions': 0,
+            'last_extract_ms': 0.0
+        }
+
+    def cached(self, key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+        # Called from workers; OrderedDict operations are atomic under the GIL
+        article = self.cache.get(key)
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            self.stats['cache_hits'] += 1
+        return article
+
+    def store(self, key: Tuple[str, str], article: Optional[Dict[str, Any]]):
+        self.stats['extractions'] += 1
+        if article is not None:
+            self.stats['last_extract_ms'] = article['extract_ms']
+        self.cache[key] = article
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def extract(self, url: str, page_html: str, callback: Callable[[Optional[Dict[str, Any]]], None]):
+        self.stats['requests'] += 1
+        self._token += 1
+        self._callbacks[self._token] = callback
+        self.pool.start(_ExtractTask(self, self._token, url, page_html))
+
+    def _on_done(self, token: int, article: Optional[Dict[str, Any]]):
+        callback = self._callbacks.pop(token, None)
+        if callback is not None:
+            callback(article)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats['cached'] = len(self.cache)
+        return stats
+
+
+class ReaderView(QTextBrowser):
+    """
+    Reader document laid over a web view (a child covering it), so showing
+    and hiding it costs nothing and the page keeps its state and scroll
+    position. It hides itself when the view navigates away.
+    """
+
+    COLUMN_WIDTH = 800
+
+    def __init__(self, view: QWebEngineView, article: Dict[str, Any]):
+        super().__init__(view)
+        self.view = view
+        self.url = ''
+        self.setOpenLinks(False)
+        self.anchorClicked.connect(self.open_link)
+        self.set_article(article)
+        self.setGeometry(view.rect())
+        view.installEventFilter(self)
+        view.urlChanged.connect(self.on_url_changed)
+
+    def set_article(self, article: Dict[str, Any]):
+        self.url = article['url']
+        self.setHtml(article['html'])
+
+    @classmethod
+    def of(cls, view: QWebEngineView) -> Optional['ReaderView']:
+        return view.findChild(cls)
+
+    def open_link(self, url: QUrl):
+        if url.toString() == self.url:
+            self.hide()
+        elif url.scheme() in ('http', 'https'):
+            self.view.setUrl(url)
+        else:
+            QDesktopServices.openUrl(url)
+
+    def on_url_changed(self, url: QUrl):
+        if url.toString() != self.url:
+            self.hide()
+
+    def eventFilter(self, obj, event):
+        if obj is self.view and event.type() == QEvent.Resize:
+            self.setGeometry(self.view.rect())
+        return False
+
+    def resizeEvent(self, event):
+        # QTextDocument has no max-width: center the column with the margin
+        self.document().setDocumentMargin(max((self.width() - self.COLUMN_WIDTH) // 2, 40))
+        super().resizeEvent(event)
+
+
+# Global reader engine instance
+_reader_engine = None
+
+def get_reader_engine() -> ReaderEngine:
+    """Get global reader engine (the article cache is shared by all windows)"""
+    global _reader_engine
+    if _reader_engine is None:
+        _reader_engine = ReaderEngine()
+    return _reader_engine
+
+def cleanup_reader_engine():
+    """Drop global reader engine"""
+    global _reader_engine
+    _reader_engine = None
@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+"""
+Screenshot Pipeline
+Saves grabbed images off the UI thread (PNG or WebP encoding on a
+QThreadPool worker) and captures whole scrolled pages: the page is scrolled
+through runJavaScript, each viewport is grabbed on the UI thread and its
+rows are copied on a worker into a disk-backed NumPy memmap, which is then
+streamed out as PNG a block of rows at a time. Peak memory therefore stays
+around one viewport plus one row block, whatever the page height
+"""
+
+import os
+import struct
+import tempfile
+import time
+import zlib
+from typing import Any, Callable, Dict, Tuple
+
+import numpy as np
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+from PyQt5.QtGui import QImage, QImageWriter
+from PyQt5.QtWebEngineWidgets import QWebEngineView
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+PNG_BLOCK_ROWS = 256
+WEBP_MAX_SIZE = 16383
+WEBP_QUALITY = 90
+
+PAGE_METRICS_JS = """
+(function() {
+    var d = document.documentElement, b = document.body;
+    return [Math.max(d.scrollHeight, b ? b.scrollHeight : 0), window.innerHeight,
+            window.scrollX, window.scrollY];
+})()
+"""
+
+
+def image_format(fmt: str) -> str:
+    """``fmt`` if Qt has a writer for it, else PNG"""
+    fmt = fmt.lower()
+    if fmt != 'png' and fmt.encode() not in [bytes(f) for f in QImageWriter.supportedImageFormats()]:
+        return 'png'
+    return fmt
+
+
+def image_rows(image: QImage) -> np.ndarray:
+    """(height, width, 3) uint8 view of an RGB888 copy of ``image``"""
+    image = image.convertToFormat(QImage.Format_RGB888)
+    bits = image.constBits()
+    bits.setsize(image.sizeInBytes())
+    rows = np.frombuffer(bits, np.uint8).reshape(image.height(), image.bytesPerLine())
+    # Copy: the buffer belongs to ``image``, which is released on return
+    return rows[:, :image.width() * 3].reshape(image.height(), image.width(), 3).copy()
+
+
+def _png_chunk(f, kind: bytes, data: bytes):
+    f.write(struct.pack('>I', len(data)))
+    f.write(kind)
+    f.write(data)
+    f.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(kind)) & 0xffffffff))
+
+
+def write_png(path: str, pixels: np.ndarray, block_rows: int = PNG_BLOCK_ROWS, level: int = 6):
+    """
+    Stream an (height, width, 3) uint8 array (typically a memmap) to an RGB
+    PNG. Rows use the Sub filter, computed per block with NumPy, and are fed
+    to one zlib stream, so only ``block_rows`` rows are in memory at a time.
+    The file is written to a temporary name and renamed when complete.
+    """
+    height, width, _ = pixels.shape
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(PNG_SIGNATURE)
+        _png_chunk(f, b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+        compressor = zlib.compressobj(level)
+        for top in range(0, height, block_rows):
+            block = np.asarray(pixels[top:top + block_rows]).reshape(-1, width * 3)
+            filtered = np.empty((block.shape[0], width * 3 + 1), np.uint8)
+            filtered[:, 0] = 1
+            filtered[:, 1:4] = block[:, :3]
+            np.subtract(block[:, 3:], block[:, :-3], out=filtered[:, 4:])
+            data = compressor.compress(filtered.tobytes())
+            if data:
+                _png_chunk(f, b'IDAT', data)
+        _png_chunk(f, b'IDAT', compressor.flush())
+        _png_chunk(f, b'IEND', b'')
+    os.replace(temp_path, path)
+
+
+def save_image(image: QImage, path: str, fmt: str):
+    """Encode ``image`` to ``path`` via a temporary file (worker thread)"""
+    temp_path = path + '.tmp'
+    quality = WEBP_QUALITY if fmt == 'webp' else -1
+    if not image.save(temp_path, fmt.upper(), quality):
+        raise IOError(f"cannot encode {fmt.upper()}")
+    os.replace(temp_path, path)
+
+
+class _Task(QRunnable):
+    """Run ``job`` on a worker; report the outcome through the pipeline's signals"""
+
+    def __init__(self, pipeline: 'ScreenshotPipeline', path: str, job: Callable[[], None],
+                 report: bool = True):
+        super().__init__()
+        self.pipeline = pipeline
+        self.path = path
+        self.job = job
+        self.report = report
+
+    def run(self):
+        try:
+            self.job()
+        except Exception as e:
+            print(f"[WARNING] Screenshot {self.path} failed: {e}")
+            self.pipeline.failed.emit(self.path, str(e))
+            return
+        if self.report:
+            self.pipeline.saved.emit(self.path)
+
+
+class PageCapture(QObject):
+    """
+    Full-page capture of one view. Scrolling and grabbing happen on the UI
+    thread, one viewport every ``settle_ms`` (time for the page to repaint
+    after scrolling); copying tiles into the memmap and encoding run on the
+    pipeline's serial pool, in order. The original scroll position is
+    restored afterwards.
+    """
+
+    def __init__(self, pipeline: 'ScreenshotPipeline', view: QWebEngineView, path: str,
+                 fmt: str, settle_ms: int, max_height: int):
+        super().__init__(pipeline)
+        self.pipeline = pipeline
+        self.view = view
+        self.path = path
+        self.fmt = fmt
+        self.settle_ms = settle_ms
+        self.max_height = max_height
+
+        self.page_height = 0
+        self.viewport = 0
+        self.origin = (0, 0)
+        self.scale = 1.0
+        self.width = 0
+        self.height = 0
+        self.written = 0
+        self.tiles = 0
+        self.buffer_path = ''
+
+    def start(self):
+        self.view.page().runJavaScript(PAGE_METRICS_JS, self.on_metrics)
+
+    def on_metrics(self, metrics):
+        if not metrics or metrics[1] <= 0:
+            self.fail("не удалось получить размеры страницы")
+            return
+        page_height, viewport, x, y = (int(v) for v in metrics)
+        self.page_height = min(page_height, self.max_height)
+        self.viewport = viewport
+        self.origin = (x, y)
+        self.scroll_to(0)
+
+    def scroll_to(self, y: int):
+        self.view.page().runJavaScript(f"window.scrollTo(0, {y}); window.scrollY",
+                                       lambda actual: QTimer.singleShot(self.settle_ms,
+                                                                        lambda: self.grab_tile(int(actual or 0))))
+
+    def grab_tile(self, scroll_y: int):
+        try:
+            if not self.view.isVisible():
+                self.fail("вкладка была скрыта во время съемки")
+                return
+            image = self.view.grab().toImage()
+        except RuntimeError:
+            # The tab was closed mid-capture
+            self.fail("вкладка была закрыта во время съемки")
+            return
+
+        if not self.buffer_path:
+            # The first tile gives the device pixel scale and the output size
+            self.scale = image.height() / self.viewport
+            self.width = image.width()
+            self.height = max(int(round(self.page_height * self.scale)), image.height())
+            handle, self.buffer_path = tempfile.mkstemp(suffix='.rgb', dir=self.pipeline.temp_dir)
+            os.truncate(handle, self.height * self.width * 3)
+            os.close(handle)
+        elif image.width() != self.width:
+            self.fail("размер окна изменился во время съемки")
+            return
+
+        # The last viewport is clamped to the page bottom and overlaps the
+        # previous one: copy only the rows not written yet
+        offset = int(round(scroll_y * self.scale))
+        dest = max(self.written, offset)
+        source = dest - offset
+        count = min(image.height() - source, self.height - dest)
+        if count > 0:
+            self.pipeline.stitch(self.path, self.buffer_path, (self.height, self.width, 3),
+                                 image, source, dest, count)
+            self.written = dest + count
+            self.tiles += 1
+
+        next_y = scroll_y + self.viewport
+        if self.written >= self.height or count <= 0 or next_y * self.scale >= self.height:
+            self.finish()
+        else:
+            self.scroll_to(next_y)
+
+    def finish(self):
+        self.restore_scroll()
+        buffer_path, shape = self.buffer_path, (self.written, self.width, 3)
+        path, fmt = self.path, self.fmt
+
+        def encode():
+            try:
+                page = np.memmap(buffer_path, np.uint8, 'r', shape=shape)
+                if fmt == 'png' or max(shape[:2]) > WEBP_MAX_SIZE:
+                    write_png(path, page)
+                else:
+                    data = page.tobytes()
+                    image = QImage(data, shape[1], shape[0], shape[1] * 3, QImage.Format_RGB888)
+                    save_image(image, path, fmt)
+                del page
+            finally:
+                os.remove(buffer_path)
+
+        self.pipeline.stitch_pool.start(_Task(self.pipeline, path, encode))
+        self.pipeline.stats['page_tiles'] += self.tiles
+        self.deleteLater()
+
+    def fail(self, reason: str):
+        self.restore_scroll()
+        if self.buffer_path:
+            # Queued behind the pending tile copies, which still write to the buffer
+            buffer_path = self.buffer_path
+            self.pipeline.stitch_pool.start(_Task(self.pipeline, self.path,
+                                                  lambda: os.remove(buffer_path), report=False))
+        self.pipeline.failed.emit(self.path, reason)
+        self.deleteLater()
+
+    def restore_scroll(self):
+        try:
+            self.view.page().runJavaScript(f"window.scrollTo({self.origin[0]}, {self.origin[1]})")
+        except RuntimeError:
+            pass
+
+
+class ScreenshotPipeline(QObject):
+    """
+    ``save(image, path)`` encodes a grabbed image on a worker and emits
+    ``saved(path)`` (or ``failed(path, reason)``); ``capture_page(view, path)``
+    does the same for the whole scrolled page. Only the grab itself runs
+    on the UI thread.
+    """
+
+    saved = pyqtSignal(str)
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, temp_dir: str = None, settle_ms: int = 150, max_page_height: int = 60000,
+                 pool: QThreadPool = None, parent=None):
+        super().__init__(parent)
+        self.temp_dir = temp_dir or tempfile.gettempdir()
+        self.settle_ms = settle_ms
+        self.max_page_height = max_page_height
+        self.pool = pool or QThreadPool.globalInstance()
+
+        # Tile copies and the final encode of a page must run in order
+        self.stitch_pool = QThreadPool(self)
+        self.stitch_pool.setMaxThreadCount(1)
+
+        self.stats = {
+            'images': 0,
+            'pages': 0,
+            'page_tiles': 0,
+            'last_grab_ms': 0.0
+        }
+
+    def save(self, image: QImage, path: str, fmt: str = 'png'):
+        if image.isNull():
+            self.failed.emit(path, "пустое изображение")
+            return
+        fmt = image_format(fmt)
+        self.stats['images'] += 1
+        self.pool.start(_Task(self, path, lambda: save_image(image, path, fmt)))
+
+    def grab(self, widget, path: str, fmt: str = 'png'):
+        """Grab ``widget`` (on the UI thread) and save it off-thread"""
+        started = time.perf_counter()
+        image = widget.grab().toImage()
+        self.stats['last_grab_ms'] = (time.perf_counter() - started) * 1000
+        self.save(image, path, fmt)
+
+    def capture_page(self, view: QWebEngineView, path: str, fmt: str = 'png'):
+        self.stats['pages'] += 1
+        PageCapture(self, view, path, image_format(fmt), self.settle_ms, self.max_page_height).start()
+
+    def stitch(self, path: str, buffer_path: str, shape: Tuple[int, int, int], image: QImage, source: int, dest: int, count: int):
+        """Queue copying ``count`` rows of ``image`` into the page buffer file"""
+        def copy():
+            pixels = np.memmap(buffer_path, np.uint8, 'r+', shape=shape)
+            pixels[dest:dest + count] = image_rows(image)[source:source + count]
+            pixels.flush()
+
+        self.stitch_pool.start(_Task(self, path, copy, report=False))
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats['pending_stitch'] = self.stitch_pool.activeThreadCount()
+        return stats
@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+"""
+Session Save / Restore
+The open tabs of a window are written to the profile on close and come back
+on the next start as unloaded placeholders (see tab_discard). Only the
+active tab loads at once; the most recently used background tabs follow
+through a small queue, every other tab loads when it is activated, so
+starting with 200 saved tabs costs about as much as starting with one
+"""
+
+import base64
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from PyQt5.QtCore import QBuffer, QByteArray, QIODevice, QObject, QTimer
+from PyQt5.QtGui import QIcon, QPixmap
+from PyQt5.QtWebEngineWidgets import QWebEngineView
+from PyQt5.QtWidgets import QTabWidget
+
+from tab_discard import LAST_ACTIVE_PROPERTY, DiscardedTab, TabDiscarder, TabSnapshot, capture_view
+
+SESSION_VERSION = 1
+
+# Favicons are stored at tab size
+ICON_SIZE = 16
+
+# Set on the tab a window opens with; the restored session replaces it
+STARTUP_TAB_PROPERTY = 'session_startup_tab'
+
+
+# ----------------------------------------------------------------------
+# Serialization
+# ----------------------------------------------------------------------
+def encode_icon(icon: QIcon) -> str:
+    if icon is None or icon.isNull():
+        return ''
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.WriteOnly)
+    icon.pixmap(ICON_SIZE, ICON_SIZE).save(buffer, 'PNG')
+    return base64.b64encode(bytes(data)).decode('ascii')
+
+
+def decode_icon(text: str) -> QIcon:
+    if not text:
+        return QIcon()
+    pixmap = QPixmap()
+    pixmap.loadFromData(base64.b64decode(text), 'PNG')
+    return QIcon(pixmap)
+
+
+def wall_time(monotonic: Optional[float]) -> float:
+    """``LAST_ACTIVE_PROPERTY`` (monotonic) as a timestamp that survives a restart"""
+    if not monotonic:
+        return 0.0
+    return time.time() - (time.monotonic() - monotonic)
+
+
+def monotonic_time(timestamp: float) -> float:
+    if not timestamp:
+        return 0.0
+    return time.monotonic() - max(time.time() - timestamp, 0.0)
+
+
+def snapshot_to_dict(snapshot: TabSnapshot, last_active: float) -> Dict[str, Any]:
+    return {
+        'url': snapshot.url,
+        'title': snapshot.title,
+        'history': base64.b64encode(snapshot.history or b'').decode('ascii'),
+        'scroll': list(snapshot.scroll),
+        'zoom': snapshot.zoom,
+        'icon': encode_icon(snapshot.icon),
+        'last_active': last_active
+    }
+
+
+def snapshot_from_dict(data: Dict[str, Any]) -> Tuple[TabSnapshot, float]:
+    scroll = data.get('scroll') or (0, 0)
+    snapshot = TabSnapshot(
+        url=data.get('url', ''),
+        title=data.get('title', ''),
+        history=base64.b64decode(data.get('history') or ''),
+        scroll=(scroll[0], scroll[1]),
+        icon=decode_icon(data.get('icon', '')),
+        zoom=float(data.get('zoom') or 1.0)
+    )
+    return snapshot, float(data.get('last_active') or 0.0)
+
+
+def capture_tab(tab_widget: QTabWidget, index: int) -> Optional[TabSnapshot]:
+    """Snapshot of tab ``index``: live views are captured, placeholders keep theirs"""
+    widget = tab_widget.widget(index)
+    if isinstance(widget, DiscardedTab):
+        return widget.snapshot
+    if isinstance(widget, QWebEngineView) and not widget.url().isEmpty():
+        return capture_view(widget, tab_widget.tabText(index), tab_widget.tabIcon(index))
+    return None
+
+
+def capture_session(tab_widget: QTabWidget) -> Dict[str, Any]:
+    """JSON-ready session of ``tab_widget`` (must run on the UI thread)"""
+    tabs = []
+    active = 0
+    for i in range(tab_widget.count()):
+        snapshot = capture_tab(tab_widget, i)
+        if snapshot is None:
+            continue
+        if i == tab_widget.currentIndex():
+            active = len(tabs)
+        last_active = wall_time(tab_widget.widget(i).property(LAST_ACTIVE_PROPERTY))
+        tabs.append(snapshot_to_dict(snapshot, last_active))
+    return {'version': SESSION_VERSION, 'saved_at': time.time(), 'active': active, 'tabs': tabs}
+
+
+def parse_session(data: Any) -> Tuple[List[Tuple[TabSnapshot, float]], int]:
+    """(snapshots with their last activation timestamps, active index) of a saved session"""
+    if not isinstance(data, dict) or data.get('version') != SESSION_VERSION:
+        return [], 0
+    tabs = []
+    for entry in data.get('tabs') or []:
+        try:
+            snapshot, last_active = snapshot_from_dict(entry)
+        except (TypeError, ValueError, IndexError) as e:
+            print(f"[WARNING] Skipping saved tab: {e}")
+            continue
+        if snapshot.url:
+            tabs.append((snapshot, last_active))
+    active = data.get('active', 0)
+    if not isinstance(active, int) or not 0 <= active < len(tabs):
+        active = 0
+    return tabs, active
+
+
+# ----------------------------------------------------------------------
+# Restore
+# ----------------------------------------------------------------------
+class SessionRestorer(QObject):
+    """
+    Restores saved tabs into the tab widget of ``discarder``.
+
+    Every tab is added as a placeholder and the active one is loaded. Once
+    it has finished, up to ``background_limit`` of the most recently used
+    other tabs are loaded in the background, at most ``max_concurrent`` at
+    a time; the rest stay unloaded until they are activated.
+    """
+
+    def __init__(self, discarder: TabDiscarder, max_concurrent: int = 2,
+                 background_limit: int = 4, load_timeout_ms: int = 20000, parent=None):
+        super().__init__(parent)
+        self.discarder = discarder
+        self.tab_widget = discarder.tab_widget
+        self.max_concurrent = max_concurrent
+        self.background_limit = background_limit
+        self.load_timeout_ms = load_timeout_ms
+
+        self.queue: Deque[DiscardedTab] = deque()
+        self.loading: Dict[QWebEngineView, QTimer] = {}
+
+        self.stats = {
+            'tabs_restored': 0,
+            'background_loads': 0,
+            'load_timeouts': 0,
+            'last_restore_ms': 0.0
+        }
+
+    def restore(self, tabs: List[Tuple[TabSnapshot, float]], active: int = 0,
+                replace_blank: bool = True) -> int:
+        """Add ``tabs`` as placeholders, load ``active``; returns the number of tabs added"""
+        if not tabs:
+            return 0
+        started = time.perf_counter()
+
+        # The start-up tab (marked, or still empty) is replaced by the session
+        blank = []
+        if replace_blank:
+            blank = [widget for widget in map(self.tab_widget.widget, range(self.tab_widget.count()))
+                     if isinstance(widget, QWebEngineView)
+                     and (widget.property(STARTUP_TAB_PROPERTY) or widget.url().isEmpty())]
+
+        added = []
+        for snapshot, last_active in tabs:
+            index = self.discarder.add_placeholder(snapshot, last_active=monotonic_time(last_active))
+            added.append(self.tab_widget.widget(index))
+
+        active_tab = added[min(max(active, 0), len(added) - 1)]
+        self.tab_widget.setCurrentWidget(active_tab)
+        # The first placeholder may already have been current (no currentChanged)
+        view = self.discarder.restore(self.tab_widget.currentIndex()) or self.tab_widget.currentWidget()
+
+        # Removed only now, so that no other placeholder becomes current on the way
+        for widget in blank:
+            self.tab_widget.removeTab(self.tab_widget.indexOf(widget))
+            widget.deleteLater()
+
+        background = [widget for widget in added if widget is not active_tab]
+        background.sort(key=lambda widget: widget.property(LAST_ACTIVE_PROPERTY) or 0.0,
+                        reverse=True)
+        self.queue.extend(background[:self.background_limit])
+
+        if isinstance(view, QWebEngineView):
+            self._watch(view)
+        else:
+            self._pump()
+
+        self.stats['tabs_restored'] += len(tabs)
+        self.stats['last_restore_ms'] = (time.perf_counter() - started) * 1000
+        print(f"[INFO] Restored session: {len(tabs)} tabs in {self.stats['last_restore_ms']:.0f} ms")
+        return len(tabs)
+
+    def cancel(self):
+        """Stop background loading (tabs still load on activation)"""
+        self.queue.clear()
+
+    # ------------------------------------------------------------------
+    # Background queue
+    # ------------------------------------------------------------------
+    def _watch(self, view: QWebEngineView):
+        """Start the next load once ``view`` finished (or timed out)"""
+        timer = QTimer(self)
+        timer.setSingleShot(True)
+        timer.timeout.connect(lambda view=view: self._finished(view, timed_out=True))
+        timer.start(self.load_timeout_ms)
+        self.loading[view] = timer
+        view.loadFinished.connect(lambda ok, view=view: self._finished(view))
+
+    def _finished(self, view: QWebEngineView, timed_out: bool = False):
+        timer = self.loading.pop(view, None)
+        if timer is None:
+            return
+        timer.stop()
+        timer.deleteLater()
+        if timed_out:
+            self.stats['load_timeouts'] += 1
+        self._pump()
+
+    def _pump(self):
+        while self.queue and len(self.loading) < self.max_concurrent:
+            placeholder = self.queue.popleft()
+            try:
+                index = self.tab_widget.indexOf(placeholder)
+            except RuntimeError:
+                # Restored on activation and deleted meanwhile
+                continue
+            # Already activated or closed
+            if index < 0:
+                continue
+            view = self.discarder.restore(index)
+            if view is not None:
+                self.stats['background_loads'] += 1
+                self._watch(view)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats['queued'] = len(self.queue)
+        stats['loading'] = len(self.loading)
+        return stats
@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+"""
+Page Source Viewer
+QPlainTextEdit-based source view for multi-megabyte pages: a worker thread
+cuts the toHtml text into line-aligned chunks, the UI appends one chunk per
+event loop turn (a small first chunk, so the first screen shows at once),
+and the HTML highlighter only formats the blocks on screen, within a time
+budget per pass. Saving streams the text to disk from a worker
+"""
+
+import os
+import re
+import time
+from collections import deque
+from typing import Callable, Iterator, Optional
+
+from PyQt5.QtCore import QThread, QTimer, pyqtSignal
+from PyQt5.QtGui import QColor, QFont, QSyntaxHighlighter, QTextCharFormat, QTextCursor
+from PyQt5.QtWidgets import (QApplication, QDialog, QFileDialog, QHBoxLayout, QLabel,
+                             QPlainTextEdit, QPushButton, QVBoxLayout)
+
+FIRST_CHUNK_CHARS = 16 * 1024
+CHUNK_CHARS = 256 * 1024
+SAVE_CHUNK_CHARS = 1024 * 1024
+
+# Lines past this length (minified pages) are only highlighted up to it
+MAX_HIGHLIGHT_CHARS = 4000
+# Highlighting work per pass before yielding to the event loop
+HIGHLIGHT_BUDGET_MS = 8
+
+UNHIGHLIGHTED = -1
+IN_COMMENT = 1
+
+
+def iter_chunks(text: str, first: int = FIRST_CHUNK_CHARS, size: int = CHUNK_CHARS) -> Iterator[str]:
+    """Consecutive slices of ``text`` ending at a newline where there is one nearby"""
+    start = 0
+    limit = first
+    length = len(text)
+    while start < length:
+        end = min(start + limit, length)
+        if end < length:
+            newline = text.rfind('\n', start, end)
+            if newline > start:
+                end = newline + 1
+        yield text[start:end]
+        start = end
+        limit = size
+
+
+def write_text(path: str, text: str, size: int = SAVE_CHUNK_CHARS):
+    """Write ``text`` in slices via a temporary file, so a failed save leaves no partial file"""
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8', newline='') as f:
+        for start in range(0, len(text), size):
+            f.write(text[start:start + size])
+    os.replace(temp_path, path)
+
+
+class SourceChunker(QThread):
+    """Cuts the source into chunks off the UI thread"""
+
+    chunk_ready = pyqtSignal(str)
+
+    def __init__(self, text: str, parent=None):
+        super().__init__(parent)
+        self.text = text
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        for chunk in iter_chunks(self.text):
+            if self._cancelled:
+                return
+            self.chunk_ready.emit(chunk)
+
+
+class SourceSaveWorker(QThread):
+    save_finished = pyqtSignal(str)
+    save_failed = pyqtSignal(str)
+
+    def __init__(self, text: str, path: str, parent=None):
+        super().__init__(parent)
+        self.text = text
+        self.path = path
+
+    def run(self):
+        try:
+            write_text(self.path, self.text)
+        except Exception as e:
+            self.save_failed.emit(str(e))
+            return
+        self.save_finished.emit(self.path)
+
+
+def save_source(parent, text: str,
+                on_finished: Optional[Callable[[str], None]] = None,
+                on_failed: Optional[Callable[[str], None]] = None) -> Optional[SourceSaveWorker]:
+    """Ask for a file name and stream ``text`` to it; callbacks are connected before the worker starts"""
+    file_path, _ = QFileDialog.getSaveFileName(
+        parent, "Сохранить исходный код", "",
+        "HTML файлы (*.html);;Текстовые файлы (*.txt);;Все файлы (*.*)"
+    )
+    if not file_path:
+        return None
+    worker = SourceSaveWorker(text, file_path, parent)
+    if on_finished:
+        worker.save_finished.connect(on_finished)
+    if on_failed:
+        worker.save_failed.connect(on_failed)
+    worker.finished.connect(worker.deleteLater)
+    worker.start()
+    return worker
+
+
+class HtmlHighlighter(QSyntaxHighlighter):
+    """
+    HTML highlighting restricted to a window of block numbers set by the
+    viewer; blocks outside it are left plain (state UNHIGHLIGHTED) and
+    formatted when they scroll into view.
+    """
+
+    def __init__(self, document):
+        super().__init__(document)
+        self.first = 0
+        self.last = -1
+
+        tag_format = QTextCharFormat()
+        tag_format.setForeground(QColor(136, 18, 128))
+        attribute_format = QTextCharFormat()
+        attribute_format.setForeground(QColor(153, 69, 0))
+        value_format = QTextCharFormat()
+        value_format.setForeground(QColor(26, 26, 166))
+        self.comment_format = QTextCharFormat()
+        self.comment_format.setForeground(QColor(35, 110, 37))
+        self.comment_format.setFontItalic(True)
+
+        self.rules = [
+            (re.compile(r'&[a-zA-Z]+;|<[^>]*>'), tag_format),
+            (re.compile(r'\b[A-Za-z_:-]+(?==)'), attribute_format),
+            (re.compile(r'"[^"]*"|\'[^\']*\''), value_format)
+        ]
+
+    def highlightBlock(self, text):
+        number = self.currentBlock().blockNumber()
+        if not self.first <= number <= self.last:
+            self.setCurrentBlockState(UNHIGHLIGHTED)
+            return
+
+        text = text[:MAX_HIGHLIGHT_CHARS]
+        for pattern, fmt in self.rules:
+            for match in pattern.finditer(text):
+                self.setFormat(match.start(), match.end() - match.start(), fmt)
+
+        # Comments may span lines; an unhighlighted previous block counts as code
+        start = 0 if self.previousBlockState() == IN_COMMENT else text.find('<!--')
+        self.setCurrentBlockState(0)
+        while start >= 0:
+            end = text.find('-->', start)
+            if end < 0:
+                self.setFormat(start, len(text) - start, self.comment_format)
+                self.setCurrentBlockState(IN_COMMENT)
+                break
+            self.setFormat(start, end + 3 - start, self.comment_format)
+            start = text.find('<!--', end + 3)
+
+
+class SourceViewer(QPlainTextEdit):
+    """Read-only source view filled chunk by chunk; see the module docstring"""
+
+    loaded = pyqtSignal(float)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setReadOnly(True)
+        self.setUndoRedoEnabled(False)
+        self.setFont(QFont("Courier New", 10))
+        self.highlighter = HtmlHighlighter(self.document())
+
+        self.pending = deque()
+        self.chunker: Optional[SourceChunker] = None
+        self.started = 0.0
+        self.stats = {
+            'chunks': 0,
+            'first_screen_ms': 0.0,
+            'load_ms': 0.0,
+            'highlighted_blocks': 0
+        }
+
+        self.append_timer = QTimer(self)
+        self.append_timer.setInterval(0)
+        self.append_timer.timeout.connect(self.append_pending)
+
+        self.highlight_timer = QTimer(self)
+        self.highlight_timer.setSingleShot(True)
+        self.highlight_timer.setInterval(30)
+        self.highlight_timer.timeout.connect(self.highlight_visible)
+
+        self.verticalScrollBar().valueChanged.connect(self.highlight_timer.start)
+
+    def load(self, text: str):
+        self.cancel()
+        self.clear()
+        self.started = time.perf_counter()
+        self.stats.update(chunks=0, first_screen_ms=0.0, load_ms=0.0, highlighted_blocks=0)
+        self.chunker = SourceChunker(text, self)
+        self.chunker.chunk_ready.connect(self.on_chunk)
+        self.chunker.finished.connect(self.on_chunker_finished)
+        self.chunker.start()
+
+    def cancel(self):
+        if self.chunker is not None:
+            self.chunker.cancel()
+            self.chunker.wait()
+            self.chunker = None
+        self.pending.clear()
+        self.append_timer.stop()
+
+    def on_chunk(self, chunk: str):
+        self.pending.append(chunk)
+        if self.stats['chunks'] == 0 and len(self.pending) == 1:
+            # First screen right away, before the rest is queued behind it
+            self.append_pending()
+        elif not self.append_timer.isActive():
+            self.append_timer.start()
+
+    def on_chunker_finished(self):
+        if not self.pending:
+            self.finish_loading()
+
+    def append_pending(self):
+        if not self.pending:
+            self.append_timer.stop()
+            if self.chunker is not None and self.chunker.isFinished():
+                self.finish_loading()
+            return
+
+        # Insert at the end without moving the view: appendPlainText would
+        # follow the text while the view is still at its (empty) bottom
+        cursor = QTextCursor(self.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(self.pending.popleft())
+        self.stats['chunks'] += 1
+
+        if self.stats['chunks'] == 1:
+            self.highlight_visible()
+            self.stats['first_screen_ms'] = (time.perf_counter() - self.started) * 1000
+        elif not self.highlight_timer.isActive():
+            self.highlight_timer.start()
+
+    def finish_loading(self):
+        if self.chunker is not None:
+            self.stats['load_ms'] = (time.perf_counter() - self.started) * 1000
+            self.chunker = None
+            self.loaded.emit(self.stats['load_ms'])
+
+    def visible_range(self):
+        """Block numbers on screen plus one screen of margin on each side"""
+        block = self.firstVisibleBlock()
+        first = block.blockNumber()
+        height = self.viewport().height()
+        offset = self.contentOffset()
+        last = first
+        while block.isValid() and self.blockBoundingGeometry(block).translated(offset).top() <= height:
+            last = block.blockNumber()
+            block = block.next()
+        screen = last - first + 1
+        return max(first - screen, 0), last + screen
+
+    def highlight_visible(self):
+        highlighter = self.highlighter
+        highlighter.first, highlighter.last = self.visible_range()
+        started = time.perf_counter()
+        block = self.document().findBlockByNumber(highlighter.first)
+        while block.isValid() and block.blockNumber() <= highlighter.last:
+            if block.userState() == UNHIGHLIGHTED:
+                highlighter.rehighlightBlock(block)
+                self.stats['highlighted_blocks'] += 1
+                if (time.perf_counter() - started) * 1000 > HIGHLIGHT_BUDGET_MS:
+                    # Over budget: continue on the next turn of the event loop
+                    self.highlight_timer.start(0)
+                    return
+            block = block.next()
+        self.highlight_timer.setInterval(30)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.highlight_timer.start()
+
+
+class SourceDialog(QDialog):
+    """Исходный код страницы с копированием и сохранением"""
+
+    def __init__(self, html: str, parent=None, save_callback=None):
+        super().__init__(parent)
+        self.html = html
+        self.setWindowTitle("Исходный код страницы")
+        self.resize(800, 600)
+
+        layout = QVBoxLayout(self)
+        self.viewer = SourceViewer()
+        self.viewer.loaded.connect(self.on_loaded)
+        layout.addWidget(self.viewer)
+
+        buttons_layout = QHBoxLayout()
+        copy_btn = QPushButton("Копировать")
+        copy_btn.clicked.connect(lambda: QApplication.clipboard().setText(self.html))
+        buttons_layout.addWidget(copy_btn)
+        if save_callback is not None:
+            save_btn = QPushButton("Сохранить")
+            save_btn.clicked.connect(lambda: save_callback(self.html))
+            buttons_layout.addWidget(save_btn)
+        self.size_label = QLabel(f"{len(html):,} символов".replace(',', ' '))
+        buttons_layout.addWidget(self.size_label)
+        buttons_layout.addStretch()
+        close_btn = QPushButton("Закрыть")
+        close_btn.clicked.connect(self.close)
+        buttons_layout.addWidget(close_btn)
+        layout.addLayout(buttons_layout)
+
+        self.viewer.load(html)
+
+    def on_loaded(self, load_ms: float):
+        self.size_label.setText(f"{self.size_label.text()} · загружено за {load_ms:.0f} мс")
+
+    def done(self, result):
+        self.viewer.cancel()
+        super().done(result)
@@ -0,0 +1,436 @@
+# -*- coding: utf-8 -*-
+"""
+Omnibox Suggestion Engine
+Frecency-ranked URL suggestions backed by a sorted prefix index over URLs,
+hosts and title words, fed incrementally from visits and bookmarks
+"""
+
+import heapq
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex
+from PyQt5.QtWidgets import QCompleter
+
+# Frecency parameters
+HALF_LIFE_DAYS = 14.0
+BOOKMARK_BOOST = 5.0
+URL_PREFIX_BONUS = 2.0
+DECAY_PER_SECOND = -1.0 / (HALF_LIFE_DAYS * 86400.0)
+
+# Index tuning
+MAX_TITLE_WORDS = 8
+PENDING_MERGE_SIZE = 8192
+MIDDLE_MERGE_SIZE = 262144
+MAX_SCAN_KEYS = 1500
+HOT_PREFIX_LEN = 3
+HOT_LIST_SIZE = 64
+
+WORD_RE = re.compile(r'\w{2,}', re.UNICODE)
+SCHEME_RE = re.compile(r'^[a-z][a-z0-9+.-]*://')
+
+
+def frecency(visit_count: int, last_visit: float, now: float) -> float:
+    """Visit count decayed by the age of the last visit (half-life HALF_LIFE_DAYS)"""
+    if not last_visit:
+        return 0.0
+    return visit_count * 2.0 ** ((now - last_visit) * DECAY_PER_SECOND)
+
+
+def url_key(url: str) -> str:
+    """URL without scheme and leading 'www.', lowercased"""
+    key = SCHEME_RE.sub('', url.lower(), count=1)
+    if key.startswith('www.'):
+        key = key[4:]
+    return key
+
+
+class SuggestionEntry:
+    __slots__ = ('id', 'url', 'key', 'title', 'visit_count', 'last_visit', 'bookmarked', 'keys')
+
+    def __init__(self, entry_id: int, url: str):
+        self.id = entry_id
+        self.url = url
+        self.key = url_key(url)
+        self.title = ''
+        self.visit_count = 0
+        self.last_visit = 0.0
+        self.bookmarked = False
+        self.keys: Tuple[str, ...] = ()
+
+    def frecency(self, now: float) -> float:
+        score = frecency(self.visit_count, self.last_visit, now)
+        if self.bookmarked:
+            score += BOOKMARK_BOOST
+        return score
+
+
+class SuggestionIndex:
+    """
+    Sorted prefix index over URL, host and title-word keys.
+
+    Keys live in three sorted runs (main, middle, pending): new keys are
+    insorted into the small pending run, which is merged into the middle run
+    past ``PENDING_MERGE_SIZE``; only the middle run is ever merged into the
+    main one, so incremental adds almost never touch the whole index. Short prefixes (up to ``HOT_PREFIX_LEN``)
+    are served from bounded per-prefix hot lists because their key ranges
+    are huge.
+    """
+
+    def __init__(self):
+        self.entries: Dict[str, SuggestionEntry] = {}
+        self.by_id: Dict[int, SuggestionEntry] = {}
+        self.keys: List[Tuple[str, int]] = []
+        self.middle: List[Tuple[str, int]] = []
+        self.pending: List[Tuple[str, int]] = []
+        self.hot: Dict[str, Dict[int, float]] = {}
+        self.next_id = 1
+        self.merges = 0
+
+    def get_or_create(self, url: str) -> SuggestionEntry:
+        entry = self.entries.get(url)
+        if entry is None:
+            entry = SuggestionEntry(self.next_id, url)
+            self.next_id += 1
+            self.entries[url] = entry
+            self.by_id[entry.id] = entry
+        return entry
+
+    @staticmethod
+    def make_keys(entry: SuggestionEntry) -> Tuple[str, ...]:
+        keys = [entry.key]
+
+        host = entry.key.split('/', 1)[0]
+        labels = host.split('.')
+        for i in range(1, len(labels) - 1):
+            keys.append('.'.join(labels[i:]))
+
+        for word in WORD_RE.findall(entry.title.lower())[:MAX_TITLE_WORDS]:
+            keys.append(word)
+        return tuple(dict.fromkeys(keys))
+
+    @staticmethod
+    def prefixes(entry: SuggestionEntry) -> set:
+        result = set()
+        for key in entry.keys:
+            for n in range(1, min(HOT_PREFIX_LEN, len(key)) + 1):
+                result.add(key[:n])
+        return result
+
+    def index(self, entry: SuggestionEntry, bulk: bool = False):
+        """(Re)index an entry; ``bulk`` appends unsorted and skips hot lists"""
+        new_keys = [k for k in self.make_keys(entry) if k not in entry.keys]
+        if new_keys:
+            entry.keys = entry.keys + tuple(new_keys)
+        for key in new_keys:
+            if bulk:
+                self.keys.append((key, entry.id))
+            else:
+                insort(self.pending, (key, entry.id))
+        if not bulk:
+            if len(self.pending) > PENDING_MERGE_SIZE:
+                # Two sorted runs: timsort merges them in linear time
+                self.middle.extend(self.pending)
+                self.middle.sort()
+                self.pending = []
+                self.merges += 1
+                if len(self.middle) > MIDDLE_MERGE_SIZE:
+                    self.keys.extend(self.middle)
+                    self.keys.sort()
+                    self.middle = []
+            self.update_hot(entry)
+
+    def update_hot(self, entry: SuggestionEntry):
+        score = entry.frecency(time.time())
+        for prefix in self.prefixes(entry):
+            bucket = self.hot.setdefault(prefix, {})
+            bucket[entry.id] = score
+            if len(bucket) > HOT_LIST_SIZE * 2:
+                keep = heapq.nlargest(HOT_LIST_SIZE, bucket.items(), key=lambda item: item[1])
+                self.hot[prefix] = dict(keep)
+
+    def finish_bulk(self):
+        """Sort bulk-appended keys and build the hot lists in one pass"""
+        self.keys.sort()
+        now = time.time()
+        buckets: Dict[str, List[Tuple[float, int]]] = {}
+        for entry in self.entries.values():
+            score = entry.frecency(now)
+            for prefix in self.prefixes(entry):
+                buckets.setdefault(prefix, []).append((score, entry.id))
+        self.hot = {
+            prefix: {entry_id: score for score, entry_id in heapq.nlargest(HOT_LIST_SIZE, items)}
+            for prefix, items in buckets.items()
+        }
+
+    def scan(self, prefix: str, budget: int) -> set:
+        candidates = set()
+        for keys in (self.pending, self.middle, self.keys):
+            i = bisect_left(keys, (prefix, 0))
+            n = len(keys)
+            while i < n and budget > 0:
+                key, entry_id = keys[i]
+                if not key.startswith(prefix):
+                    break
+                candidates.add(entry_id)
+                i += 1
+                budget -= 1
+        return candidates
+
+
+class SuggestionEngine:
+    """
+    Frecency-ranked suggestions for the URL bar.
+
+    frecency = visit_count * 2^(-age / HALF_LIFE_DAYS) + bookmark boost, with
+    a bonus when the query is a prefix of the URL itself. The top ``limit``
+    results are selected with a bounded heap. Bulk (re)loads build a fresh
+    index off-lock and swap it in, replaying visits that arrived meanwhile.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._index = SuggestionIndex()
+        self._loading = False
+        self._replay: List[tuple] = []
+        self.loaded = False
+
+        self.stats = {
+            'queries': 0,
+            'last_query_ms': 0.0,
+            'max_query_ms': 0.0,
+            'entries': 0
+        }
+
+    # ------------------------------------------------------------------
+    # Feeding
+    # ------------------------------------------------------------------
+    def load(self, rows: Iterable[Tuple[str, str, int, float]], bookmarks: Iterable[Dict[str, Any]] = ()):
+        """Bulk load (url, title, visit_count, last_visit_time) rows plus bookmarks"""
+        self._begin_load()
+        self._build(rows, bookmarks)
+
+    def _begin_load(self):
+        """Start buffering live updates; must run before the rows are read"""
+        with self._lock:
+            self._loading = True
+            self._replay = []
+
+    def _build(self, rows: Iterable[Tuple[str, str, int, float]], bookmarks: Iterable[Dict[str, Any]]):
+        index = SuggestionIndex()
+        for url, title, visit_count, last_visit in rows:
+            entry = index.get_or_create(url)
+            entry.title = title or ''
+            entry.visit_count = visit_count
+            entry.last_visit = last_visit
+            index.index(entry, bulk=True)
+        for bookmark in bookmarks:
+            url = bookmark.get('url')
+            if url:
+                entry = index.get_or_create(url)
+                entry.bookmarked = True
+                if not entry.title:
+                    entry.title = bookmark.get('title', '')
+                index.index(entry, bulk=True)
+        index.finish_bulk()
+
+        with self._lock:
+            self._index = index
+            self._loading = False
+            replay, self._replay = self._replay, []
+            for method, args in replay:
+                method(*args)
+            self.loaded = True
+            self.stats['entries'] = len(index.entries)
+
+    def load_from_store(self, store, bookmarks: Iterable[Dict[str, Any]] = ()):
+        # Buffering starts before the query so visits landing while it runs are replayed
+        self._begin_load()
+        try:
+            rows = store.query("SELECT url, title, visit_count, last_visit_time FROM urls")
+        except Exception:
+            with self._lock:
+                self._loading = False
+                self._replay = []
+            raise
+        self._build(rows, bookmarks)
+
+    def load_async(self, store, bookmarks: Iterable[Dict[str, Any]] = ()) -> threading.Thread:
+        """Build the index on a background thread; the previous index keeps serving meanwhile"""
+        bookmarks = list(bookmarks)
+        thread = threading.Thread(target=self.load_from_store, args=(store, bookmarks), daemon=True)
+        thread.start()
+        return thread
+
+    def reload(self, store, bookmarks: Iterable[Dict[str, Any]] = ()) -> threading.Thread:
+        """Rebuild from the store (after deletes / clears)"""
+        return self.load_async(store, bookmarks)
+
+    def add_visit(self, url: str, title: str = '', visit_time: Optional[float] = None):
+        with self._lock:
+            if self._loading:
+                self._replay.append((self.add_visit, (url, title, visit_time or time.time())))
+            index = self._index
+            entry = index.get_or_create(url)
+            if title:
+                entry.title = title
+            entry.visit_count += 1
+            entry.last_visit = visit_time or time.time()
+            index.index(entry)
+            self.stats['entries'] = len(index.entries)
+
+    def set_bookmarks(self, bookmarks: Iterable[Dict[str, Any]]):
+        """Sync bookmark flags with the current bookmark list"""
+        urls = {}
+        for bookmark in bookmarks:
+            if bookmark.get('url'):
+                urls[bookmark['url']] = bookmark.get('title', '')
+
+        with self._lock:
+            if self._loading:
+                self._replay.append((self.set_bookmarks, ([{'url': u, 'title': t} for u, t in urls.items()],)))
+            index = self._index
+            for entry in index.entries.values():
+                if entry.bookmarked and entry.url not in urls:
+                    entry.bookmarked = False
+                    index.update_hot(entry)
+            for url, title in urls.items():
+                entry = index.get_or_create(url)
+                if not entry.bookmarked:
+                    entry.bookmarked = True
+                    if not entry.title:
+                        entry.title = title
+                    index.index(entry)
+
+    def remove(self, url: str):
+        with self._lock:
+            entry = self._index.entries.pop(url, None)
+            if entry:
+                self._index.by_id.pop(entry.id, None)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def suggest(self, query: str, limit: int = 8) -> List[Dict[str, Any]]:
+        """Top ``limit`` entries for ``query`` ranked by frecency"""
+        started = time.perf_counter()
+        query = url_key(query.strip())
+        if not query:
+            return []
+
+        with self._lock:
+            index = self._index
+            if len(query) <= HOT_PREFIX_LEN:
+                candidates = index.hot.get(query, {})
+            else:
+                candidates = index.scan(query, MAX_SCAN_KEYS)
+
+            now = time.time()
+            by_id = index.by_id
+            scored = []
+            for entry_id in candidates:
+                entry = by_id.get(entry_id)
+                if entry is None:
+                    continue
+                value = entry.frecency(now)
+                if entry.key.startswith(query):
+                    value *= URL_PREFIX_BONUS
+                scored.append((value, entry_id))
+
+            top = [by_id[entry_id] for _score, entry_id in heapq.nlargest(limit, scored)]
+            results = [{
+                'type': 'bookmark' if entry.bookmarked else 'history',
+                'title': entry.title,
+                'url': entry.url,
+                'icon': '📁' if entry.bookmarked else '🕐',
+                'visit_count': entry.visit_count
+            } for entry in top]
+
+        elapsed = (time.perf_counter() - started) * 1000
+        self.stats['queries'] += 1
+        self.stats['last_query_ms'] = elapsed
+        self.stats['max_query_ms'] = max(self.stats['max_query_ms'], elapsed)
+        return results
+
+
+class SuggestionModel(QAbstractListModel):
+    """List model for QCompleter: display 'title — url', edit role is the URL"""
+
+    def __init__(self, engine: SuggestionEngine, limit: int = 8, parent=None):
+        super().__init__(parent)
+        self.engine = engine
+        self.limit = limit
+        self._rows: List[Dict[str, Any]] = []
+
+    def update_query(self, text: str):
+        self.beginResetModel()
+        self._rows = self.engine.suggest(text, self.limit) if len(text.strip()) >= 1 else []
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+        row = self._rows[index.row()]
+        if role == Qt.DisplayRole:
+            title = row['title'] or row['url']
+            return f"{row['icon']} {title} — {row['url']}"
+        if role == Qt.EditRole:
+            return row['url']
+        if role == Qt.ToolTipRole:
+            return row['url']
+        return None
+
+
+class SuggestionCompleter(QCompleter):
+    """QCompleter that asks the suggestion engine on every edit instead of filtering itself"""
+
+    def __init__(self, line_edit, engine: SuggestionEngine, limit: int = 8):
+        self.suggestion_model = SuggestionModel(engine, limit)
+        super().__init__(self.suggestion_model, line_edit)
+        self.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.setCompletionRole(Qt.EditRole)
+        self.setCaseSensitivity(Qt.CaseInsensitive)
+        line_edit.setCompleter(self)
+        line_edit.textEdited.connect(self.on_text_edited)
+
+    def on_text_edited(self, text):
+        self.suggestion_model.update_query(text)
+        if self.suggestion_model.rowCount():
+            self.complete()
+        else:
+            self.popup().hide()
+
+
+# Global suggestion engine instance
+_suggestion_engine = None
+
+def get_suggestion_engine() -> SuggestionEngine:
+    """
+    Get global suggestion engine; the first call starts building the index
+    in the background and subscribes it to profile data changes
+    """
+    global _suggestion_engine
+    if _suggestion_engine is None:
+        from profile_data import get_profile_data
+
+        profile_data = get_profile_data()
+        engine = SuggestionEngine()
+        engine.load_async(profile_data.history_store, profile_data.bookmark_list())
+
+        profile_data.history_visit_added.connect(
+            lambda entry: engine.add_visit(entry['url'], entry.get('title', ''))
+        )
+        profile_data.bookmarks_changed.connect(
+            lambda: engine.set_bookmarks(profile_data.bookmark_list())
+        )
+        profile_data.history_changed.connect(
+            lambda: engine.reload(profile_data.history_store, profile_data.bookmark_list())
+        )
+        _suggestion_engine = engine
+    return _suggestion_engine
@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+"""
+Background Tab Discarding
+Least-recently-used background tabs are replaced by a lightweight
+placeholder: URL, title, navigation history (QWebEngineHistory through
+QDataStream), scroll position and favicon are captured, the QWebEngineView
+(and with it its renderer process) is destroyed, and the view is recreated
+transparently when the tab is activated again
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import psutil
+from PyQt5.QtCore import QByteArray, QDataStream, QIODevice, QTimer, QUrl, Qt
+from PyQt5.QtGui import QIcon
+from PyQt5.QtWidgets import QLabel, QTabWidget, QVBoxLayout, QWidget
+from PyQt5.QtWebEngineWidgets import QWebEngineView
+
+# Dynamic property holding the last activation time of a tab widget
+LAST_ACTIVE_PROPERTY = 'discard_last_active'
+
+# Renderer processes exit asynchronously; RSS is sampled again after this delay
+RSS_SETTLE_MS = 1500
+
+
+def process_tree_rss() -> int:
+    """RSS of the browser process plus its children (QtWebEngineProcess renderers)"""
+    try:
+        process = psutil.Process()
+        total = process.memory_info().rss
+        for child in process.children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+        return total
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return 0
+
+
+def save_history(view: QWebEngineView) -> bytes:
+    data = QByteArray()
+    stream = QDataStream(data, QIODevice.WriteOnly)
+    stream << view.history()
+    return bytes(data)
+
+
+def load_history(view: QWebEngineView, blob: bytes) -> bool:
+    """Restore the back/forward list; Qt navigates to its current entry"""
+    if not blob:
+        return False
+    stream = QDataStream(QByteArray(blob), QIODevice.ReadOnly)
+    stream >> view.history()
+    return stream.status() == QDataStream.Ok
+
+
+@dataclass
+class TabSnapshot:
+    url: str
+    title: str
+    history: bytes
+    scroll: Tuple[float, float]
+    icon: QIcon
+    zoom: float = 1.0
+    discarded_at: float = field(default_factory=time.time)
+    rss_reclaimed: Optional[int] = None
+    # Casefolded page text, searched by cross-tab find
+    text: str = ''
+
+
+def capture_view(view: QWebEngineView, title: str = '', icon: Optional[QIcon] = None,
+                 text: str = '') -> TabSnapshot:
+    """Snapshot of a live view; ``title``/``icon`` are the tab's, used while the page has none"""
+    scroll = view.page().scrollPosition()
+    return TabSnapshot(
+        url=view.url().toString(),
+        title=view.title() or title,
+        history=save_history(view),
+        scroll=(scroll.x(), scroll.y()),
+        icon=view.icon() if not view.icon().isNull() or icon is None else icon,
+        zoom=view.zoomFactor(),
+        text=text
+    )
+
+
+class DiscardedTab(QWidget):
+    """Placeholder kept in the tab widget instead of a discarded view"""
+
+    def __init__(self, snapshot: TabSnapshot, parent=None):
+        super().__init__(parent)
+        self.snapshot = snapshot
+
+        layout = QVBoxLayout(self)
+        layout.addStretch()
+        title = QLabel(snapshot.title or snapshot.url)
+        title.setAlignment(Qt.AlignCenter)
+        title.setStyleSheet("font-size: 16px; font-weight: bold; color: #2c3e50;")
+        url = QLabel(snapshot.url)
+        url.setAlignment(Qt.AlignCenter)
+        url.setStyleSheet("color: #7f8c8d;")
+        layout.addWidget(title)
+        layout.addWidget(url)
+        layout.addStretch()
+
+    def url(self) -> QUrl:
+        return QUrl(self.snapshot.url)
+
+    def title(self) -> str:
+        return self.snapshot.title
+
+
+class TabDiscarder:
+    """
+    Discards background tabs of ``tab_widget`` once more than
+    ``max_live_tabs`` views are alive or the process tree RSS exceeds
+    ``memory_limit_mb``. ``create_view()`` builds a fresh, wired-up view for
+    restores. ``page_text(view)`` supplies the text kept in the snapshot
+    for cross-tab find. The current tab and tabs playing audio are never
+    discarded.
+    """
+
+    def __init__(self, tab_widget: QTabWidget, create_view: Callable[[], QWebEngineView],
+                 max_live_tabs: int = 20, memory_limit_mb: Optional[int] = None,
+                 on_reclaimed: Optional[Callable[[TabSnapshot], None]] = None,
+                 page_text: Optional[Callable[[QWebEngineView], str]] = None):
+        self.tab_widget = tab_widget
+        self.create_view = create_view
+        self.page_text = page_text
+        self.set_limits(max_live_tabs, memory_limit_mb)
+        self.on_reclaimed = on_reclaimed
+        self._restoring = False
+        self._settling = 0
+
+        self.stats = {
+            'discards': 0,
+            'restores': 0,
+            'restore_failures': 0,
+            'rss_reclaimed_bytes': 0,
+            'last_rss_reclaimed': 0
+        }
+
+        tab_widget.currentChanged.connect(self.on_current_changed)
+        self.touch(tab_widget.currentWidget())
+
+    def set_limits(self, max_live_tabs: int, memory_limit_mb: Optional[int] = None):
+        self.max_live_tabs = max_live_tabs
+        self.memory_limit = memory_limit_mb * 1024 * 1024 if memory_limit_mb else None
+
+    # ------------------------------------------------------------------
+    # Bookkeeping
+    # ------------------------------------------------------------------
+    def touch(self, widget: Optional[QWidget]):
+        if widget is not None:
+            widget.setProperty(LAST_ACTIVE_PROPERTY, time.monotonic())
+
+    def live_views(self) -> List[Tuple[int, QWebEngineView]]:
+        return [(i, self.tab_widget.widget(i)) for i in range(self.tab_widget.count())
+                if isinstance(self.tab_widget.widget(i), QWebEngineView)]
+
+    def discarded_count(self) -> int:
+        return sum(1 for i in range(self.tab_widget.count())
+                   if isinstance(self.tab_widget.widget(i), DiscardedTab))
+
+    def _discardable(self, view: QWebEngineView) -> bool:
+        if view is self.tab_widget.currentWidget():
+            return False
+        page = view.page()
+        if page is None or page.recentlyAudible():
+            return False
+        # A tab that never navigated has nothing to restore
+        return not view.url().isEmpty()
+
+    def candidates(self) -> List[Tuple[int, QWebEngineView]]:
+        """Discardable tabs, least recently used first"""
+        views = [(i, view) for i, view in self.live_views() if self._discardable(view)]
+        views.sort(key=lambda item: item[1].property(LAST_ACTIVE_PROPERTY) or 0.0)
+        return views
+
+    def over_memory_limit(self) -> bool:
+        return bool(self.memory_limit) and process_tree_rss() > self.memory_limit
+
+    # ------------------------------------------------------------------
+    # Discard / restore
+    # ------------------------------------------------------------------
+    def enforce(self) -> int:
+        """Discard LRU background tabs down to the limits; returns the number discarded"""
+        candidates = self.candidates()
+        excess = len(self.live_views()) - self.max_live_tabs
+
+        # Over the memory limit: one more tab per call, and only once the RSS
+        # of earlier discards has settled (renderers exit asynchronously)
+        if excess <= 0 and not self._settling and self.over_memory_limit():
+            excess = 1
+
+        discarded = 0
+        # Indexes stay valid: discarding replaces a tab in place
+        for index, _view in candidates[:max(excess, 0)]:
+            if self.discard(index):
+                discarded += 1
+        return discarded
+
+    def capture(self, view: QWebEngineView, index: int) -> TabSnapshot:
+        text = self.page_text(view) if self.page_text else ''
+        return capture_view(view, self.tab_widget.tabText(index), self.tab_widget.tabIcon(index), text)
+
+    def add_placeholder(self, snapshot: TabSnapshot, index: int = -1,
+                        last_active: Optional[float] = None) -> int:
+        """
+        Insert an unloaded tab for ``snapshot`` (session restore, reopening
+        closed tabs); it is loaded like a discarded tab when activated
+        """
+        placeholder = DiscardedTab(snapshot)
+        placeholder.setProperty(LAST_ACTIVE_PROPERTY, last_active or 0.0)
+        self._restoring = True
+        try:
+            index = self.tab_widget.insertTab(index, placeholder, snapshot.icon,
+                                              snapshot.title or snapshot.url)
+        finally:
+            self._restoring = False
+        self.tab_widget.setTabToolTip(index, snapshot.url)
+        return index
+
+    def _replace(self, index: int, widget: QWidget, icon: QIcon, title: str):
+        current = self.tab_widget.currentIndex()
+        old = self.tab_widget.widget(index)
+        self._restoring = True
+        try:
+            self.tab_widget.removeTab(index)
+            self.tab_widget.insertTab(index, widget, icon, title)
+            if current == index:
+                self.tab_widget.setCurrentIndex(index)
+        finally:
+            self._restoring = False
+        return old
+
+    def discard(self, index: int) -> Optional[TabSnapshot]:
+        view = self.tab_widget.widget(index)
+        if not isinstance(view, QWebEngineView) or view is self.tab_widget.currentWidget():
+            return None
+
+        snapshot = self.capture(view, index)
+        rss_before = process_tree_rss()
+
+        placeholder = DiscardedTab(snapshot)
+        placeholder.setProperty(LAST_ACTIVE_PROPERTY, view.property(LAST_ACTIVE_PROPERTY))
+        self._replace(index, placeholder, snapshot.icon, self.tab_widget.tabText(index))
+        self.tab_widget.setTabToolTip(index, snapshot.url)
+
+        view.stop()
+        view.setParent(None)
+        view.deleteLater()
+        self.stats['discards'] += 1
+
+        self._settling += 1
+        QTimer.singleShot(RSS_SETTLE_MS, lambda: self._record_reclaimed(snapshot, rss_before))
+        return snapshot
+
+    def _record_reclaimed(self, snapshot: TabSnapshot, rss_before: int):
+        self._settling -= 1
+        reclaimed = max(rss_before - process_tree_rss(), 0)
+        snapshot.rss_reclaimed = reclaimed
+        self.stats['rss_reclaimed_bytes'] += reclaimed
+        self.stats['last_rss_reclaimed'] = reclaimed
+        print(f"[INFO] Discarded tab {snapshot.url}: {reclaimed / 1024 / 1024:.1f} MB reclaimed")
+        if self.on_reclaimed:
+            self.on_reclaimed(snapshot)
+
+    def restore(self, index: int) -> Optional[QWebEngineView]:
+        placeholder = self.tab_widget.widget(index)
+        if not isinstance(placeholder, DiscardedTab):
+            return None
+        snapshot = placeholder.snapshot
+
+        view = self.create_view()
+        view.setZoomFactor(snapshot.zoom)
+        if not load_history(view, snapshot.history):
+            self.stats['restore_failures'] += 1
+            view.setUrl(placeholder.url())
+
+        x, y = snapshot.scroll
+        if x or y:
+            def restore_scroll(ok, view=view):
+                view.loadFinished.disconnect(restore_scroll)
+                if ok:
+                    view.page().runJavaScript(f"window.scrollTo({x}, {y});")
+            view.loadFinished.connect(restore_scroll)
+
+        self._replace(index, view, snapshot.icon, self.tab_widget.tabText(index))
+        self.tab_widget.setTabToolTip(index, '')
+        self.touch(view)
+        placeholder.deleteLater()
+        self.stats['restores'] += 1
+        return view
+
+    def on_current_changed(self, index: int):
+        if self._restoring or index < 0:
+            return
+        widget = self.tab_widget.widget(index)
+        if isinstance(widget, DiscardedTab):
+            widget = self.restore(index)
+        self.touch(widget)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats['live_tabs'] = len(self.live_views())
+        stats['discarded_tabs'] = self.discarded_count()
+        return stats
@@ -0,0 +1,382 @@
+# -*- coding: utf-8 -*-
+"""
+Cross-Tab Find
+Finds which open tab contains a text. The visible text of every page
+(document.body.innerText) is extracted once per load and kept casefolded
+in memory; discarded tabs are searched through the text saved in their
+snapshot. Queries scan these texts on a QThreadPool worker and stream
+ranked results, batch by batch, into a panel; tabs whose text is still
+being extracted are searched as soon as it arrives
+"""
+
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QTimer, Qt, pyqtSignal
+from PyQt5.QtWebEngineWidgets import QWebEngineView
+from PyQt5.QtWidgets import (QLabel, QLineEdit, QListWidget, QListWidgetItem, QTabWidget,
+                             QVBoxLayout, QWidget)
+
+from tab_discard import DiscardedTab
+
+PAGE_TEXT_JS = "document.body ? document.body.innerText : ''"
+
+# Longer pages are indexed up to this many characters
+MAX_PAGE_TEXT = 500000
+SNIPPET_CHARS = 60
+SEARCH_BATCH = 16
+
+ResultRole = Qt.UserRole
+
+
+class PageText:
+    """Extracted text of one page load, kept only casefolded"""
+
+    __slots__ = ('load_id', 'url', 'title', 'folded')
+
+    def __init__(self, load_id: int, url: str, title: str, text: str):
+        self.load_id = load_id
+        self.url = url
+        self.title = title
+        self.folded = text.casefold()
+
+
+def snippet(folded: str, position: int) -> str:
+    start = max(position - SNIPPET_CHARS // 2, 0)
+    part = ' '.join(folded[start:start + SNIPPET_CHARS * 2].split())
+    return ('…' if start else '') + part + ('…' if start + SNIPPET_CHARS * 2 < len(folded) else '')
+
+
+def match_document(terms: List[str], title: str, url: str, folded: str) -> Optional[Dict[str, Any]]:
+    """Score of a tab for ``terms`` (all must occur in its title, URL or text), or None"""
+    folded_title = title.casefold()
+    folded_url = url.casefold()
+    score = 0.0
+    count = 0
+    first = -1
+    for term in terms:
+        in_title = term in folded_title
+        in_url = term in folded_url
+        position = folded.find(term)
+        if position < 0 and not in_title and not in_url:
+            return None
+        if position >= 0:
+            hits = folded.count(term)
+            count += hits
+            score += min(hits, 20)
+            if first < 0 or position < first:
+                first = position
+        score += 10 * in_title + 5 * in_url
+    return {
+        'score': score,
+        'count': count,
+        'snippet': snippet(folded, first) if first >= 0 else ''
+    }
+
+
+class _SearchSignals(QObject):
+    results = pyqtSignal(int, object)
+    done = pyqtSignal(int, float)
+
+
+class _SearchTask(QRunnable):
+    """Scan ``documents`` (key, title, url, folded text) for one query generation"""
+
+    def __init__(self, engine: 'TabSearchEngine', generation: int, terms: List[str],
+                 documents: List[Tuple[int, str, str, str]], final: bool):
+        super().__init__()
+        self.engine = engine
+        self.generation = generation
+        self.terms = terms
+        self.documents = documents
+        self.final = final
+
+    def run(self):
+        started = time.perf_counter()
+        batch = []
+        for key, title, url, folded in self.documents:
+            if self.engine._generation != self.generation:
+                return
+            match = match_document(self.terms, title, url, folded)
+            if match is not None:
+                match.update(key=key, title=title, url=url)
+                batch.append(match)
+            if len(batch) >= SEARCH_BATCH:
+                self.engine._signals.results.emit(self.generation, batch)
+                batch = []
+        if batch:
+            self.engine._signals.results.emit(self.generation, batch)
+        if self.final:
+            self.engine._signals.done.emit(self.generation, (time.perf_counter() - started) * 1000)
+
+
+class TabSearchEngine(QObject):
+    """
+    ``watch(tab_widget)`` registers a window's tabs; ``watch_view(view)``
+    extracts the page text ``extract_delay_ms`` after each load (views not
+    watched are picked up at their first search). ``search(query)`` emits
+    ``results_found(list)`` in batches, then ``search_finished(count, ms)``;
+    a newer query drops the batches of older ones. Results carry ``key``,
+    resolved back to the tab with ``locate(key)``.
+    """
+
+    results_found = pyqtSignal(object)
+    search_finished = pyqtSignal(int, float)
+
+    def __init__(self, extract_delay_ms: int = 1000, pool: QThreadPool = None, parent=None):
+        super().__init__(parent)
+        self.extract_delay_ms = extract_delay_ms
+        self.pool = pool or QThreadPool.globalInstance()
+
+        self.tab_widgets: List[QTabWidget] = []
+        self.views: Dict[int, QWebEngineView] = {}
+        self.load_ids: Dict[int, int] = {}
+        self.texts: Dict[int, PageText] = {}
+
+        self._generation = 0
+        self._terms: List[str] = []
+        self._pending: set = set()
+        self._found = 0
+        self._started = 0.0
+
+        self._signals = _SearchSignals()
+        self._signals.results.connect(self._on_results)
+        self._signals.done.connect(self._on_done)
+
+        self.stats = {
+            'extractions': 0,
+            'searches': 0,
+            'last_search_ms': 0.0
+        }
+
+    # ------------------------------------------------------------------
+    # Page text
+    # ------------------------------------------------------------------
+    def watch(self, tab_widget: QTabWidget):
+        self.tab_widgets.append(tab_widget)
+        tab_widget.destroyed.connect(lambda: self.tab_widgets.remove(tab_widget))
+
+    def watch_view(self, view: QWebEngineView):
+        key = id(view)
+        if key in self.views:
+            return
+        self.views[key] = view
+        self.load_ids[key] = 0
+        view.loadStarted.connect(lambda: self.on_load_started(key))
+        view.loadFinished.connect(lambda ok: self.on_load_finished(key, ok))
+        view.destroyed.connect(lambda: self.forget(key))
+
+    def on_load_started(self, key: int):
+        self.load_ids[key] += 1
+        self.texts.pop(key, None)
+
+    def on_load_finished(self, key: int, ok: bool):
+        # A search during the load may have taken the text of a partial page
+        self.texts.pop(key, None)
+        if ok:
+            QTimer.singleShot(self.extract_delay_ms, lambda: self.extract(key))
+
+    def forget(self, key: int):
+        self.views.pop(key, None)
+        self.load_ids.pop(key, None)
+        self.texts.pop(key, None)
+        if key in self._pending:
+            # Closed while its text was awaited: the search may be complete now
+            self._pending.discard(key)
+            if not self._pending:
+                self._start([], True)
+
+    def extract(self, key: int):
+        view = self.views.get(key)
+        if view is None:
+            return
+        load_id = self.load_ids[key]
+        entry = self.texts.get(key)
+        if entry is not None and entry.load_id == load_id:
+            return
+        try:
+            view.page().runJavaScript(PAGE_TEXT_JS, lambda text: self.on_text(key, load_id, text))
+        except RuntimeError:
+            self.forget(key)
+
+    def on_text(self, key: int, load_id: int, text):
+        view = self.views.get(key)
+        if view is None:
+            return
+        if self.load_ids.get(key) != load_id:
+            if key in self._pending:
+                self.extract(key)
+            return
+        text = (text or '')[:MAX_PAGE_TEXT] if isinstance(text, str) else ''
+        try:
+            entry = PageText(load_id, view.url().toString(), view.title(), text)
+        except RuntimeError:
+            return
+        self.texts[key] = entry
+        self.stats['extractions'] += 1
+
+        if key in self._pending:
+            self._pending.discard(key)
+            self._start([(key, entry.title, entry.url, entry.folded)], not self._pending)
+
+    def page_text(self, view: QWebEngineView) -> str:
+        """Casefolded text of the current load of ``view`` ('' if not extracted yet)"""
+        key = id(view)
+        entry = self.texts.get(key)
+        if entry is None or entry.load_id != self.load_ids.get(key):
+            return ''
+        return entry.folded
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+    def locate(self, key: int) -> Optional[Tuple[QTabWidget, QWidget]]:
+        for tab_widget in self.tab_widgets:
+            for index in range(tab_widget.count()):
+                widget = tab_widget.widget(index)
+                if id(widget) == key:
+                    return tab_widget, widget
+        return None
+
+    def search(self, query: str) -> int:
+        self._generation += 1
+        self._terms = query.casefold().split()
+        self._pending = set()
+        self._found = 0
+        self._started = time.perf_counter()
+        if not self._terms:
+            return self._generation
+        self.stats['searches'] += 1
+
+        documents = []
+        for tab_widget in self.tab_widgets:
+            for index in range(tab_widget.count()):
+                widget = tab_widget.widget(index)
+                key = id(widget)
+                if isinstance(widget, DiscardedTab):
+                    snapshot = widget.snapshot
+                    documents.append((key, snapshot.title, snapshot.url, snapshot.text))
+                elif isinstance(widget, QWebEngineView):
+                    entry = self.texts.get(key)
+                    if key not in self.views:
+                        self.watch_view(widget)
+                    if entry is None or entry.load_id != self.load_ids[key]:
+                        # Searched when the text arrives
+                        self._pending.add(key)
+                        self.extract(key)
+                    else:
+                        documents.append((key, entry.title, entry.url, entry.folded))
+        self._start(documents, not self._pending)
+        return self._generation
+
+    def _start(self, documents: List[Tuple[int, str, str, str]], final: bool):
+        self.pool.start(_SearchTask(self, self._generation, self._terms, documents, final))
+
+    def _on_results(self, generation: int, batch: List[Dict[str, Any]]):
+        if generation == self._generation:
+            self._found += len(batch)
+            self.results_found.emit(batch)
+
+    def _on_done(self, generation: int, elapsed_ms: float):
+        if generation == self._generation:
+            self.stats['last_search_ms'] = (time.perf_counter() - self._started) * 1000
+            self.search_finished.emit(self._found, self.stats['last_search_ms'])
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats['indexed_pages'] = len(self.texts)
+        stats['indexed_chars'] = sum(len(entry.folded) for entry in self.texts.values())
+        return stats
+
+
+class TabSearchPanel(QWidget):
+    """Поиск по всем вкладкам: результаты по убыванию релевантности"""
+
+    def __init__(self, engine: TabSearchEngine, parent=None):
+        super().__init__(parent)
+        self.engine = engine
+        self.query = ''
+
+        layout = QVBoxLayout(self)
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Найти во всех вкладках...")
+        self.search_input.setClearButtonEnabled(True)
+        layout.addWidget(self.search_input)
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+        self.results_list = QListWidget()
+        self.results_list.setWordWrap(True)
+        layout.addWidget(self.results_list)
+
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(200)
+        self.search_timer.timeout.connect(self.run_search)
+        self.search_input.textChanged.connect(self.search_timer.start)
+        self.search_input.returnPressed.connect(self.run_search)
+        self.results_list.itemActivated.connect(self.open_result)
+
+        engine.results_found.connect(self.add_results)
+        engine.search_finished.connect(self.on_search_finished)
+
+    def focus_search(self):
+        self.search_input.setFocus()
+        self.search_input.selectAll()
+
+    def run_search(self):
+        self.search_timer.stop()
+        self.query = self.search_input.text().strip()
+        self.results_list.clear()
+        self.status_label.setText("Поиск..." if self.query else "")
+        self.engine.search(self.query)
+
+    def add_results(self, batch: List[Dict[str, Any]]):
+        for result in batch:
+            # Insert in score order: batches arrive in tab order
+            row = self.results_list.count()
+            while row > 0 and self.results_list.item(row - 1).data(ResultRole)['score'] < result['score']:
+                row -= 1
+            item = QListWidgetItem(f"{result['title'] or result['url']}  ({result['count']})\n{result['snippet']}")
+            item.setToolTip(result['url'])
+            item.setData(ResultRole, result)
+            self.results_list.insertItem(row, item)
+
+    def on_search_finished(self, count: int, elapsed_ms: float):
+        self.status_label.setText(f"Найдено вкладок: {count} ({elapsed_ms:.0f} мс)")
+
+    def open_result(self, item: QListWidgetItem):
+        located = self.engine.locate(item.data(ResultRole)['key'])
+        if located is None:
+            self.status_label.setText("Вкладка уже закрыта")
+            return
+        tab_widget, widget = located
+        tab_widget.window().activateWindow()
+        tab_widget.setCurrentWidget(widget)
+        # A discarded tab is replaced by a new view on activation
+        view = tab_widget.currentWidget()
+        if not isinstance(view, QWebEngineView):
+            return
+        query = self.query
+        if isinstance(widget, DiscardedTab):
+            def find_after_load(ok, view=view):
+                view.loadFinished.disconnect(find_after_load)
+                view.findText(query)
+            view.loadFinished.connect(find_after_load)
+        else:
+            view.findText(query)
+
+
+# Global tab search engine instance
+_tab_search_engine = None
+
+def get_tab_search_engine() -> TabSearchEngine:
+    """Get global tab search engine (all windows register their tab widgets)"""
+    global _tab_search_engine
+    if _tab_search_engine is None:
+        _tab_search_engine = TabSearchEngine()
+    return _tab_search_engine
+
+def cleanup_tab_search_engine():
+    """Drop global tab search engine"""
+    global _tab_search_engine
+    _tab_search_engine = None
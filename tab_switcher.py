@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+Tab Switcher
+Grid overview of the open tabs of a window. Thumbnails come from the
+thumbnail cache only (memory, then disk) and are looked up when a cell is
+painted, so opening the grid with hundreds of tabs renders no page and
+decodes only the visible thumbnails; discarded tabs show their last capture
+"""
+
+from typing import Any, List, Optional
+
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, QSize, Qt
+from PyQt5.QtGui import QPixmap
+from PyQt5.QtWidgets import QDialog, QLabel, QListView, QTabWidget, QVBoxLayout
+
+from tab_discard import DiscardedTab
+from thumbnail_service import ThumbnailService
+
+UrlRole = Qt.UserRole
+IndexRole = Qt.UserRole + 1
+
+CELL_SIZE = QSize(220, 170)
+ICON_SIZE = QSize(200, 125)
+
+
+def tab_url(tab_widget: QTabWidget, index: int) -> str:
+    widget = tab_widget.widget(index)
+    if isinstance(widget, DiscardedTab):
+        return widget.snapshot.url
+    url = getattr(widget, 'url', None)
+    return url().toString() if callable(url) else ''
+
+
+class TabGridModel(QAbstractListModel):
+    """One row per tab: title, URL and the cached thumbnail as decoration"""
+
+    def __init__(self, tab_widget: QTabWidget, service: ThumbnailService, parent=None):
+        super().__init__(parent)
+        self.tab_widget = tab_widget
+        self.service = service
+        self.titles: List[str] = []
+        self.urls: List[str] = []
+        self.placeholder = QPixmap(ICON_SIZE)
+        self.placeholder.fill(Qt.lightGray)
+        self.reload()
+        service.thumbnail_ready.connect(self.on_thumbnail_ready)
+
+    def reload(self):
+        self.beginResetModel()
+        count = self.tab_widget.count()
+        self.titles = [self.tab_widget.tabText(i) for i in range(count)]
+        self.urls = [tab_url(self.tab_widget, i) for i in range(count)]
+        self.endResetModel()
+
+    def on_thumbnail_ready(self, url: str):
+        for row, tab in enumerate(self.urls):
+            if tab == url:
+                index = self.index(row)
+                self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.urls)
+
+    def data(self, index, role=Qt.DisplayRole) -> Optional[Any]:
+        if not index.isValid():
+            return None
+        row = index.row()
+        if role == Qt.DisplayRole:
+            return self.titles[row] or self.urls[row]
+        if role == Qt.DecorationRole:
+            pixmap = self.service.thumbnail(self.urls[row]) if self.urls[row] else None
+            if pixmap is None:
+                return self.placeholder
+            return pixmap.scaled(ICON_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        if role in (UrlRole, Qt.ToolTipRole):
+            return self.urls[row]
+        if role == IndexRole:
+            return row
+        return None
+
+
+class TabSwitcherPage(QDialog):
+    """Сетка вкладок; двойной щелчок или Enter переключает на вкладку"""
+
+    def __init__(self, tab_widget: QTabWidget, service: ThumbnailService, parent=None):
+        super().__init__(parent)
+        self.tab_widget = tab_widget
+        self.setWindowTitle("Обзор вкладок")
+        self.setMinimumSize(960, 640)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel(f"Открыто вкладок: {tab_widget.count()}"))
+
+        self.model = TabGridModel(tab_widget, service, self)
+        self.view = QListView()
+        self.view.setViewMode(QListView.IconMode)
+        self.view.setResizeMode(QListView.Adjust)
+        self.view.setMovement(QListView.Static)
+        self.view.setUniformItemSizes(True)
+        self.view.setGridSize(CELL_SIZE)
+        self.view.setIconSize(ICON_SIZE)
+        self.view.setWordWrap(True)
+        self.view.setModel(self.model)
+        self.view.activated.connect(self.switch_to)
+        layout.addWidget(self.view)
+
+        current = self.model.index(tab_widget.currentIndex())
+        self.view.setCurrentIndex(current)
+        self.view.scrollTo(current)
+
+    def switch_to(self, index):
+        self.tab_widget.setCurrentIndex(index.data(IndexRole))
+        self.accept()
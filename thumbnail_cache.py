@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+Thumbnail Cache
+Page thumbnails keyed by URL plus a hash of their content: a bounded
+in-memory LRU of decoded QPixmaps in front of a size-bounded LRU directory
+of small JPEG files. Scaling, hashing, encoding and writing happen on a
+QThreadPool worker, so storing a thumbnail costs the UI thread nothing
+beyond the grab itself; an unchanged page (same content hash) is not
+written again
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from PyQt5.QtCore import QBuffer, QByteArray, QIODevice, QObject, QRunnable, QSize, Qt, QThreadPool, pyqtSignal
+from PyQt5.QtGui import QImage, QPixmap
+
+from persistence import atomic_write, get_persistence_service
+
+THUMBNAIL_SIZE = QSize(280, 175)
+JPEG_QUALITY = 80
+INDEX_FILE = 'index.json'
+
+
+def url_key(url: str) -> str:
+    return hashlib.sha1(url.encode('utf-8')).hexdigest()[:20]
+
+
+def content_hash(image: QImage) -> str:
+    bits = image.constBits()
+    bits.setsize(image.sizeInBytes())
+    return hashlib.sha1(bytes(bits)).hexdigest()[:16]
+
+
+def scale_thumbnail(image: QImage, size: QSize = THUMBNAIL_SIZE) -> QImage:
+    """Scale to fill ``size`` and crop the overflow (top-aligned, like a page preview)"""
+    scaled = image.scaled(size, Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
+    x = max((scaled.width() - size.width()) // 2, 0)
+    return scaled.copy(x, 0, size.width(), size.height()).convertToFormat(QImage.Format_RGB32)
+
+
+class _StoreTask(QRunnable):
+    """Scale, hash, encode and write one grabbed image (worker thread)"""
+
+    def __init__(self, cache: 'ThumbnailCache', url: str, image: QImage):
+        super().__init__()
+        self.cache = cache
+        self.url = url
+        self.image = image
+
+    def run(self):
+        try:
+            thumbnail = scale_thumbnail(self.image)
+            digest = content_hash(thumbnail)
+            if self.cache._is_current(self.url, digest):
+                self.cache._encoded.emit(self.url, thumbnail, digest, False)
+                return
+
+            data = QByteArray()
+            buffer = QBuffer(data)
+            buffer.open(QIODevice.WriteOnly)
+            if not thumbnail.save(buffer, 'JPG', JPEG_QUALITY):
+                return
+            self.cache._write(self.url, digest, bytes(data))
+            self.cache._encoded.emit(self.url, thumbnail, digest, True)
+        except Exception as e:
+            print(f"[WARNING] Thumbnail store failed for {self.url}: {e}")
+
+
+class ThumbnailCache(QObject):
+    """
+    ``get(url)`` returns a QPixmap from memory, else decodes it from disk into
+    the memory LRU (``memory_items`` entries); ``put(url, image)`` hands a
+    grabbed image of any size to a worker and emits ``stored(url)`` once the
+    new thumbnail can be read.
+
+    The disk index (url -> file, content hash, size, last use) is written
+    behind by the persistence service; files past ``max_disk_mb`` are
+    evicted least recently used first. ``contains`` answers from the index,
+    so asking which pages still need a thumbnail never touches the disk.
+    """
+
+    stored = pyqtSignal(str)
+    _encoded = pyqtSignal(str, object, str, bool)
+
+    def __init__(self, cache_dir: str, memory_items: int = 64, max_disk_mb: int = 50,
+                 pool: QThreadPool = None):
+        super().__init__()
+        self.cache_dir = cache_dir
+        self.memory_items = memory_items
+        self.max_disk_bytes = max_disk_mb * 1024 * 1024
+        self.pool = pool or QThreadPool.globalInstance()
+
+        self.memory: 'OrderedDict[str, QPixmap]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.index: Dict[str, Dict[str, Any]] = {}
+        self.disk_bytes = 0
+
+        self.stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'puts': 0,
+            'unchanged': 0,
+            'disk_writes': 0,
+            'evictions': 0
+        }
+
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+        self._load_index()
+
+        self.persistence = get_persistence_service()
+        self.persistence.register('thumbnails', os.path.join(cache_dir, INDEX_FILE), self._index_snapshot,
+                                 copy=False)
+        self._encoded.connect(self._on_encoded)
+
+    # ------------------------------------------------------------------
+    # Index
+    # ------------------------------------------------------------------
+    def _load_index(self):
+        path = os.path.join(self.cache_dir, INDEX_FILE)
+        index = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    index = json.load(f)
+            except (OSError, ValueError):
+                index = {}
+
+        files = {name for name in os.listdir(self.cache_dir) if name.endswith('.jpg')}
+        self.index = {url: entry for url, entry in index.items()
+                      if isinstance(entry, dict) and entry.get('file') in files}
+        self.disk_bytes = sum(entry.get('size', 0) for entry in self.index.values())
+
+        # Files the index does not know about (crash between write and index flush)
+        known = {entry['file'] for entry in self.index.values()}
+        for name in files - known:
+            self._unlink(name)
+
+    def _index_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {url: dict(entry) for url, entry in self.index.items()}
+
+    def _is_current(self, url: str, digest: str) -> bool:
+        with self._lock:
+            entry = self.index.get(url)
+            if entry is None or entry['hash'] != digest:
+                return False
+            entry['used'] = time.time()
+            return True
+
+    def _unlink(self, name: str):
+        try:
+            os.remove(os.path.join(self.cache_dir, name))
+        except OSError:
+            pass
+
+    def _write(self, url: str, digest: str, data: bytes):
+        """Write a new thumbnail file, drop the previous one and evict past the size bound"""
+        name = f"{url_key(url)}-{digest}.jpg"
+        atomic_write(os.path.join(self.cache_dir, name), data)
+
+        stale = []
+        with self._lock:
+            old = self.index.get(url)
+            if old is not None:
+                self.disk_bytes -= old.get('size', 0)
+                if old['file'] != name:
+                    stale.append(old['file'])
+            self.index[url] = {'file': name, 'hash': digest, 'size': len(data), 'used': time.time()}
+            self.disk_bytes += len(data)
+            self.stats['disk_writes'] += 1
+
+            if self.disk_bytes > self.max_disk_bytes:
+                for victim, entry in sorted(self.index.items(), key=lambda item: item[1]['used']):
+                    if self.disk_bytes <= self.max_disk_bytes * 0.9:
+                        break
+                    if victim == url:
+                        continue
+                    del self.index[victim]
+                    self.disk_bytes -= entry.get('size', 0)
+                    stale.append(entry['file'])
+                    self.stats['evictions'] += 1
+
+        for name in stale:
+            self._unlink(name)
+        self.persistence.mark_dirty('thumbnails')
+
+    # ------------------------------------------------------------------
+    # Memory
+    # ------------------------------------------------------------------
+    def _remember(self, url: str, pixmap: QPixmap):
+        self.memory[url] = pixmap
+        self.memory.move_to_end(url)
+        while len(self.memory) > self.memory_items:
+            self.memory.popitem(last=False)
+
+    def _on_encoded(self, url: str, thumbnail: QImage, digest: str, changed: bool):
+        if not changed:
+            self.stats['unchanged'] += 1
+            if url in self.memory:
+                return
+        self._remember(url, QPixmap.fromImage(thumbnail))
+        self.stored.emit(url)
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+    def contains(self, url: str) -> bool:
+        with self._lock:
+            return url in self.memory or url in self.index
+
+    def get(self, url: str) -> Optional[QPixmap]:
+        pixmap = self.memory.get(url)
+        if pixmap is not None:
+            self.memory.move_to_end(url)
+            self.stats['memory_hits'] += 1
+            return pixmap
+
+        with self._lock:
+            entry = self.index.get(url)
+            if entry is not None:
+                entry['used'] = time.time()
+                name = entry['file']
+        if entry is not None:
+            pixmap = QPixmap(os.path.join(self.cache_dir, name))
+            if not pixmap.isNull():
+                self._remember(url, pixmap)
+                self.stats['disk_hits'] += 1
+                return pixmap
+        self.stats['misses'] += 1
+        return None
+
+    def put(self, url: str, image: QImage):
+        """Store a grabbed page image (any size) as the thumbnail of ``url``"""
+        if not url or image.isNull():
+            return
+        self.stats['puts'] += 1
+        self.pool.start(_StoreTask(self, url, image))
+
+    def remove(self, url: str):
+        self.memory.pop(url, None)
+        with self._lock:
+            entry = self.index.pop(url, None)
+            if entry is not None:
+                self.disk_bytes -= entry.get('size', 0)
+        if entry is not None:
+            self._unlink(entry['file'])
+            self.persistence.mark_dirty('thumbnails')
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats['memory_items'] = len(self.memory)
+        with self._lock:
+            stats['disk_items'] = len(self.index)
+            stats['disk_bytes'] = self.disk_bytes
+        return stats
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+Tab Thumbnail Service
+Captures downscaled thumbnails of tabs into the shared ThumbnailCache: once
+a page has finished loading and again when the user has been idle on a
+tab. Only visible views are grabbed; hidden and discarded tabs are served
+from the cache and never rendered for a thumbnail
+"""
+
+import os
+from typing import Any, Dict, List
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from PyQt5.QtWebEngineWidgets import QWebEngineView
+from PyQt5.QtWidgets import QTabWidget
+
+from thumbnail_cache import ThumbnailCache
+
+
+class ThumbnailService(QObject):
+    """
+    ``watch_view(view)`` captures ``view`` ``capture_delay_ms`` after each
+    successful load (if it is still visible then); ``watch(tab_widget)``
+    captures the current tab after ``idle_delay_ms`` without tab switches or
+    loads. Identical captures are dropped by the cache's content hash.
+    """
+
+    thumbnail_ready = pyqtSignal(str)
+
+    def __init__(self, cache: ThumbnailCache, capture_delay_ms: int = 1500,
+                 idle_delay_ms: int = 10000, parent=None):
+        super().__init__(parent)
+        self.cache = cache
+        self.capture_delay_ms = capture_delay_ms
+        self.tab_widgets: List[QTabWidget] = []
+
+        self.idle_timer = QTimer(self)
+        self.idle_timer.setSingleShot(True)
+        self.idle_timer.setInterval(idle_delay_ms)
+        self.idle_timer.timeout.connect(self.capture_idle)
+
+        self.stats = {
+            'captures': 0,
+            'skipped_hidden': 0,
+            'idle_captures': 0
+        }
+
+        cache.stored.connect(self.thumbnail_ready)
+
+    # ------------------------------------------------------------------
+    # Triggers
+    # ------------------------------------------------------------------
+    def watch(self, tab_widget: QTabWidget):
+        self.tab_widgets.append(tab_widget)
+        tab_widget.currentChanged.connect(lambda _index: self.idle_timer.start())
+        tab_widget.destroyed.connect(lambda: self.tab_widgets.remove(tab_widget))
+
+    def watch_view(self, view: QWebEngineView):
+        view.loadFinished.connect(lambda ok, view=view: self.on_load_finished(view, ok))
+
+    def on_load_finished(self, view: QWebEngineView, ok: bool):
+        if ok:
+            QTimer.singleShot(self.capture_delay_ms, lambda: self.capture(view))
+        self.idle_timer.start()
+
+    def capture_idle(self):
+        for tab_widget in self.tab_widgets:
+            view = tab_widget.currentWidget()
+            if isinstance(view, QWebEngineView) and self.capture(view):
+                self.stats['idle_captures'] += 1
+
+    # ------------------------------------------------------------------
+    # Capture
+    # ------------------------------------------------------------------
+    def capture(self, view: QWebEngineView) -> bool:
+        """Grab ``view`` if it is on screen; scaling and storing run off-thread"""
+        try:
+            if not view.isVisible() or view.visibleRegion().isEmpty():
+                self.stats['skipped_hidden'] += 1
+                return False
+            url = view.url().toString()
+        except RuntimeError:
+            # The tab was closed before the delayed capture
+            return False
+        if not url or url.startswith('about:'):
+            return False
+        self.cache.put(url, view.grab().toImage())
+        self.stats['captures'] += 1
+        return True
+
+    def thumbnail(self, url: str):
+        return self.cache.get(url)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats['cache'] = self.cache.get_stats()
+        return stats
+
+
+# Global thumbnail service instance
+_thumbnail_service = None
+
+def get_thumbnail_service(data_dir: str = 'data') -> ThumbnailService:
+    """Get global thumbnail service (shared by all windows and the new tab page)"""
+    global _thumbnail_service
+    if _thumbnail_service is None:
+        _thumbnail_service = ThumbnailService(ThumbnailCache(os.path.join(data_dir, 'thumbnails')))
+    return _thumbnail_service
+
+def cleanup_thumbnail_service():
+    """Drop global thumbnail service"""
+    global _thumbnail_service
+    _thumbnail_service = None
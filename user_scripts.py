@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+User Script Registry
+Page scripts (phishing protection, form autofill, WebGPU hints, the dark
+web theme) registered once on the profile as QWebEngineScripts instead of
+being re-sent with runJavaScript to one tab at a time. Each script is
+compiled once into a Greasemonkey-style source (@match, @run-at) with its
+injection point and world id; Chromium then injects it into every matching
+page itself. Scripts are versioned by name, so re-registering an unchanged
+script is a no-op
+"""
+
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Pattern, Tuple
+
+from PyQt5.QtWebEngineWidgets import QWebEngineProfile, QWebEngineScript, QWebEngineView
+
+WEB_PAGES = ('http://*/*', 'https://*/*')
+
+RUN_AT = {
+    QWebEngineScript.DocumentCreation: 'document-start',
+    QWebEngineScript.DocumentReady: 'document-end',
+    QWebEngineScript.Deferred: 'document-idle'
+}
+
+# Dark page theme, injected before the page paints
+STYLE_SOURCE = """
+(function() {
+    var style = document.createElement('style');
+    style.id = %(id)s;
+    style.textContent = %(css)s;
+    (document.head || document.documentElement).appendChild(style);
+})();
+"""
+
+
+def match_pattern_regex(pattern: str) -> Pattern:
+    """Regex for a match pattern: ``<scheme>://<host>/<path>`` with ``*`` wildcards"""
+    if pattern == '<all_urls>':
+        return re.compile(r'(?:https?|file|ftp)://.*')
+    scheme, _, rest = pattern.partition('://')
+    host, _, path = rest.partition('/')
+    scheme_re = 'https?' if scheme == '*' else re.escape(scheme)
+    if host == '*':
+        host_re = '[^/]*'
+    elif host.startswith('*.'):
+        host_re = r'(?:[^/]*\.)?' + re.escape(host[2:])
+    else:
+        host_re = re.escape(host)
+    path_re = '.*'.join(re.escape(part) for part in path.split('*'))
+    return re.compile(f'{scheme_re}://{host_re}(?::\\d+)?/{path_re}')
+
+
+def style_source(style_id: str, css: str) -> str:
+    """Script source adding ``css`` as a <style> element"""
+    return STYLE_SOURCE % {'id': json.dumps(style_id), 'css': json.dumps(css.strip())}
+
+
+@dataclass
+class UserScript:
+    name: str
+    source: str
+    version: int = 1
+    injection_point: int = QWebEngineScript.DocumentReady
+    world_id: int = QWebEngineScript.ApplicationWorld
+    matches: Tuple[str, ...] = WEB_PAGES
+    subframes: bool = False
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}@{self.version}"
+
+    def header(self) -> str:
+        lines = ['// ==UserScript==', f'// @name {self.key}']
+        lines += [f'// @match {pattern}' for pattern in self.matches]
+        lines += [f'// @run-at {RUN_AT[self.injection_point]}', '// ==/UserScript==']
+        return '\n'.join(lines) + '\n'
+
+    def compile(self) -> QWebEngineScript:
+        script = QWebEngineScript()
+        script.setName(self.key)
+        script.setSourceCode(self.header() + self.source)
+        script.setInjectionPoint(self.injection_point)
+        script.setWorldId(self.world_id)
+        script.setRunsOnSubFrames(self.subframes)
+        return script
+
+
+class UserScriptRegistry:
+    """
+    ``register(script)`` adds ``script`` to the profile's script collection
+    (replacing an older version of the same name); ``unregister(name)``
+    removes it. ``enable(script, view)`` also runs a newly registered script
+    once on ``view``, whose page was loaded before the script existed.
+
+    Injection counts are kept per script: ``watch_view(view)`` counts each
+    finished main-frame load whose URL matches the script's patterns.
+    """
+
+    def __init__(self, profile: Optional[QWebEngineProfile] = None):
+        self.profile = profile or QWebEngineProfile.defaultProfile()
+        self.scripts: Dict[str, UserScript] = {}
+        self.compiled: Dict[str, QWebEngineScript] = {}
+        self.patterns: Dict[str, Tuple[Pattern, ...]] = {}
+        self.injections: Dict[str, int] = {}
+
+        self.stats = {
+            'registered': 0,
+            'unchanged': 0,
+            'replaced': 0,
+            'removed': 0
+        }
+
+    # ------------------------------------------------------------------
+    # Registration
+    # ------------------------------------------------------------------
+    def register(self, script: UserScript) -> bool:
+        """Register ``script``; False if this version is registered already"""
+        current = self.scripts.get(script.name)
+        if current is not None:
+            if current.version == script.version:
+                self.stats['unchanged'] += 1
+                return False
+            self._remove(script.name)
+            self.stats['replaced'] += 1
+
+        compiled = script.compile()
+        self.profile.scripts().insert(compiled)
+        self.scripts[script.name] = script
+        self.compiled[script.name] = compiled
+        self.patterns[script.name] = tuple(match_pattern_regex(p) for p in script.matches)
+        self.injections.setdefault(script.name, 0)
+        self.stats['registered'] += 1
+        print(f"[INFO] User script {script.key} registered")
+        return True
+
+    def _remove(self, name: str):
+        compiled = self.compiled.pop(name)
+        self.profile.scripts().remove(compiled)
+        del self.scripts[name]
+        del self.patterns[name]
+
+    def unregister(self, name: str) -> bool:
+        if name not in self.scripts:
+            return False
+        self._remove(name)
+        self.stats['removed'] += 1
+        return True
+
+    def is_registered(self, name: str) -> bool:
+        return name in self.scripts
+
+    def enable(self, script: UserScript, view: Optional[QWebEngineView] = None) -> bool:
+        """Register ``script`` and apply it to the already loaded page of ``view``"""
+        if not self.register(script):
+            return False
+        if view is not None and self.matches(script.name, view.url().toString()):
+            view.page().runJavaScript(script.source, script.world_id)
+            self.injections[script.name] += 1
+        return True
+
+    # ------------------------------------------------------------------
+    # Injection counts
+    # ------------------------------------------------------------------
+    def matches(self, name: str, url: str) -> bool:
+        return any(pattern.fullmatch(url) for pattern in self.patterns.get(name, ()))
+
+    def watch_view(self, view: QWebEngineView):
+        view.loadFinished.connect(lambda ok, view=view: self.on_load_finished(view, ok))
+
+    def on_load_finished(self, view: QWebEngineView, ok: bool):
+        if not ok or not self.scripts:
+            return
+        try:
+            url = view.url().toString()
+        except RuntimeError:
+            return
+        for name in self.scripts:
+            if self.matches(name, url):
+                self.injections[name] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats['scripts'] = {
+            name: {'version': script.version, 'injections': self.injections.get(name, 0)}
+            for name, script in self.scripts.items()
+        }
+        stats['injections'] = dict(self.injections)
+        return stats
+
+
+# Global user script registry instance
+_user_scripts = None
+
+def get_user_scripts() -> UserScriptRegistry:
+    """Get global user script registry (default profile, shared by all windows)"""
+    global _user_scripts
+    if _user_scripts is None:
+        _user_scripts = UserScriptRegistry()
+    return _user_scripts
+
+def cleanup_user_scripts():
+    """Drop global user script registry"""
+    global _user_scripts
+    _user_scripts = None
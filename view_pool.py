@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+Warm WebView Pool
+New tabs are served from a small pool of QWebEngineViews that already have
+their page, settings and the new-tab page loaded; the pool is refilled once
+the browser has been idle for a moment. Time-to-interactive of every new tab
+(warm or cold) is recorded for comparison
+"""
+
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List
+
+from PyQt5.QtCore import QObject, QTimer, QUrl
+from PyQt5.QtWebEngineWidgets import QWebEngineView
+
+from memory_manager import MemoryPool
+
+# Dynamic property set once a pooled view has finished loading the new-tab page
+READY_PROPERTY = 'view_pool_ready'
+
+# Counter in stats for each kind of hand-out
+HIT_STATS = {'warm': 'warm_hits', 'warming': 'warming_hits', 'cold': 'cold_misses'}
+
+# New-tab timings kept per kind for the averages in get_stats
+TTI_SAMPLES = 50
+
+
+class WarmViewPool(QObject):
+    """
+    Pre-warmed views for ``url`` (the new-tab page).
+
+    ``create_view()`` builds a wired-up view exactly as for a normal tab.
+    ``acquire()`` hands out a loaded view if one is ready, else one that is
+    still warming, else a cold one, and schedules a refill ``refill_delay_ms``
+    after the last request (so bursts of Ctrl+T do not compete with warming).
+    """
+
+    def __init__(self, create_view: Callable[[], QWebEngineView], url: QUrl, size: int = 1,
+                 refill_delay_ms: int = 1000, parent=None):
+        super().__init__(parent)
+        self.create_view = create_view
+        self.url = url
+        self.pool = MemoryPool(QWebEngineView, max_size=size, factory=self._create_cold)
+        self.warming: List[QWebEngineView] = []
+
+        self.refill_timer = QTimer(self)
+        self.refill_timer.setSingleShot(True)
+        self.refill_timer.setInterval(refill_delay_ms)
+        self.refill_timer.timeout.connect(self.fill)
+
+        self.tti: Dict[str, Deque[float]] = {kind: deque(maxlen=TTI_SAMPLES)
+                                             for kind in ('warm', 'warming', 'cold')}
+        self.stats = {
+            'warm_hits': 0,
+            'warming_hits': 0,
+            'cold_misses': 0,
+            'views_warmed': 0,
+            'warm_failures': 0
+        }
+
+    # ------------------------------------------------------------------
+    # Warming
+    # ------------------------------------------------------------------
+    def _create_cold(self) -> QWebEngineView:
+        view = self.create_view()
+        view.setUrl(self.url)
+        return view
+
+    def schedule_refill(self):
+        self.refill_timer.start()
+
+    def fill(self):
+        """Start warming views until the pool (ready + warming) is full"""
+        while self.pool.available() + len(self.warming) < self.pool.max_size:
+            view = self.create_view()
+            view.setProperty(READY_PROPERTY, False)
+            self.warming.append(view)
+            view.loadFinished.connect(lambda ok, view=view: self._warmed(view, ok))
+            view.setUrl(self.url)
+
+    def _warmed(self, view: QWebEngineView, ok: bool):
+        # Handed out while warming, or a later navigation of a pooled view
+        if view not in self.warming:
+            return
+        self.warming.remove(view)
+        if not ok:
+            self.stats['warm_failures'] += 1
+            view.deleteLater()
+            return
+        view.setProperty(READY_PROPERTY, True)
+        if self.pool.put(view):
+            self.stats['views_warmed'] += 1
+        else:
+            view.deleteLater()
+
+    # ------------------------------------------------------------------
+    # Hand-out
+    # ------------------------------------------------------------------
+    def acquire(self) -> QWebEngineView:
+        """A view showing (or loading) the new-tab page; the caller adds it to a tab"""
+        started = time.perf_counter()
+        if self.pool.available():
+            view = self.pool.acquire()
+            kind = 'warm'
+        elif self.warming:
+            view = self.warming.pop(0)
+            kind = 'warming'
+        else:
+            view = self.pool.acquire()
+            kind = 'cold'
+        self.stats[HIT_STATS[kind]] += 1
+        self._measure(view, kind, started)
+        self.schedule_refill()
+        return view
+
+    def _measure(self, view: QWebEngineView, kind: str, started: float):
+        """Time until the tab is interactive: next event loop turn if loaded, else loadFinished"""
+        def record(*_args):
+            self.tti[kind].append((time.perf_counter() - started) * 1000)
+
+        if kind == 'warm':
+            QTimer.singleShot(0, record)
+            return
+
+        def on_loaded(ok):
+            view.loadFinished.disconnect(on_loaded)
+            record()
+        view.loadFinished.connect(on_loaded)
+
+    def is_ready(self, view: QWebEngineView) -> bool:
+        return bool(view.property(READY_PROPERTY))
+
+    def clear(self):
+        """Drop every pooled and warming view (on window close)"""
+        self.refill_timer.stop()
+        for view in list(self.pool.pool) + self.warming:
+            view.stop()
+            view.deleteLater()
+        self.pool.clear()
+        self.warming.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats['ready'] = self.pool.available()
+        stats['warming'] = len(self.warming)
+        for kind, samples in self.tti.items():
+            stats[f'avg_tti_{kind}_ms'] = sum(samples) / len(samples) if samples else 0.0
+        return stats